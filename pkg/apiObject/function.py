@@ -6,25 +6,24 @@ import shutil
 import platform
 from pathlib import Path
 
+from pkg.utils.dockerClient import docker_client
+
 def exists_in_dir(file, dir):
     tgt_path = os.path.join(dir, file)
     return os.path.isfile(tgt_path)
 
 class Function:
-    def __init__(self, config, serverless_config, file):
+    def __init__(self, config, serverless_config, file, client=None):
         self.config = config
         self.file = file
         self.serverless_config = serverless_config
         self.image_name = None
 
-        if platform.system() == "Windows":
-            self.client = docker.DockerClient(
-                base_url="npipe:////./pipe/docker_engine", version="1.25", timeout=60
-            )
+        # apiServer传入共享的docker客户端，避免每个Function对象各建一个
+        if client is not None:
+            self.client = client
         else:
-            self.client = docker.DockerClient(
-                base_url="unix://var/run/docker.sock", version="1.25", timeout=5
-            )
+            self.client = docker_client(timeout=60 if platform.system() == "Windows" else 5)
 
     def download_unzip_code(self):
         code_dir = self.config.code_dir
@@ -175,6 +174,7 @@ metadata:
   name: {name}
   namespace: {namespace}
 spec:
+  priorityClassName: {self.serverless_config.POD_PRIORITY_CLASS}
   containers:
   - name: {name}-server
     image: {self.config.target_image}
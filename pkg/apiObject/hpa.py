@@ -1,9 +1,9 @@
 import datetime
-import requests
 from pkg.apiServer.apiClient import ApiClient
 from pkg.config.uriConfig import URIConfig
 from pkg.config.hpaConfig import HorizontalPodAutoscalerConfig
 from pkg.apiObject.replicaSet import ReplicaSet
+from pkg.utils.quantity import parse_cpu, parse_memory
 from typing import Optional
 
 
@@ -39,9 +39,6 @@ class HorizontalPodAutoscaler:
         self.status = STATUS.PENDING
         self.current_replicas = 0
         self.last_scale_time = None
-        # self.cadvisor_base_url = f"http://{URIConfig.HOST}:8080"
-        # 非常重要！在mac上因为无法运行cadvisor，所以使用必须使用云主机上的cadvisor docker，只是用来测试获取的正确性的
-        self.cadvisor_base_url = f"http://10.119.15.182:8080"
 
         # API通信
         self.api_client = None
@@ -233,189 +230,70 @@ class HorizontalPodAutoscaler:
         return None
 
     # 资源监控方法
-    def get_container_metrics(self, container_id):
-        """获取容器的指标数据"""
-        try:
-            url = f"{self.cadvisor_base_url}/api/v1.3/docker/{container_id}"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return response.json()
-
-            print(
-                f"[ERROR]Failed to get metrics for container {container_id}, status: {response.status_code}"
-            )
-            return None
-        except Exception as e:
-            print(f"[ERROR]Error getting container metrics: {e}")
-            return None
-
-    def get_machine_realtime_metrics(self):
-        """获取机器的指标数据"""
-        try:
-            url = f"{self.cadvisor_base_url}/api/v1.3/docker/"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return response.json()
-
-            return None
-        except Exception as e:
-            print(f"[ERROR]Error getting container metrics: {e}")
-            return None
-
-    def get_machine_info(self):
-        """获取机器信息，包括 CPU 核心数等"""
-        try:
-            url = f"{self.cadvisor_base_url}/api/v2.0/machine"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return response.json()
-
-            print(f"[ERROR]Failed to get machine info, status: {response.status_code}")
-            return None
-        except Exception as e:
-            print(f"[ERROR]Error getting machine info: {e}")
-            return None
+    def get_target_pods_metrics(self):
+        """
+        目标ReplicaSet的全部Pod的资源指标，经apiServer从Pod所在节点的kubelet获取
+        返回[(pod_dict, metrics)]，metrics中cpu为核数，memory为字节，指标暂不可用的Pod不在结果中
+        """
+        self._ensure_api_client()
+        pods = self.api_client.get(self.uri_config.PODS_URL.format(namespace=self.namespace)) or []
+        owned = {}
+        for pod_entry in pods:
+            for pod_name, pod_data in pod_entry.items():
+                owners = pod_data.get("metadata", {}).get("ownerReferences") or []
+                if any(o.get("kind") == self.target_kind and o.get("name") == self.target_name for o in owners):
+                    owned[pod_name] = pod_data
+        if not owned:
+            return []
 
-    def get_machine_metrics_summary(self):
-        """获取机器的指标摘要数据 (v2.0 API)"""
-        try:
-            url = f"{self.cadvisor_base_url}/api/v2.0/summary"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                return response.json()
+        response = self.api_client.get(self.uri_config.PODS_METRICS_URL.format(namespace=self.namespace))
+        if not response:
+            print(f"[ERROR]Failed to get pod metrics in namespace {self.namespace}")
+            return []
+        return [(owned[m["name"]], m) for m in response.get("pods", []) if m.get("name") in owned]
 
-            print(
-                f"[ERROR]Failed to get metrics summary, status: {response.status_code}"
-            )
-            return None
-        except Exception as e:
-            print(f"[ERROR]Error getting metrics summary: {e}")
+    @staticmethod
+    def _pod_resource(pod_data, resource):
+        """Pod各容器requests之和，没有requests时取limits之和，都没有时返回None；CPU为核数，内存为字节"""
+        parse = parse_cpu if resource == "cpu" else parse_memory
+        total = {"requests": 0, "limits": 0}
+        for container in pod_data.get("spec", {}).get("containers", []):
+            resources = container.get("resources") or {}
+            for kind in total:
+                total[kind] += parse((resources.get(kind) or {}).get(resource))
+        return total["requests"] or total["limits"] or None
+
+    def _average_utilization(self, resource):
+        utilizations = []
+        for pod_data, metrics in self.get_target_pods_metrics():
+            usage = metrics.get(resource)
+            if usage is None:
+                continue
+            capacity = self._pod_resource(pod_data, resource)
+            if capacity is None:
+                # 没有声明CPU资源的Pod按一个核计算；没有声明内存的Pod无法计算使用率
+                if resource != "cpu":
+                    continue
+                capacity = 1.0
+            utilizations.append(usage / capacity * 100)
+        if not utilizations:
+            print(f"[ERROR]No {resource} metrics available for {self.target_kind} {self.target_name}")
             return None
+        return sum(utilizations) / len(utilizations)
 
-    def get_cpu_usage_percentage(self, container_id=None):
-        """获取CPU使用率百分比 - 使用 v2.0 API"""
-        try:
-            # 获取摘要数据
-            summary = self.get_machine_metrics_summary()
-            if not summary:
-                print("[ERROR]未获取到指标摘要数据")
-                return None
-
-            # v2.0 API 中的 CPU 使用率已经是百分比形式
-            # 获取根容器 ("/") 的数据，或者使用特定容器路径
-            container_path = "/" if container_id is None else f"/docker/{container_id}"
-
-            if container_path not in summary:
-                print(f"[ERROR]在摘要中未找到容器路径: {container_path}")
-                return None
-
-            # 获取最新 CPU 使用率（百分比）
-            cpu_percent = summary[container_path].get("latest_usage", {}).get("cpu")
-
-            # 如果 latest_usage 中没有 CPU 数据，尝试使用 minute_usage
-            if cpu_percent is None:
-                minute_data = summary[container_path].get("minute_usage", {})
-                if minute_data.get("percent_complete", 0) > 0 and minute_data.get(
-                    "cpu", {}
-                ).get("present", False):
-                    cpu_percent = minute_data.get("cpu", {}).get("mean")
-
-            if cpu_percent is None:
-                print("[ERROR]未找到有效的 CPU 使用率数据")
-                return None
-            
-            cpu_percent = float(cpu_percent) / 100.0
-
+    def get_cpu_usage_percentage(self):
+        """目标Pod的平均CPU使用率：使用量/requests（没有requests时为limits），与kubernetes的averageUtilization一致"""
+        cpu_percent = self._average_utilization("cpu")
+        if cpu_percent is not None:
             print(f"[DEBUG]CPU使用率: {cpu_percent:.2f}%")
-            return float(cpu_percent)
-
-        except Exception as e:
-            print(f"[ERROR]计算CPU使用率时出错: {e}")
-            import traceback
-
-            print(f"[ERROR]详细错误: {traceback.format_exc()}")
-            return None
-
-    def get_memory_usage_percentage(self, container_id=None):
-        """获取内存使用率百分比 - 使用 v2.0 API"""
-        try:
-            # 获取摘要数据
-            summary = self.get_machine_metrics_summary()
-            if not summary:
-                print("[ERROR]未获取到指标摘要数据")
-                return None
-
-            # 获取机器信息，用于计算内存总量
-            machine_info = self.get_machine_info()
-            if not machine_info or "memory_capacity" not in machine_info:
-                print("[ERROR]未获取到机器内存容量信息")
-                return None
-
-            total_memory = machine_info.get("memory_capacity")
-
-            # 获取根容器 ("/") 的数据，或者使用特定容器路径
-            container_path = "/" if container_id is None else f"/docker/{container_id}"
-
-            if container_path not in summary:
-                print(f"[ERROR]在摘要中未找到容器路径: {container_path}")
-                return None
-
-            # 获取最新内存使用量（字节）
-            memory_usage = summary[container_path].get("latest_usage", {}).get("memory")
-
-            # 如果 latest_usage 中没有内存数据，尝试使用 minute_usage
-            if memory_usage is None:
-                minute_data = summary[container_path].get("minute_usage", {})
-                if minute_data.get("percent_complete", 0) > 0 and minute_data.get(
-                    "memory", {}
-                ).get("present", False):
-                    memory_usage = minute_data.get("memory", {}).get("mean")
-
-            if memory_usage is None or total_memory <= 0:
-                print("[ERROR]未找到有效的内存使用数据或总内存容量")
-                return None
-
-            # 计算内存使用率百分比
-            memory_percent = (float(memory_usage) / float(total_memory)) * 100
-            print(
-                f"[DEBUG]内存使用率: {memory_percent:.2f}% (使用: {memory_usage} 字节, 总量: {total_memory} 字节)"
-            )
-            return memory_percent
+        return cpu_percent
 
-        except Exception as e:
-            print(f"[ERROR]计算内存使用率时出错: {e}")
-            import traceback
-
-            print(f"[ERROR]详细错误: {traceback.format_exc()}")
-            return None
-
-    def get_pod_container_path(self, pod_name):
-        """获取与 Pod 名称相关的容器路径"""
-        try:
-            # 对 v2.0 API，我们需要获取所有容器列表
-            url = f"{self.cadvisor_base_url}/api/v2.0/ps"
-            response = requests.get(url, timeout=5)
-            if response.status_code != 200:
-                print(
-                    f"[ERROR]Failed to get container processes, status: {response.status_code}"
-                )
-                return []
-
-            containers_info = response.json()
-            pod_containers = []
-
-            # 遍历容器信息，查找与 Pod 名称匹配的容器
-            for container in containers_info:
-                # 容器名称通常包含 Pod 名称
-                if pod_name in container.get("name", ""):
-                    container_path = f"/docker/{container.get('id', '')}"
-                    pod_containers.append(container_path)
-
-            return pod_containers
-
-        except Exception as e:
-            print(f"[ERROR]Error getting pod container paths: {e}")
-            return []
+    def get_memory_usage_percentage(self):
+        """目标Pod的平均内存使用率：使用量/requests（没有requests时为limits）"""
+        memory_percent = self._average_utilization("memory")
+        if memory_percent is not None:
+            print(f"[DEBUG]内存使用率: {memory_percent:.2f}%")
+        return memory_percent
 
 
 def test_hpa(ci_mode=False):
@@ -497,30 +375,15 @@ def test_hpa(ci_mode=False):
             # 创建HPA对象
             hpa = HorizontalPodAutoscaler(hpa_config)
 
-            # 获取机器信息
-            print("[TEST]获取机器信息...")
-            machine_info = hpa.get_machine_info()
-            if machine_info:
-                print(f"[INFO]机器内存容量: {machine_info.get('memory_capacity')} 字节")
-                print(f"[INFO]CPU核心数: {machine_info.get('num_cores', '未知')}")
-            else:
-                print("[WARN]无法获取机器信息")
-
-            # 获取指标摘要
-            print("[TEST]获取指标摘要...")
-            metrics_summary = hpa.get_machine_metrics_summary()
-            if metrics_summary:
-                # 只打印根容器的信息以避免过多输出
-                root_metrics = metrics_summary.get("/", {})
-                print(f"[INFO]根容器时间戳: {root_metrics.get('timestamp', '未知')}")
+            # 获取目标Pod的指标
+            print("[TEST]获取目标Pod的指标...")
+            pods_metrics = hpa.get_target_pods_metrics()
+            for pod_data, metrics in pods_metrics:
                 print(
-                    f"[INFO]根容器最新CPU使用率: {root_metrics.get('latest_usage', {}).get('cpu')}%"
+                    f"[INFO]Pod {metrics['name']}: CPU {metrics.get('cpu')} 核, 内存 {metrics.get('memory')} 字节"
                 )
-                print(
-                    f"[INFO]根容器最新内存使用量: {root_metrics.get('latest_usage', {}).get('memory')} 字节"
-                )
-            else:
-                print("[WARN]无法获取指标摘要")
+            if not pods_metrics:
+                print("[WARN]无法获取目标Pod的指标")
 
             # 获取CPU和内存使用率
             cpu_percent = hpa.get_cpu_usage_percentage()
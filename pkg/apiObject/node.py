@@ -1,10 +1,12 @@
 import requests
 import sys
 import os
+import copy
 import pickle
+import random
 import signal
 from threading import Thread
-from time import sleep
+from time import sleep, time
 
 from pkg.kubelet.kubelet import Kubelet
 from pkg.config.kubeletConfig import KubeletConfig
@@ -12,6 +14,7 @@ from pkg.config.uriConfig import URIConfig
 from pkg.config.nodeConfig import NodeConfig
 from pkg.config.kafkaConfig import KafkaConfig
 from pkg.proxy.kubeproxy import KubeProxy
+from pkg.utils.quantity import parse_cpu, parse_memory, parse_threshold, format_memory
 
 
 class STATUS:
@@ -20,39 +23,39 @@ class STATUS:
 
 
 class Node:
-    def __init__(self, node_config: NodeConfig, uri_config: URIConfig = None):
+    def __init__(self, node_config: NodeConfig, uri_config: URIConfig = None, runtime=None):
         self.config = node_config
         self.uri_config = uri_config
+        # kubelet的容器运行时，默认使用docker；单进程基准测试使用FakeRuntime
+        self.runtime = runtime
         self.service_proxy = None
 
     def run(self):
+        self._init_capacity()
+        # kubelet先只用本地配置启动，manifest目录中的静态Pod立即创建，不等待apiServer
+        kubelet_config = KubeletConfig(**self.config.kubelet_config_args())
+        self.kubelet = Kubelet(kubelet_config, self.uri_config, self.runtime)
+        self.kubelet.sync_static_pods()
+        Thread(target=self.kubelet.run).start()
+
         uri = self.uri_config.PREFIX + self.uri_config.NODE_SPEC_URL.format(
             name=self.config.name
         )
-        register_response = requests.post(uri, json=self.config.json)
-        if register_response.status_code != 200:
-            print(f"[ERROR]Cannot register to ApiServer with code {register_response.status_code}")
-            return
+        register_response = self._request_until_ok(requests.post, uri, json=self._register_json())
         self.config.status = STATUS.ONLINE
         res_json = register_response.json()
-
-        kubelet_config = KubeletConfig(**self.config.kubelet_config_args(), **res_json)
-        self.kubelet = Kubelet(kubelet_config, self.uri_config)
         print(f"[INFO]Successfully register to ApiServer.")
 
+        # 从apiServer索要持久化的Pod状态信息，交给kubelet恢复；先恢复再订阅，重放的旧消息按版本号跳过
+        uri = self.uri_config.PREFIX + self.uri_config.NODE_ALL_PODS_URL.format(name = self.config.name)
+        pods_response = self._request_until_ok(requests.get, uri)
+        revision = int(pods_response.headers.get(self.uri_config.PODS_REVISION_HEADER, 0))
+        self.kubelet.apply(pickle.loads(pods_response.content), revision)
+        self.kubelet.connect(res_json["kafka_server"], res_json["kafka_topic"], res_json.get("warm_images"))
+
         # 初始化并启动ServiceProxy
         self._start_service_proxy()
 
-        # 从apiServer索要持久化的Pod状态信息，并运行kubelet
-        uri = self.uri_config.PREFIX + self.uri_config.NODE_ALL_PODS_URL.format(name = self.config.name)
-        register_response = requests.get(uri)
-        if register_response.status_code != 200:
-            print(f"[ERROR]Cannot fetch Pod status from apiServer")
-            return
-        res = pickle.loads(register_response.content)
-        self.kubelet.apply(res)
-        Thread(target=self.kubelet.run).start()
-
         # 设置信号处理器，确保优雅关闭
         try:
             if self._is_main_thread():
@@ -64,11 +67,85 @@ class Node:
         except Exception as e:
             print(f"[WARNING]设置信号处理器失败: {e}")
 
-        # 定期发送心跳
+        self._heartbeat_loop()
+
+    def _init_capacity(self):
+        """
+        status中未声明的CPU和内存容量取本机的值
+        未声明的可分配量 = 容量 - 系统预留 - 内存硬驱逐阈值，留给系统进程，并保证调度满额时不会立即触发驱逐
+        """
+        status = self.config.json.get("status") or {}
+        capacity = dict(status.get("capacity") or {})
+        capacity.setdefault("cpu", str(os.cpu_count() or 1))
+        if "memory" not in capacity:
+            try:
+                capacity["memory"] = format_memory(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+            except (AttributeError, ValueError, OSError):
+                print("[WARNING]Unable to read memory capacity, memory pressure eviction is disabled.")
+
+        allocatable = dict(status.get("allocatable") or {})
+        if "cpu" not in allocatable:
+            cpu = parse_cpu(capacity["cpu"]) - parse_cpu(KubeletConfig.SYSTEM_RESERVED_CPU)
+            allocatable["cpu"] = f"{int(max(cpu, 0) * 1000)}m"
+        if "memory" not in allocatable and "memory" in capacity:
+            memory = parse_memory(capacity["memory"])
+            reserved = parse_memory(KubeletConfig.SYSTEM_RESERVED_MEMORY)
+            reserved += parse_threshold(KubeletConfig.EVICTION_MEMORY_HARD, memory) or 0
+            allocatable["memory"] = format_memory(max(memory - reserved, 0))
+        self.config.apply_status({"capacity": capacity, "allocatable": allocatable})
+        print(f"[INFO]Node capacity: {capacity}, allocatable: {allocatable}")
+
+    def _status(self):
+        """上报的status：配置中的status加上kubelet当前的MemoryPressure"""
+        status = copy.deepcopy(self.config.json.get("status") or {})
+        conditions = [c for c in status.get("conditions") or [] if c.get("type") != "MemoryPressure"]
+        status["conditions"] = conditions + [self.kubelet.eviction_manager.condition()]
+        return status
+
+    def _register_json(self):
+        return {**self.config.json, "status": self._status()}
+
+    def _heartbeat_loop(self):
+        """
+        定期发送心跳：间隔在±HEARTBEAT_JITTER比例内随机抖动，第一次心跳前随机等待，避免同时启动的Node同步发送
+        心跳只携带时间戳和自上次成功上报以来变化的status字段；apiServer丢失Node记录（404）时重新注册，上报完整信息
+        """
+        heartbeat_uri = self.uri_config.PREFIX + self.uri_config.NODE_HEARTBEAT_URL.format(name=self.config.name)
+        register_uri = self.uri_config.PREFIX + self.uri_config.NODE_SPEC_URL.format(name=self.config.name)
+        interval, jitter = KubeletConfig.HEARTBEAT_INTERVAL, KubeletConfig.HEARTBEAT_JITTER
+        # 注册时已经上报了完整的status
+        reported = self._status()
+        sleep(random.uniform(0, interval))
         while True:
-            sleep(2)
-            uri = self.uri_config.PREFIX + self.uri_config.NODE_SPEC_URL.format(name=self.config.name)
-            register_response = requests.put(uri, json=self.config.json)
+            status = self._status()
+            delta = {key: value for key, value in status.items() if reported.get(key) != value}
+            delta.update({key: None for key in reported.keys() - status.keys()})
+            try:
+                response = requests.put(heartbeat_uri, json={"timestamp": time(), "status": delta}, timeout=interval)
+                if response.status_code == 200:
+                    reported = status
+                elif response.status_code == 404:
+                    print("[WARNING]ApiServer lost this Node, register again.")
+                    if requests.post(register_uri, json=self._register_json(), timeout=interval).status_code == 200:
+                        reported = status
+                else:
+                    print(f"[WARNING]Heartbeat failed with code {response.status_code}")
+            except requests.RequestException as e:
+                print(f"[WARNING]Heartbeat failed: {e}")
+            sleep(interval * random.uniform(1 - jitter, 1 + jitter))
+
+    @staticmethod
+    def _request_until_ok(method, uri, **kwargs):
+        """apiServer不可达或返回错误时每隔REGISTER_RETRY_INTERVAL秒重试，期间静态Pod照常运行"""
+        while True:
+            try:
+                response = method(uri, **kwargs)
+                if response.status_code == 200:
+                    return response
+                print(f"[ERROR]Request {uri} failed with code {response.status_code}, retry later.")
+            except requests.RequestException as e:
+                print(f"[WARNING]ApiServer is not reachable: {e}")
+            sleep(KubeletConfig.REGISTER_RETRY_INTERVAL)
 
     def _start_service_proxy(self):
         """启动ServiceProxy守护进程"""
@@ -118,8 +195,10 @@ if __name__ == "__main__":
         
     import yaml
     from pkg.config.globalConfig import GlobalConfig
+    from pkg.utils.messageBus import require_broker
     import argparse
 
+    require_broker("Node")
     global_config = GlobalConfig()
 
     # 解析命令行参数
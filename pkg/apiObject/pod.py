@@ -1,60 +1,96 @@
-import docker
 from docker.errors import APIError
-import platform
 import argparse
 import sys
 import os
 import yaml
 import requests
 import json
+import hashlib
+from time import time
 import argparse
 import sys
 import os
 import yaml
 from pkg.apiServer.apiClient import ApiClient
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.kubelet.runtime import ContainerRuntime, DockerRuntime
 
 class STATUS:
     CREATING = "CREATING"
     STOPPED = "STOPPED"
     RUNNING = "RUNNING"
     KILLED = "KILLED"
+    # 有容器反复异常退出，正在等待退避时间后重启
+    CRASH_LOOP_BACK_OFF = "CRASHLOOPBACKOFF"
+    # 被kubelet驱逐，容器已删除；与ReplicaSet控制器判断的Failed一致，由控制器在其他Node重建
+    FAILED = "Failed"
+
+def container_hash(args):
+    """容器spec的哈希，spec不变时kubelet重启后可以直接接管原有容器"""
+    return hashlib.sha256(json.dumps(args, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
 
 class Pod:
-    def __init__(self, config, api_client: ApiClient = None, uri_config =None):
+    def __init__(self, config, api_client: ApiClient = None, uri_config =None, runtime: ContainerRuntime = None,
+                 checkpoint=None, sandbox_pool=None):
         self.status = STATUS.CREATING
         self.config = config
         print(f"[INFO]Pod {config.namespace}:{config.name} init, status: {self.status}")
 
-        if platform.system() == "Windows":
-            self.client = docker.DockerClient(
-                base_url="npipe:////./pipe/docker_engine", version="1.25", timeout=20
-            )
-        else:
-            self.client = docker.DockerClient(
-                base_url="unix://var/run/docker.sock", version="1.25", timeout=5
-            )
-        self.client.networks.prune()
+        # 容器运行时由kubelet持有并共享，单独使用Pod时创建一个
+        self.runtime = runtime or DockerRuntime()
+        self.runtime.ensure_network(self.config.cni_name)
         self.containers = []
+        # container_id -> (docker状态, 退出码)，由PLEG事件和relist更新，避免逐个容器reload
+        self.container_states = {}
+        # container_id -> {"count": 重启次数, "started_at": 最近一次启动时间, "finished_at": 最近一次退出时间}
+        self.restarts = {}
+        # 处于CrashLoopBackOff、等待退避时间到期的容器
+        self.waiting = set()
+        # container_name -> spec哈希，写入kubelet的checkpoint
+        self.container_hashes = {}
+        # container_name -> readinessProbe的结果，在第一次探测成功前为未就绪
+        self.readiness = {c.name: False for c in self.config.containers if c.readiness_probe}
+        # 上一次kubelet记录的checkpoint：{"containers": {container_name: {"id": ..., "hash": ...}}}
+        recorded = (checkpoint or {}).get("containers", {})
+        labels = {
+            KubeletConfig.POD_NAMESPACE_LABEL: self.config.namespace,
+            KubeletConfig.POD_NAME_LABEL: self.config.name,
+        }
 
         pause_docker_name = "pause_" + self.config.namespace + "_" + self.config.name
-        containers = self.client.containers.list(all=True, filters={"name": pause_docker_name})
-        if len(containers) == 0:
-            self.containers.append(self.client.containers.run(image = 'busybox', name = pause_docker_name, detach = True,
-                               command = ['sh', '-c', 'echo [INFO]pod network init. && sleep 3600'],
-                               network = self.config.cni_name, dns = [uri_config.COREDNS_IP]))
+        containers = self.runtime.list_containers(pause_docker_name)
+        # 优先使用kubelet预先创建好的sandbox，池为空时再创建
+        sandbox = sandbox_pool.claim(self.config.cni_name, pause_docker_name) if len(containers) == 0 and sandbox_pool else None
+        if sandbox is not None:
+            self.containers.append(sandbox)
+        elif len(containers) == 0:
+            self.containers.append(self.runtime.run_container(image = KubeletConfig.PAUSE_IMAGE, name = pause_docker_name, detach = True,
+                               command = KubeletConfig.PAUSE_COMMAND,
+                               network = self.config.cni_name, dns = [uri_config.COREDNS_IP], labels = labels))
         else:
             self.containers.append(containers[0])
 
         for container in self.config.containers:
             try:
                 args = container.dockerapi_args()
-                containers = self.client.containers.list(all=True, filters={"name": args['name']})
-                if len(containers) > 0: # Node重启，由于不确定容器状态是否发生改变，统一删除后重建
-                    for container in containers: container.remove(force=True)
-                self.containers.append(self.client.containers.run(
+                spec_hash = container_hash(args)
+                self.container_hashes[args['name']] = spec_hash
+                containers = self.runtime.list_containers(args['name'])
+                adopted = self._adoptable(containers, args['name'], recorded.get(args['name']), spec_hash)
+                if adopted is not None:  # kubelet重启，checkpoint中的容器仍在运行且spec未变，直接接管
+                    print(f"[INFO]Adopt running container {args['name']} ({adopted.id[:12]})")
+                    self.containers.append(adopted)
+                    continue
+                if len(containers) > 0: # Node重启，没有可以接管的记录，无法确定容器状态是否发生改变，统一删除后重建
+                    # docker按名称过滤是子串匹配，只删除同名的容器（不能误删名称中恰好包含该子串的sandbox等容器）
+                    for existing in containers:
+                        if existing.name == args['name']: self.runtime.remove(existing.id, force=True)
+                self.containers.append(self.runtime.run_container(
                     **args,
                     detach=True,
-                    network_mode=f'container:{pause_docker_name}'
+                    network_mode=f'container:{pause_docker_name}',
+                    labels={**labels, KubeletConfig.CONTAINER_HASH_LABEL: spec_hash},
                 ))
 
             except Exception as e:
@@ -64,6 +100,12 @@ class Pod:
 
                 print(f"[DEBUG]详细错误: {traceback.format_exc()}")
         
+        now = time()
+        for container in self.containers:
+            state = container.attrs.get("State", {})
+            self.container_states[container.id] = (state.get("Status", container.status), state.get("ExitCode", 0))
+            self.restarts[container.id] = {"count": 0, "started_at": now, "finished_at": None}
+
         # 获取Pod的IP地址
         self.subnet_ip = self._get_pod_ip()
         print(f"[INFO]Pod {self.config.namespace}:{self.config.name} IP地址: {self.subnet_ip}")
@@ -77,14 +119,34 @@ class Pod:
         
         self.status = STATUS.RUNNING
 
+    @staticmethod
+    def _adoptable(containers, name, record, spec_hash):
+        """返回可以接管的容器：与checkpoint记录的容器ID和spec哈希一致，并且仍在运行"""
+        if record is None or record.get("hash") != spec_hash:
+            return None
+        for container in containers:
+            if container.name == name and container.id == record.get("id") and container.status == "running":
+                return container
+        return None
+
+    def checkpoint(self):
+        """kubelet持久化的Pod记录，用于重启后接管容器"""
+        return {
+            "containers": {
+                container.name: {"id": container.id, "hash": self.container_hashes.get(container.name)}
+                for container in self.containers
+            },
+            "subnet_ip": self.subnet_ip,
+            "generation": getattr(self.config, "generation", None),
+        }
+
     def _get_pod_ip(self) -> str:
         """获取Pod的IP地址（从pause容器获取）"""
         try:
             pause_container = self.containers[0]  # pause容器是第一个创建的
-            pause_container.reload()  # 确保获取最新状态
-            
+
             # 使用docker inspect获取容器网络信息
-            container_info = self.client.api.inspect_container(pause_container.id)
+            container_info = self.runtime.inspect(pause_container.id)
             
             # 获取IP地址
             ip_address = container_info['NetworkSettings']['IPAddress']
@@ -106,27 +168,27 @@ class Pod:
     def remove(self):
         self.status = STATUS.KILLED
         for container in self.containers:
-            self.client.api.kill(container.id)
-            self.client.api.remove_container(container.id)
+            self.runtime.kill(container.id)
+            self.runtime.remove(container.id)
         print(f"[INFO]Pod {self.config.namespace}:{self.config.name} removed.")
 
     # docker start
     def start(self):
         for container in self.containers:
-            self.client.api.start(container.id)
+            self.runtime.start(container.id)
         self.status = STATUS.RUNNING
 
     # docker stop, 可以在10s内优雅地停止
     def stop(self):
         for container in self.containers:
-            self.client.api.stop(container.id)
+            self.runtime.stop(container.id)
         self.status = STATUS.STOPPED
 
     # docker kill, 立即终止
     def kill(self):
         try:
             for container in self.containers:
-                self.client.api.kill(container.id)
+                self.runtime.kill(container.id)
         except APIError as e:
             if not "is not running" in e.explanation:
                 raise e
@@ -135,39 +197,106 @@ class Pod:
     # docker restart
     def restart(self):
         for container in self.containers:
-            self.client.api.restart(container.id)
+            self.runtime.restart(container.id)
         self.status = STATUS.RUNNING
 
-    def restart_crash(self):
+    def update_container_state(self, container_id, state, exit_code=0):
+        """记录PLEG观察到的容器状态，容器不属于该Pod时返回False"""
+        if container_id not in self.container_states:
+            return False
+        self._set_state(container_id, state, exit_code)
+        return True
+
+    def apply_relist(self, states):
+        """用relist的结果校正全部容器状态，states中不存在的容器视为已被删除"""
+        for container_id in self.container_states:
+            self._set_state(container_id, *states.get(container_id, ("removed", 0)))
+
+    def _set_state(self, container_id, state, exit_code):
+        previous, _ = self.container_states[container_id]
+        self.container_states[container_id] = (state, exit_code)
+        record = self.restarts.get(container_id)
+        if record is not None and state == "exited" and previous != "exited":
+            record["finished_at"] = time()
+
+    @staticmethod
+    def backoff_delay(count):
+        """第count次重启前的等待时间：第一次崩溃立即重启，之后从CRASH_BACKOFF_INITIAL开始翻倍，不超过CRASH_BACKOFF_MAX"""
+        if count == 0:
+            return 0.0
+        return min(KubeletConfig.CRASH_BACKOFF_INITIAL * 2 ** (count - 1), KubeletConfig.CRASH_BACKOFF_MAX)
+
+    def restart_crash(self, now=None):
+        """
+        按CrashLoopBackOff重启异常退出的容器，容器稳定运行CRASH_BACKOFF_RESET秒后再崩溃时退避重新计算
+        返回最早的下一次可以重启的时间，没有等待中的容器时返回None，由kubelet届时再次同步该Pod
+        """
         if self.status == STATUS.KILLED:
-            return
+            return None
+        now = now or time()
+        next_retry = None
         for container in self.containers:
-            container.reload()
-            if (
-                container.status == "exited"
-                and container.attrs["State"]["ExitCode"] != 0
-            ):
-                print(f"[INFO]restart abnormally exited container {container.name}")
-                self.client.api.restart(container.id)
+            state, exit_code = self.container_states.get(container.id, (None, 0))
+            if state != "exited" or exit_code == 0:
+                self.waiting.discard(container.id)
+                continue
+            record = self.restarts.setdefault(container.id, {"count": 0, "started_at": now, "finished_at": now})
+            finished_at = record["finished_at"] or now
+            if finished_at - record["started_at"] >= KubeletConfig.CRASH_BACKOFF_RESET:
+                record["count"] = 0
+            restart_at = finished_at + self.backoff_delay(record["count"])
+            if now < restart_at:
+                if container.id not in self.waiting:
+                    print(
+                        f"[WARNING]Container {container.name} is in CrashLoopBackOff, "
+                        f"restart #{record['count'] + 1} in {restart_at - now:.0f}s"
+                    )
+                self.waiting.add(container.id)
+                next_retry = restart_at if next_retry is None else min(next_retry, restart_at)
+                continue
+            print(f"[INFO]restart abnormally exited container {container.name}")
+            self.runtime.restart(container.id)
+            self.waiting.discard(container.id)
+            record["count"] += 1
+            record["started_at"], record["finished_at"] = now, None
+            # 重启后的start事件会把状态更新为running
+            self.container_states[container.id] = ("restarting", 0)
+        return next_retry
+
+    def restart_unhealthy(self, container):
+        """重启livenessProbe失败的容器，计入重启次数"""
+        if self.status == STATUS.KILLED:
+            return
+        print(f"[INFO]restart unhealthy container {container.name}")
+        self.runtime.restart(container.id)
+        record = self.restarts.setdefault(container.id, {"count": 0, "started_at": time(), "finished_at": None})
+        record["count"] += 1
+        record["started_at"], record["finished_at"] = time(), None
+        self.container_states[container.id] = ("restarting", 0)
+
+    @property
+    def ready(self):
+        """Pod正在运行且全部readinessProbe都成功，只有ready的Pod会作为Service的端点"""
+        return self.status == STATUS.RUNNING and all(self.readiness.values())
 
     def refresh_status(self):
         exited_normal, creating = 0, 0
         for container in self.containers:
-            container.reload()
-            if (
-                container.status == "exited"
-                and container.attrs["State"]["ExitCode"] == 0
-            ):
+            state, exit_code = self.container_states.get(container.id, (None, 0))
+            if state == "exited" and exit_code == 0:
                 exited_normal += 1
-            elif container.status == "creating":
+            elif state in ("creating", "created"):
                 creating += 1
 
         # STOPPED: 如果全部正常退出，那么Pod处于停止状态
         # CREATING: 如果有正在创建，则处于创建状态
         # RUNNING: 否则有异常退出的容器（根据Pod自动重启的原则处于Running状态）或者都在正常运行
         # KILLED: 无法判断，调用killed的时候手动设置（但是没有考虑这种情况，因为还没有实现kill接口）
+        # CRASHLOOPBACKOFF: 有异常退出的容器正在等待退避时间
         if exited_normal == len(self.containers):
             self.status = STATUS.STOPPED
+        elif self.waiting:
+            self.status = STATUS.CRASH_LOOP_BACK_OFF
         elif creating == 0:
             self.status = STATUS.RUNNING
         else:
@@ -186,7 +315,6 @@ if __name__ == "__main__":
         print("[INFO]Testing Pod in CI mode...")
         try:
             # 服务已通过 Travis CI 启动，无需在此启动
-            import time
             from pkg.config.podConfig import PodConfig
             from pkg.config.uriConfig import URIConfig
             from pkg.config.globalConfig import GlobalConfig
@@ -229,7 +357,8 @@ if __name__ == "__main__":
                     podConfig = PodConfig(data)
                     podConfig.overlay_name = "bridge"  # 使用bridge网络
 
-                    pod = Pod(podConfig)
+                    # pause容器的DNS使用URIConfig中的CoreDNS地址
+                    pod = Pod(podConfig, uri_config=URIConfig)
                     print(f"[INFO]Pod初始化完成，状态: {pod.status}")
 
                     pod.stop()
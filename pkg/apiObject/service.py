@@ -140,6 +140,15 @@ class Service:
     #     self.logger.info(f"Service {self.config.name} 发现了端点: {endpoints}")
     #     return endpoints
     
+    @staticmethod
+    def endpoint_ip(pod) -> Optional[str]:
+        """Pod作为端点的IP：没有IP或readinessProbe未通过（ready为False）的Pod不作为端点"""
+        if isinstance(pod, dict):
+            pod_ip, ready = pod.get("subnet_ip"), pod.get("ready")
+        else:
+            pod_ip, ready = getattr(pod, "subnet_ip", None), getattr(pod, "ready", None)
+        return pod_ip if ready is not False else None
+
     def convert_pods_to_endpoints(self, pods: List) -> List[Tuple[str, int]]:
         """将Pod列表转换为端点列表
         
@@ -152,7 +161,7 @@ class Service:
         endpoints = []
         
         for pod in pods:
-            pod_ip = pod.get("subnet_ip") if isinstance(pod, dict) else getattr(pod, "subnet_ip", None)
+            pod_ip = self.endpoint_ip(pod)
             if pod_ip:
                 endpoints.append((pod_ip, self.config.target_port))
             
@@ -197,7 +206,7 @@ class Service:
             self.endpoint_pods.clear()
             
             for pod in new_pods:
-                pod_ip = pod.get("subnet_ip") if isinstance(pod, dict) else getattr(pod, "subnet_ip", None)
+                pod_ip = self.endpoint_ip(pod)
                 if pod_ip:
                     pod_labels = pod.get("metadata",{}).get("labels", {}) if isinstance(pod, dict) else getattr(pod, "labels", {})
                     
@@ -39,7 +39,7 @@ class ApiClient:
         self.session = requests.Session()
         print(f"[INFO]API Client initialized with base URL: {self.base_url}")
 
-    def _make_request(self, method, path, json_data=None, params=None):
+    def _make_request(self, method, path, json_data=None, params=None, ret_status=False):
         """
         发送HTTP请求并处理重试逻辑
 
@@ -48,6 +48,7 @@ class ApiClient:
             path: API端点路径 (不含域名和端口)
             json_data: JSON数据 (POST和PUT请求)
             params: URL查询参数
+            ret_status: 为True时返回(HTTP状态码, 响应数据)，没有收到响应时状态码为None
 
         Returns:
             dict or list: 解析后的JSON响应
@@ -55,6 +56,7 @@ class ApiClient:
         """
         url = f"{self.base_url}{path}"
         retries = 0
+        status = None
 
         while retries < self.max_retries:
             try:
@@ -66,6 +68,7 @@ class ApiClient:
                     timeout=(3.0, 10.0),  # (连接超时, 读取超时)
                 )
 
+                status = response.status_code
                 # 检查请求是否成功
                 if not response.ok:
                     if response.content:
@@ -73,18 +76,19 @@ class ApiClient:
                             error_msg = response.json()['error']
                             #如果有apiserver提供的报错信息，则不会retry
                             print(f"[INFO]{error_msg}")
-                            return None
+                            return (status, None) if ret_status else None
                         except:
                             pass
                     response.raise_for_status()
 
                 # 尝试解析JSON响应
+                data = None
                 if response.content:
                     try:
-                        return response.json()
+                        data = response.json()
                     except:  # wcc: 如果无法json，直接作为python类解析（或者python类的列表）
-                        return pickle.loads(response.content)
-                return None
+                        data = pickle.loads(response.content)
+                return (status, data) if ret_status else data
 
             except (RequestException, json.JSONDecodeError) as e:
                 retries += 1
@@ -93,7 +97,7 @@ class ApiClient:
                         f"[ERROR]Request failed after {self.max_retries} attempts: {url}"
                     )
                     print(f"[ERROR]Exception: {str(e)}")
-                    return None
+                    return (status, None) if ret_status else None
 
                 print(
                     f"[WARN]Request failed ({retries}/{self.max_retries}), retrying in {self.retry_delay}s: {url}"
@@ -101,18 +105,19 @@ class ApiClient:
                 print(f"[WARN]Exception: {str(e)}")
                 time.sleep(self.retry_delay)
 
-    def get(self, path, params=None):
+    def get(self, path, params=None, ret_status=False):
         """
         发送GET请求
 
         Args:
             path: API端点路径
             params: URL查询参数
+            ret_status: 为True时返回(HTTP状态码, 响应数据)
 
         Returns:
             解析后的响应数据或None
         """
-        return self._make_request("GET", path, params=params)
+        return self._make_request("GET", path, params=params, ret_status=ret_status)
 
     def post(self, path, data):
         """
@@ -140,15 +145,16 @@ class ApiClient:
         """
         return self._make_request("PUT", path, json_data=data)
 
-    def delete(self, path, data=None):
+    def delete(self, path, data=None, ret_status=False):
         """
         发送DELETE请求
 
         Args:
             path: API端点路径
             data: 可选的请求数据
+            ret_status: 为True时返回(HTTP状态码, 响应数据)
 
         Returns:
             解析后的响应数据或None
         """
-        return self._make_request("DELETE", path, json_data=data)
+        return self._make_request("DELETE", path, json_data=data, ret_status=ret_status)
@@ -7,19 +7,23 @@ import os
 from readerwriterlock import rwlock
 from docker.errors import APIError
 from flask import Flask, request
-from confluent_kafka import Producer, KafkaException
-from confluent_kafka.admin import AdminClient, NewTopic
 import platform
 from time import time, sleep, ctime
-from threading import Thread
+from threading import Thread, Lock
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from pkg.utils.atomicCounter import AtomicCounter
+from pkg.utils.dockerClient import docker_client
+from pkg.utils.messageBus import message_bus, require_broker
+from pkg.utils import messageCodec
 from pkg.apiObject.pod import STATUS as POD_STATUS
 from pkg.apiObject.node import Node, STATUS as NODE_STATUS
 from pkg.apiObject.function import Function
 from pkg.apiServer.etcd import Etcd
 from pkg.controller.scheduler import Scheduler
 from pkg.apiObject.workflow import Workflow
+from pkg.kubelet.metricsCollector import MetricsCollector
 
 from pkg.config.uriConfig import URIConfig
 from pkg.config.etcdConfig import EtcdConfig
@@ -44,6 +48,17 @@ class ApiServer:
         self.kafka_config = kafka_config
         self.serverless_config = serverless_config
         self.NODE_TIMEOUT = 10
+        # 多scheduler并发绑定时，预留记录CAS冲突的最大重试次数
+        self.BIND_RETRIES = 5
+        # 批量状态上报时单个etcd事务包含的Pod数，etcd默认每个事务最多128个操作
+        self.STATUS_BATCH_SIZE = 100
+        # 代理kubelet指标请求的超时（秒），不可达节点上的Pod在结果中缺失
+        self.METRICS_TIMEOUT = 2
+        # 心跳速率按最近HEARTBEAT_WINDOW秒统计
+        self.HEARTBEAT_WINDOW = 60
+        self.heartbeat_lock = Lock()
+        self.heartbeat_stats = {"heartbeats": 0, "status_updates": 0, "full_updates": 0, "node_writes": 0, "bytes": 0}
+        self.heartbeat_times = deque()
 
         # 创建 Flask 应用实例，用于提供 HTTP API 服务
         self.app = Flask(__name__)
@@ -51,27 +66,15 @@ class ApiServer:
         self.etcd = Etcd(host=etcd_config.HOST, port=etcd_config.PORT)
 
         # 根据操作系统（Windows 或类 Unix 系统）初始化 Docker 客户端，用于管理容器
-        if platform.system() == "Windows":
-            self.docker = docker.DockerClient(
-                base_url="npipe:////./pipe/docker_engine", version="1.25", timeout=5
-            )
-        else:
-            self.docker = docker.DockerClient(
-                base_url="unix://var/run/docker.sock", version="1.25", timeout=5
-            )
+        self.docker = docker_client()
         
-        # 创建调度器实例，负责 Pod 的调度和管理
-        self.kafka = AdminClient({"bootstrap.servers": kafka_config.BOOTSTRAP_SERVER})
-        self.kafka_producer = Producer(
-            {"bootstrap.servers": kafka_config.BOOTSTRAP_SERVER}
-        )
+        # 与scheduler、kubelet、kubeproxy通信的消息总线（Kafka或进程内实现）
+        self.bus = message_bus(kafka_config.BOOTSTRAP_SERVER)
 
         # --- 调试时使用 ---
         self.etcd.reset()
-        self.kafka.delete_topics(
-            [self.kafka_config.SCHEDULER_TOPIC], operation_timeout=10
-        )
-        self.kafka_producer.flush()
+        self.bus.delete_topics([self.kafka_config.SCHEDULER_TOPIC])
+        self.bus.flush()
         # --- end ---
 
         os.makedirs(serverless_config.PERSIST_BASE, exist_ok = True)
@@ -93,8 +96,13 @@ class ApiServer:
         self.app.route(config.NODES_URL, methods=['GET'])(self.get_nodes)
         # 更新Node信息，结点心跳
         self.app.route(config.NODE_SPEC_URL, methods=['PUT'])(self.update_node)
+        # 结点心跳，只携带时间戳和变化的status字段
+        self.app.route(config.NODE_HEARTBEAT_URL, methods=['PUT'])(self.update_node_heartbeat)
         # 获得结点上所有Pod信息
         self.app.route(config.NODE_ALL_PODS_URL, methods=['GET'])(self.get_node_pods)
+        self.app.route(config.NODE_PODS_STATUS_URL, methods=['PUT'])(self.update_node_pods_status)
+        # kubelet同步本节点静态Pod对应的mirror Pod
+        self.app.route(config.NODE_MIRROR_PODS_URL, methods=['PUT'])(self.update_node_mirror_pods)
 
         # scheduler相关
         self.app.route(config.SCHEDULER_URL, methods=["POST"])(self.add_scheduler)
@@ -114,6 +122,11 @@ class ApiServer:
         self.app.route(config.POD_SPEC_STATUS_URL, methods=["PUT"])(self.update_pod_status)
         self.app.route(config.POD_SPEC_IP_URL, methods=["PUT"])(self.update_pod_subnet_ip)
         self.app.route(config.POD_SPEC_IP_URL, methods=["GET"])(self.get_pod_subnet_ip)
+        # Pod资源指标
+        self.app.route(config.PODS_METRICS_URL, methods=["GET"])(self.get_pods_metrics)
+        self.app.route(config.POD_METRICS_URL, methods=["GET"])(self.get_pod_metrics)
+        self.app.route(config.BUS_METRICS_URL, methods=["GET"])(self.get_bus_metrics)
+        self.app.route(config.HEARTBEAT_METRICS_URL, methods=["GET"])(self.get_heartbeat_metrics)
 
         # replicaSet相关
         # 三种不同的读取逻辑，可以先不着急写，读取全部的rs，读取某个namespace下的rs，读取某个rs
@@ -315,11 +328,18 @@ class ApiServer:
             sleep(5.0)
             now = time()
             nodes = self.etcd.get_prefix(self.etcd_config.NODES_KEY)
+            leases = self._node_leases()
             for node in nodes:
-                if node.status == NODE_STATUS.ONLINE and now - node.heartbeat_time > self.NODE_TIMEOUT:
+                heartbeat_time = max(node.heartbeat_time or 0, leases.get(node.name, 0))
+                if node.status == NODE_STATUS.ONLINE and now - heartbeat_time > self.NODE_TIMEOUT:
                     node.status = NODE_STATUS.OFFLINE
+                    node.heartbeat_time = heartbeat_time
                     self.etcd.put(self.etcd_config.NODE_SPEC_KEY.format(name=node.name), node)
-                    print(f'[INFO]Node {node.name} offline. Last heartbeat {ctime(node.heartbeat_time)}')
+                    print(f'[INFO]Node {node.name} offline. Last heartbeat {ctime(heartbeat_time)}')
+
+    def _node_leases(self):
+        """{node名: 最近一次心跳时间}"""
+        return {lease["name"]: lease["renew_time"] for lease in self.etcd.get_prefix(self.etcd_config.NODE_LEASES_KEY)}
 
     def serverless_scale(self):
         while True:
@@ -332,7 +352,7 @@ class ApiServer:
                     pod_num = len(function_config.pod_list)
                     # 如果存在函数实例，则看情况增加或者减少
                     if pod_num != 0:
-                        function = Function(function_config, self.serverless_config, None)
+                        function = Function(function_config, self.serverless_config, None, self.docker)
 
                         if self.func_cnt.get(key) / pod_num > self.serverless_config.MAX_REQUESTS_PER_POD:
                             print(f'[INFO]Function {function_config.namespace}/{function_config.name} increse scale to {pod_num + 1}')
@@ -377,26 +397,19 @@ class ApiServer:
     #         "kafka_dns_topic": dns_topic,
     #     }
 
-    # 注册调度器
+    # 注册调度器，多个scheduler实例会注册到同一个主题，按分区分担调度
     def add_scheduler(self):
-        try:
-            kafka_topic = self.kafka_config.SCHEDULER_TOPIC
-            fs = self.kafka.create_topics(
-                [NewTopic(kafka_topic, num_partitions=1, replication_factor=1)]
-            )
-            for topic, f in fs.items():
-                f.result()
-                print(f"[INFO]Topic '{topic}' created successfully.")
-
-        except KafkaException as e:
-            if not e.args[0].code() == 36:  # 忽略“主题已存在”的错误
-                raise
-            else:
-                print(f"[INFO]Topic '{topic}' already created.")
+        kafka_topic = self.kafka_config.SCHEDULER_TOPIC
+        partitions = self.kafka_config.SCHEDULER_PARTITIONS
+        if not self.bus.create_topics({kafka_topic: partitions}):
+            # 旧版本创建的单分区主题扩容到SCHEDULER_PARTITIONS个分区
+            self.bus.create_partitions(kafka_topic, partitions)
 
         return {
             "kafka_server": self.kafka_config.BOOTSTRAP_SERVER,
             "kafka_topic": kafka_topic,
+            "kafka_group": self.kafka_config.SCHEDULER_GROUP,
+            "partitions": partitions,
         }
 
     # 注册一个新结点
@@ -413,32 +426,19 @@ class ApiServer:
                 print(f'[ERROR] Node {name} already exists and is still online.')
                 return json.dumps({'error': 'Node name duplicated'}), 403
 
-        try:
-            # 创建Pod主题（用于kubelet）
-            pod_topic = self.kafka_config.POD_TOPIC.format(name=name)
-            # 创建ServiceProxy主题（用于ServiceProxy）
-            serviceproxy_topic = self.kafka_config.SERVICE_PROXY_TOPIC.format(name=name)
-            
-            # 批量创建主题
-            topics_to_create = [
-                NewTopic(pod_topic, num_partitions=1, replication_factor=1),
-                NewTopic(serviceproxy_topic, num_partitions=1, replication_factor=1)
-            ]
-            
-            fs = self.kafka.create_topics(topics_to_create)
-            for topic, f in fs.items():
-                f.result()
-                print(f"[INFO]Topic '{topic}' created successfully.")
-            
+        # 创建Pod主题（用于kubelet）
+        pod_topic = self.kafka_config.POD_TOPIC.format(name=name)
+        # 创建ServiceProxy主题（用于ServiceProxy）
+        serviceproxy_topic = self.kafka_config.SERVICE_PROXY_TOPIC.format(name=name)
+
+        # 批量创建主题，Node重连时主题已经存在
+        if self.bus.create_topics({pod_topic: 1, serviceproxy_topic: 1}):
             # 发送心跳消息到Pod主题
-            self.kafka_producer.produce(
-                pod_topic, key="HEARTBEAT", value=json.dumps({}).encode("utf-8")
-            )
-        except KafkaException as e:
-            if not e.args[0].code() == 36:  # 忽略"主题已存在"的错误
-                raise
+            self.bus.produce(pod_topic, messageCodec.encode({}), key="HEARTBEAT")
 
         # 创建成功，向etcd写入实际状态
+        if new_node_config.address is None:
+            new_node_config.address = request.remote_addr
         new_node_config.kafka_server = self.kafka_config.BOOTSTRAP_SERVER
         new_node_config.topic = pod_topic
         new_node_config.status = NODE_STATUS.ONLINE
@@ -448,19 +448,31 @@ class ApiServer:
         return {
             "kafka_server": self.kafka_config.BOOTSTRAP_SERVER,
             "kafka_topic": pod_topic,
+            # 已注册函数的镜像，kubelet启动时预先拉取
+            "warm_images": self._function_images(),
             # "serviceproxy_topic": serviceproxy_topic,
         }
 
     # 获取集群中所有node
     def get_nodes(self):
         nodes = self.etcd.get_prefix(self.etcd_config.NODES_KEY)
+        # 心跳时间以租约为准
+        leases = self._node_leases()
+        for node in nodes:
+            node.heartbeat_time = max(node.heartbeat_time or 0, leases.get(node.name, 0)) or None
         return pickle.dumps(nodes)
 
     # 获取某个node上所有pod
     def get_node_pods(self, name : str):
-        pods = self.etcd.get_prefix(self.etcd_config.GLOBAL_PODS_KEY)
-        node_pods = [pod for pod in pods if pod.node_name == name]
-        return pickle.dumps(node_pods)
+        # 版本号取Pod键当前的mod_revision，不小于已经发送给kubelet的该Pod的任何ADD/UPDATE，kubelet重放时据此跳过
+        # 读取列表时的集群revision通过响应头返回：不大于它的消息（包括已删除Pod的ADD/DELETE）都已反映在列表中
+        node_pods = []
+        pods, revision = self.etcd.get_prefix(self.etcd_config.GLOBAL_PODS_KEY, ret_meta=True, ret_revision=True)
+        for pod, meta in pods:
+            if pod.node_name == name:
+                pod.generation = Etcd.revision(meta)
+                node_pods.append(pod)
+        return pickle.dumps(node_pods), 200, {self.uri_config.PODS_REVISION_HEADER: str(revision)}
 
     # 结点心跳
     def update_node(self, name : str):
@@ -468,13 +480,63 @@ class ApiServer:
         node_config = NodeConfig(node_json)
         node_config.heartbeat_time = time()
         node_config.status = NODE_STATUS.ONLINE
+        if node_config.address is None:
+            node_config.address = request.remote_addr
 
         node = self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=name))
         if node is None:
             return json.dumps({'error': 'Node not found. Need to register before update.'}), 404
         self.etcd.put(self.etcd_config.NODE_SPEC_KEY.format(name=name), node_config)
+        self._record_heartbeat(node_config.heartbeat_time, request.content_length, full=True)
         return json.dumps({'message': f'Receive heartbeat timestamp {node_config.heartbeat_time}'}), 200
 
+    def update_node_heartbeat(self, name: str):
+        """
+        请求体：{"timestamp": Node发送心跳的时间, "status": 自上次成功上报以来变化的status字段，值为None表示删除}
+        每次心跳只写入很小的租约键；status有变化，或Node被判定为OFFLINE后恢复时，才重写Node对象
+        """
+        body = request.get_json(silent=True) or {}
+        now = time()
+        key = self.etcd_config.NODE_SPEC_KEY.format(name=name)
+        node = self.etcd.get(key)
+        if node is None:
+            return json.dumps({'error': 'Node not found. Need to register before heartbeat.'}), 404
+        self.etcd.put(
+            self.etcd_config.NODE_LEASE_KEY.format(name=name),
+            {"name": name, "renew_time": now, "sent_time": body.get("timestamp")},
+        )
+        delta = body.get("status") or {}
+        written = bool(delta) or node.status != NODE_STATUS.ONLINE
+        if written:
+            if delta:
+                node.apply_status(delta)
+            node.status = NODE_STATUS.ONLINE
+            node.heartbeat_time = now
+            self.etcd.put(key, node)
+        self._record_heartbeat(now, request.content_length, status_update=bool(delta), written=written)
+        return json.dumps({'renew_time': now}), 200
+
+    def _record_heartbeat(self, now, size, status_update=False, full=False, written=True):
+        with self.heartbeat_lock:
+            stats = self.heartbeat_stats
+            stats["heartbeats"] += 1
+            stats["status_updates"] += status_update
+            stats["full_updates"] += full
+            stats["node_writes"] += written
+            stats["bytes"] += size or 0
+            self.heartbeat_times.append(now)
+            while self.heartbeat_times and now - self.heartbeat_times[0] > self.HEARTBEAT_WINDOW:
+                self.heartbeat_times.popleft()
+
+    def get_heartbeat_metrics(self):
+        with self.heartbeat_lock:
+            stats = dict(self.heartbeat_stats)
+            recent = len(self.heartbeat_times)
+        stats["rate_per_second"] = recent / self.HEARTBEAT_WINDOW
+        stats["bytes_per_heartbeat"] = stats["bytes"] / stats["heartbeats"] if stats["heartbeats"] else 0
+        stats["node_writes_per_heartbeat"] = stats["node_writes"] / stats["heartbeats"] if stats["heartbeats"] else 0
+        return json.dumps(stats), 200
+
     # 查询系统中所有Pod
     def get_global_pods(self):
         print("[INFO]Get global pods.")
@@ -545,8 +607,11 @@ class ApiServer:
 
         # 向scheduler推送消息
         try:
-            self.kafka_producer.produce(
-                self.kafka_config.SCHEDULER_TOPIC, value=pickle.dumps(new_pod_config)
+            # 以namespace/name为key，同一个Pod的消息总是落在同一个分区，由同一个scheduler处理
+            self.bus.produce(
+                self.kafka_config.SCHEDULER_TOPIC,
+                messageCodec.encode_schedule_request(new_pod_config),
+                key=f"{namespace}/{name}",
             )
             return json.dumps({"message": "Pod is creating."}), 200
         except Exception as e:
@@ -554,29 +619,140 @@ class ApiServer:
             return json.dumps({"error": "Scheduler is not ready"}), 409
 
     # scheduler调用，给Pod分配Node id
+    # 多个scheduler可能并发绑定：Pod键与Node预留记录在同一个etcd事务中CAS更新，只有一个scheduler能绑定成功
     def bind_pod(self, namespace: str, name: str, node_name: str):
-        # 写etcd Node_name
-        pod = self.etcd.get(
-            self.etcd_config.POD_SPEC_KEY.format(namespace=namespace, name=name)
-        )
-        if pod is None:
-            return json.dumps({"error": "Pod not found."}), 404
-
-        pod.node_name = node_name
-        self.etcd.put(
-            self.etcd_config.POD_SPEC_KEY.format(namespace=namespace, name=name), pod
-        )
-
-        # 创建Pod，给kubelet队列推消息
+        pod_key = self.etcd_config.POD_SPEC_KEY.format(namespace=namespace, name=name)
         node = self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=node_name))
         if node is None:
             return json.dumps({"error": "Node not found."}), 404
+        reservation_key = self.etcd_config.NODE_RESERVATION_KEY.format(name=node_name)
+
+        for _ in range(self.BIND_RETRIES):
+            pod, pod_meta = self.etcd.get(pod_key, ret_meta=True)
+            if pod is None:
+                return json.dumps({"error": "Pod not found."}), 404
+            if pod.node_name is not None:
+                return json.dumps({"error": f"Pod already bound to {pod.node_name}."}), 409
+
+            reserved, reserved_meta = self.etcd.get(reservation_key, ret_meta=True)
+            reserved = reserved or {}
+            max_pods = getattr(node, "max_pods", None)
+            if max_pods is not None and len(reserved) >= max_pods:
+                return json.dumps({"error": f"Node {node_name} has no capacity."}), 409
+            requests = pod.resource_requests()
+            if not self._requests_fit(node, reserved, requests):
+                return json.dumps({"error": f"Node {node_name} has insufficient cpu or memory."}), 409
+
+            pod.node_name = node_name
+            reserved[f"{namespace}/{name}"] = self._reservation(requests)
+            revision = self.etcd.transaction(
+                {pod_key: Etcd.revision(pod_meta), reservation_key: Etcd.revision(reserved_meta)},
+                puts={pod_key: pod, reservation_key: reserved},
+            )
+            if revision:
+                break
+        else:
+            return json.dumps({"error": "Bind conflict, retry later."}), 409
+
+        # 创建Pod，给kubelet队列推消息
+        # 版本号取绑定事务的revision：晚于同名Pod之前的删除，早于之后的更新和删除；
+        # kubelet恢复时拿到的Pod列表读取于revision R，则版本号不大于R的ADD已经反映在列表中
         topic = self.kafka_config.POD_TOPIC.format(name=node.name)
-        self.kafka_producer.produce(
-            topic, key="ADD", value=json.dumps(pod.to_dict()).encode("utf-8")
+        self.bus.produce(
+            topic, messageCodec.encode_pod(pod.to_dict(), revision), key="ADD"
         )
         return json.dumps({"message": "Pod bind successfully"}), 200
 
+    def _release_reservation(self, node_name, namespace, name):
+        """Pod删除后释放其在Node上的预留"""
+        if not self._update_reservation(node_name, remove=[f"{namespace}/{name}"]):
+            print(f"[WARNING]Failed to release reservation of Pod {namespace}:{name} on Node {node_name}")
+
+    @staticmethod
+    def _reservation(requests):
+        """预留记录的值：预留时间和Pod的资源请求"""
+        cpu, memory = requests
+        return {"time": time(), "cpu": cpu, "memory": memory}
+
+    @staticmethod
+    def _requests_fit(node, reserved, requests):
+        """
+        已预留的资源请求加上新Pod的请求不超过Node上报的allocatable；没有请求的资源总是满足
+        旧版本的预留值只有时间戳，按没有资源请求计算
+        """
+        allocatable = getattr(node, "allocatable", None) or {}
+        for resource, requested in zip(("cpu", "memory"), requests):
+            if not requested or resource not in allocatable:
+                continue
+            used = sum(value.get(resource, 0) for value in reserved.values() if isinstance(value, dict))
+            if used + requested > allocatable[resource]:
+                return False
+        return True
+
+    def _update_reservation(self, node_name, add=None, remove=()):
+        """在Node的预留记录中加入（{namespace/name: 资源请求}）、删除一组Pod，CAS冲突时重试，失败返回False"""
+        reservation_key = self.etcd_config.NODE_RESERVATION_KEY.format(name=node_name)
+        for _ in range(self.BIND_RETRIES):
+            reserved, reserved_meta = self.etcd.get(reservation_key, ret_meta=True)
+            reserved = reserved or {}
+            changed = False
+            for pod_key, requests in (add or {}).items():
+                if pod_key not in reserved:
+                    reserved[pod_key] = self._reservation(requests)
+                    changed = True
+            for pod_key in remove:
+                if reserved.pop(pod_key, None) is not None:
+                    changed = True
+            if not changed or self.etcd.transaction(
+                {reservation_key: Etcd.revision(reserved_meta)}, puts={reservation_key: reserved}
+            ):
+                return True
+        return False
+
+    def update_node_mirror_pods(self, name: str):
+        """
+        请求体：{"pods": [pod_json]}，为该Node当前的全部静态Pod，metadata.annotations中带有mirror注解
+        新的mirror Pod以已绑定到该Node的状态直接写入etcd，不经过scheduler；注解中的manifest哈希变化时更新spec，保留运行状态
+        该Node上不在列表中的mirror Pod被删除；与普通Pod或其他Node的mirror Pod重名的跳过
+        """
+        if self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=name)) is None:
+            return json.dumps({"error": "Node not found. Need to register before sync mirror pods."}), 404
+
+        mirror_keys, created, updated, skipped = set(), {}, 0, []
+        for pod_json in request.json.get("pods", []):
+            mirror = PodConfig(pod_json)
+            pod_key = f"{mirror.namespace}/{mirror.name}"
+            key = self.etcd_config.POD_SPEC_KEY.format(namespace=mirror.namespace, name=mirror.name)
+            pod = self.etcd.get(key)
+            if not mirror.is_mirror() or (pod is not None and (not pod.is_mirror() or pod.node_name != name)):
+                skipped.append(pod_key)
+                continue
+            mirror_keys.add(key)
+            config_hash = mirror.annotations[PodConfig.MIRROR_ANNOTATION]
+            if pod is not None and pod.annotations.get(PodConfig.MIRROR_ANNOTATION) == config_hash:
+                continue
+            mirror.node_name = name
+            if pod is None:
+                mirror.status = POD_STATUS.CREATING
+                created[pod_key] = mirror.resource_requests()
+            else:
+                mirror.status, mirror.cni_name, mirror.subnet_ip = pod.status, pod.cni_name, pod.subnet_ip
+                mirror.ready = getattr(pod, "ready", None)
+                updated += 1
+            self.etcd.put(key, mirror)
+
+        removed = []
+        for pod in self.etcd.get_prefix(self.etcd_config.GLOBAL_PODS_KEY):
+            key = self.etcd_config.POD_SPEC_KEY.format(namespace=pod.namespace, name=pod.name)
+            if pod.node_name == name and pod.is_mirror() and key not in mirror_keys:
+                self.etcd.delete(key)
+                removed.append(f"{pod.namespace}/{pod.name}")
+        # mirror Pod同样占用Node的容量
+        if not self._update_reservation(name, add=created, remove=removed):
+            print(f"[WARNING]Failed to update reservation of mirror pods on Node {name}")
+        print(f"[INFO]Node {name} mirror pods: {len(created)} created, {updated} updated, {len(removed)} removed.")
+        return json.dumps({"created": len(created), "updated": updated, "removed": len(removed), "skipped": skipped}), 200
+
     def get_pod_status(self, namespace: str, name: str):
         pass
 
@@ -609,6 +785,46 @@ class ApiServer:
             200,
         )
     
+    # kubelet调用，批量更新本节点Pod的状态和子网IP
+    def update_node_pods_status(self, name: str):
+        """
+        请求体：{"pods": [{"namespace": ..., "name": ..., "status": ..., "subnet_ip": ..., "ready": ...}]}，status、subnet_ip和ready可选
+        每STATUS_BATCH_SIZE个Pod在一个etcd事务中写入，以读取时的mod_revision做CAS，冲突时重新读取后重试
+        已删除或已不属于该Node的Pod被跳过，在返回值的skipped中列出
+        """
+        updates = request.json.get("pods", [])
+        updated, skipped, failed = 0, [], []
+        for start in range(0, len(updates), self.STATUS_BATCH_SIZE):
+            batch = updates[start : start + self.STATUS_BATCH_SIZE]
+            for _ in range(self.BIND_RETRIES):
+                expected, puts, batch_skipped = {}, {}, []
+                for update in batch:
+                    key = self.etcd_config.POD_SPEC_KEY.format(namespace=update["namespace"], name=update["name"])
+                    pod, meta = self.etcd.get(key, ret_meta=True)
+                    if pod is None or pod.node_name != name:
+                        batch_skipped.append(f"{update['namespace']}/{update['name']}")
+                        continue
+                    if "status" in update:
+                        pod.status = update["status"]
+                    if update.get("subnet_ip"):
+                        pod.subnet_ip = update["subnet_ip"]
+                    if "ready" in update:
+                        pod.ready = update["ready"]
+                    expected[key] = Etcd.revision(meta)
+                    puts[key] = pod
+                if not puts or self.etcd.transaction(expected, puts=puts):
+                    updated += len(puts)
+                    skipped += batch_skipped
+                    failed += [f"{pod.namespace}/{pod.name}" for pod in puts.values() if pod.status == POD_STATUS.FAILED]
+                    break
+            else:
+                return json.dumps({"error": "Pod status conflict, retry later.", "updated": updated}), 409
+        # 被kubelet驱逐的Pod已经没有容器，释放其在Node上的预留
+        if failed and not self._update_reservation(name, remove=failed):
+            print(f"[WARNING]Failed to release reservation of evicted pods on Node {name}")
+        print(f"[INFO]Node {name} updated status of {updated} pods.")
+        return json.dumps({"updated": updated, "skipped": skipped}), 200
+
     def get_pod_subnet_ip(self, namespace: str, name: str):
         # 获取容器的子网IP，读取etcd subnet_ip
         pod = self.etcd.get(
@@ -649,6 +865,56 @@ class ApiServer:
             200,
         )
 
+    def _node_pods_metrics(self, node_name, namespace, name=None):
+        """从节点kubelet的/stats/summary读取Pod指标，节点不可达时返回空列表"""
+        node = self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=node_name))
+        address = getattr(node, "address", None)
+        if address is None:
+            return []
+        params = {"namespace": namespace}
+        if name is not None:
+            params["name"] = name
+        try:
+            response = requests.get(
+                f"http://{address}:{node.kubelet_port}{MetricsCollector.SUMMARY_PATH}",
+                params=params,
+                timeout=self.METRICS_TIMEOUT,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"[WARNING]Get metrics from node {node_name} failed: {e}")
+            return []
+        pods = response.json().get("pods", [])
+        for pod in pods:
+            pod["node_name"] = node_name
+        return pods
+
+    # 查询命名空间下全部Pod的资源指标，每个节点只请求一次，多个节点并行请求
+    def get_pods_metrics(self, namespace: str):
+        pods = self.etcd.get_prefix(self.etcd_config.PODS_KEY.format(namespace=namespace))
+        node_names = {pod.node_name for pod in pods if pod.node_name}
+        if not node_names:
+            return json.dumps({"pods": []}), 200
+        with ThreadPoolExecutor(max_workers=min(len(node_names), 16)) as executor:
+            results = executor.map(lambda node_name: self._node_pods_metrics(node_name, namespace), node_names)
+        return json.dumps({"pods": [pod for node_pods in results for pod in node_pods]}), 200
+
+    # 查询消息总线的投递统计：送达延迟、失败数和未确认的消息数
+    def get_bus_metrics(self):
+        return json.dumps(self.bus.metrics()), 200
+
+    # 查询单个Pod的资源指标
+    def get_pod_metrics(self, namespace: str, name: str):
+        pod = self.etcd.get(self.etcd_config.POD_SPEC_KEY.format(namespace=namespace, name=name))
+        if pod is None:
+            return json.dumps({"error": "Pod not found."}), 404
+        if not pod.node_name:
+            return json.dumps({"error": "Pod is not scheduled."}), 404
+        pods = self._node_pods_metrics(pod.node_name, namespace, name)
+        if not pods:
+            return json.dumps({"error": "Pod metrics not available."}), 404
+        return json.dumps(pods[0]), 200
+
     # 更新一个Pod
     def update_pod(self, namespace: str, name: str):
         print("[INFO]Receive update pod in ApiServer")
@@ -659,13 +925,21 @@ class ApiServer:
         pod = self.etcd.get(key)
         if pod is None:
             return json.dumps({"error": "Pod not found."}), 404
+        if pod.is_mirror():
+            return json.dumps({"error": f"Pod is the mirror of a static pod on Node {pod.node_name}, edit its manifest instead."}), 409
         node = self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=pod.node_name))
         if node is None:
             return json.dumps({"error": "Pod's Node not found."}), 404
 
+        # 新的spec写入etcd，保留绑定和运行信息；写入后的revision作为这次更新的版本号
+        new_pod = PodConfig(pod_json)
+        new_pod.node_name, new_pod.status = pod.node_name, pod.status
+        new_pod.cni_name, new_pod.subnet_ip = pod.cni_name, pod.subnet_ip
+        generation = self.etcd.put(key, new_pod)
+
         topic = self.kafka_config.POD_TOPIC.format(name=node.name)
-        self.kafka_producer.produce(
-            topic, key="UPDATE", value=json.dumps(pod_json).encode("utf-8")
+        self.bus.produce(
+            topic, messageCodec.encode_pod(pod_json, generation), key="UPDATE"
         )
         return json.dumps({"message": "Pod update successfully"}), 200
 
@@ -680,16 +954,17 @@ class ApiServer:
         pod = self.etcd.get(key)
         if pod is None:
             return json.dumps({"error": "Pod not found"}), 404
+        if pod.is_mirror():
+            return json.dumps({"error": f"Pod is the mirror of a static pod on Node {pod.node_name}, delete its manifest instead."}), 409
 
         node = self.etcd.get(self.etcd_config.NODE_SPEC_KEY.format(name=pod.node_name))
         if node is None:
             return json.dumps({"error": "Node not found"}), 404
 
+        data["generation"] = self.etcd.delete(key)
         topic = self.kafka_config.POD_TOPIC.format(name=node.name)
-        self.kafka_producer.produce(
-            topic, key="DELETE", value=json.dumps(data).encode("utf-8")
-        )
-        self.etcd.delete(key)
+        self.bus.produce(topic, messageCodec.encode(data), key="DELETE")
+        self._release_reservation(node.name, namespace, name)
         return json.dumps({"message": "Pod delete successfully"}), 200
 
     def get_global_replica_sets(self):
@@ -1351,7 +1626,7 @@ class ApiServer:
         file = request.files['file']
         code_dir = self.serverless_config.CODE_PATH.format(namespace=namespace, name=name)
         function_config = FunctionConfig(namespace, name, trigger, code_dir)
-        function = Function(function_config, self.serverless_config, file)
+        function = Function(function_config, self.serverless_config, file, self.docker)
 
         try:
             # 检查并存入源代码
@@ -1362,12 +1637,28 @@ class ApiServer:
             function_config.target_image = function.push_image()
             # 写etcd
             self.etcd.put(self.etcd_config.FUNCTION_SPEC_KEY.format(namespace=namespace, name=name), function_config)
+            # 通知各节点预先拉取函数镜像，第一次调用时不必等待拉取
+            self._broadcast_prepull([function_config.target_image])
 
         except Exception as e:
             return json.dumps({"error": str(e)}), 409
         print(f"[INFO]Function {name} added successfully in namespace {namespace}")
         return json.dumps({"message": "Successfully add function"}), 200
 
+    def _function_images(self):
+        functions = self.etcd.get_prefix(self.etcd_config.GLOBAL_FUNCTION_KEY)
+        return [function.target_image for function in functions if getattr(function, "target_image", None)]
+
+    def _broadcast_prepull(self, images):
+        for node in self.etcd.get_prefix(self.etcd_config.NODES_KEY):
+            if node.status != NODE_STATUS.ONLINE:
+                continue
+            self.bus.produce(
+                self.kafka_config.POD_TOPIC.format(name=node.name),
+                messageCodec.encode({"images": images}),
+                key="PREPULL",
+            )
+
     def update_function(self, namespace : str, name : str):
         # 由于函数更改后，旧的Pod实例必须删除，所以逻辑就等价于增加再删除
         try:
@@ -1403,7 +1694,7 @@ class ApiServer:
                     pod_num = len(function_config.pod_list)
                     if pod_num == 0:
                         break
-                    function = Function(function_config, self.serverless_config, None)
+                    function = Function(function_config, self.serverless_config, None, self.docker)
                     pod_namespace, pod_name, pod_yaml = function.pod_info(id = pod_num - 1)
                     url = self.uri_config.PREFIX + self.uri_config.POD_SPEC_URL.format(namespace=pod_namespace, name=pod_name)
                     response = requests.delete(url)
@@ -1439,7 +1730,7 @@ class ApiServer:
                 function_config = self.etcd.get(
                     self.etcd_config.FUNCTION_SPEC_KEY.format(namespace=namespace, name=name))
                 if len(function_config.pod_list) == 0:
-                    function = Function(function_config, self.serverless_config, None)
+                    function = Function(function_config, self.serverless_config, None, self.docker)
                     pod_namespace, pod_name, pod_yaml = function.pod_info(id=0)
                     url = self.uri_config.PREFIX + self.uri_config.POD_SPEC_URL.format(namespace=pod_namespace,
                                                                                        name=pod_name)
@@ -1508,5 +1799,6 @@ class ApiServer:
 
 
 if __name__ == "__main__":
+    require_broker("ApiServer")
     api_server = ApiServer(URIConfig, EtcdConfig, KafkaConfig, ServerlessConfig)
     api_server.run()
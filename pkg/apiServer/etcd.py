@@ -17,14 +17,22 @@ class Etcd():
         for key in keys:
             self.etcd.delete_prefix(key)
 
-    def get_prefix(self, prefix):
+    def get_prefix(self, prefix, ret_meta = False, ret_revision = False):
         """
-        get前缀查找，返回值的列表，不会报错
+        get前缀查找，返回值的列表，不会报错；ret_meta为True时返回(值, meta)的列表
+        ret_revision为True时同时返回读取时的集群revision：(列表, revision)，不大于它的写入都已反映在列表中
         场景：查看某个namespace的所有pod
         """
-        range_response = self.etcd.get_prefix(prefix)
+        response = self.etcd.get_prefix_response(prefix)
+        range_response = [(kv.value, etcd3.client.KVMetadata(kv, response.header)) for kv in response.kvs]
 
-        return [pickle.loads(v) if v else None for v, meta in range_response]
+        if ret_meta:
+            values = [(pickle.loads(v) if v else None, meta) for v, meta in range_response]
+        else:
+            values = [pickle.loads(v) if v else None for v, meta in range_response]
+        if ret_revision:
+            return values, response.header.revision
+        return values
 
     def get(self, key, ret_meta = False):
         """
@@ -39,8 +47,36 @@ class Etcd():
             return val
 
     def put(self, key, val):
+        """返回写入后的集群revision，可以作为该键的版本号"""
         val = pickle.dumps(val)
-        self.etcd.put(key, val)
+        return self.etcd.put(key, val).header.revision
 
     def delete(self, key):
-        self.etcd.delete(key)
\ No newline at end of file
+        """返回删除后的集群revision"""
+        return self.etcd.delete(key, return_response=True).header.revision
+
+    def transaction(self, expected, puts=None, deletes=None):
+        """
+        多键CAS事务：expected为{key: mod_revision}，mod_revision为0表示该键必须不存在
+        所有比较都成立时执行puts/deletes并返回事务之后的集群revision（可以作为写入的键的版本号），否则不做任何修改并返回False
+        场景：多个scheduler并发绑定同一个Pod，只有一个能成功
+        """
+        compare = []
+        for key, revision in expected.items():
+            if revision:
+                compare.append(self.etcd.transactions.mod(key) == revision)
+            else:
+                compare.append(self.etcd.transactions.version(key) == 0)
+        success = [self.etcd.transactions.put(key, pickle.dumps(val)) for key, val in (puts or {}).items()]
+        success += [self.etcd.transactions.delete(key) for key in deletes or []]
+        succeeded, responses = self.etcd.transaction(compare=compare, success=success, failure=[])
+        if not succeeded:
+            return False
+        for response in responses:
+            return getattr(response, response.WhichOneof("response")).header.revision
+        return True
+
+    @staticmethod
+    def revision(meta):
+        """get(key, ret_meta=True)返回的meta转换为mod_revision，键不存在时为0"""
+        return meta.mod_revision if meta is not None else 0
@@ -1,3 +1,23 @@
+class ProbeConfig:
+    """
+    livenessProbe/readinessProbe，支持httpGet、tcpSocket和exec三种方式，字段与kubernetes一致
+    httpGet.port和tcpSocket.port只支持数字端口，host默认为Pod的IP
+    """
+
+    def __init__(self, arg_json):
+        self.json = arg_json
+        self.http_get = arg_json.get("httpGet")
+        self.tcp_socket = arg_json.get("tcpSocket")
+        self.exec_command = (arg_json.get("exec") or {}).get("command")
+        self.initial_delay = arg_json.get("initialDelaySeconds", 0)
+        self.period = arg_json.get("periodSeconds", 10)
+        self.timeout = arg_json.get("timeoutSeconds", 1)
+        self.success_threshold = arg_json.get("successThreshold", 1)
+        self.failure_threshold = arg_json.get("failureThreshold", 3)
+        if not (self.http_get or self.tcp_socket or self.exec_command):
+            raise ValueError("probe requires one of httpGet, tcpSocket or exec")
+
+
 class ContainerConfig:
     def __init__(self, volumes_map, arg_json):
         self.name = arg_json.get("name")
@@ -5,6 +25,10 @@ class ContainerConfig:
         self.command = arg_json.get("command", [])
         self.args = arg_json.get("args", [])
 
+        # 健康检查，由kubelet的ProbeManager执行
+        self.liveness_probe = ProbeConfig(arg_json["livenessProbe"]) if arg_json.get("livenessProbe") else None
+        self.readiness_probe = ProbeConfig(arg_json["readinessProbe"]) if arg_json.get("readinessProbe") else None
+
         self.port = dict()
         if arg_json.get("port") is not None:
             port = dict()
@@ -138,6 +162,12 @@ class ContainerConfig:
             if volume_mounts:
                 result["volumeMounts"] = volume_mounts
 
+        # 处理健康检查
+        if getattr(self, "liveness_probe", None):
+            result["livenessProbe"] = self.liveness_probe.json
+        if getattr(self, "readiness_probe", None):
+            result["readinessProbe"] = self.readiness_probe.json
+
         return result
 
     def _derive_volume_name(self, host_path):
@@ -20,6 +20,12 @@ class EtcdConfig:
     NODES_KEY = "/api/v1/nodes"
     NODE_SPEC_KEY = "/api/v1/nodes/{name}"
     NODES_VALUE = NodeConfig
+    # 每个Node上已绑定Pod的预留记录，由bind_pod通过CAS事务维护
+    NODE_RESERVATIONS_KEY = "/api/v1/reservations/nodes"
+    NODE_RESERVATION_KEY = "/api/v1/reservations/nodes/{name}"
+    # Node的心跳租约：{"name", "renew_time", "sent_time"}，心跳只更新租约，不重写Node对象
+    NODE_LEASES_KEY = "/api/v1/leases/nodes"
+    NODE_LEASE_KEY = "/api/v1/leases/nodes/{name}"
 
     GLOBAL_PODS_KEY = "/api/v1/namespaces/pods"
     PODS_KEY = "/api/v1/namespaces/pods/{namespace}"
@@ -62,4 +68,4 @@ class EtcdConfig:
     WORKFLOW_VALUE = WorkflowConfig
 
     # 清除列表
-    RESET_PREFIX = [NODES_KEY, GLOBAL_PODS_KEY, GLOBAL_REPLICA_SETS_KEY, GLOBAL_HPA_KEY, GLOBAL_DNS_KEY, GLOBAL_SERVICES_KEY, GLOBAL_FUNCTION_KEY, GLOBAL_WORKFLOW_KEY]
+    RESET_PREFIX = [NODES_KEY, NODE_RESERVATIONS_KEY, NODE_LEASES_KEY, GLOBAL_PODS_KEY, GLOBAL_REPLICA_SETS_KEY, GLOBAL_HPA_KEY, GLOBAL_DNS_KEY, GLOBAL_SERVICES_KEY, GLOBAL_FUNCTION_KEY, GLOBAL_WORKFLOW_KEY]
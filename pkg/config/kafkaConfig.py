@@ -1,4 +1,23 @@
+import os
+
+
 class KafkaConfig:
+    # 消息总线后端：kafka，或inprocess（所有组件运行在同一个进程中，不需要Kafka broker）
+    BUS_BACKEND = os.getenv("MESSAGE_BUS", "kafka")
+    # 进程内总线每个分区保留的消息数
+    INPROCESS_RETENTION = 10000
+    # 生产者最多等待PRODUCER_LINGER_MS毫秒攒批，一批最多PRODUCER_BATCH_MESSAGES条；
+    # 本地队列最多缓存PRODUCER_QUEUE_MAX_MESSAGES条未确认的消息
+    PRODUCER_LINGER_MS = 5
+    PRODUCER_BATCH_MESSAGES = 1000
+    PRODUCER_QUEUE_MAX_MESSAGES = 100000
+    # 后台线程poll生产者投递回调的间隔（秒）
+    PRODUCER_POLL_INTERVAL = 0.1
+    # 投递延迟统计保留的最近消息数
+    DELIVERY_LATENCY_WINDOW = 1000
+    # scheduler和kubelet主题的消息超过该字节数时压缩
+    MESSAGE_COMPRESS_THRESHOLD = 512
+
     # Kafka 地址
     # BOOTSTRAP_SERVER="10.181.22.193:9092" #mac
     # BOOTSTRAP_SERVER = "localhost:9092"
@@ -10,6 +29,14 @@ class KafkaConfig:
     POD_TOPIC = "api.v1.nodes.{name}"
     # 与scheduler交互
     SCHEDULER_TOPIC = "api.v1.scheduler"
+    # scheduler主题按namespace/name哈希分区，同一消费组内的多个scheduler各自消费一部分分区
+    SCHEDULER_PARTITIONS = 8
+    SCHEDULER_GROUP = "group-scheduler"
+    # kubelet的消费组按node名固定，重启后从已提交的offset继续消费，停机期间的消息不会丢失
+    # 第一次加入（没有提交过offset）时从头消费：注册后先恢复带版本号的全量Pod列表，再开始消费，
+    # 重放的旧消息按版本号跳过，恢复与订阅之间产生的消息不会丢失
+    KUBELET_GROUP = "kubelet-{name}"
+    KUBELET_OFFSET_RESET = "earliest"
     # 与dns服务器交互
     DNS_TOPIC = "api.v1.dns"
     # service controller与kubeproxy交互
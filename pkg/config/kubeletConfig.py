@@ -1,25 +1,124 @@
+import os
+
+
 class KubeletConfig:
+    # kubelet创建的容器都带有这两个label，PLEG据此过滤docker事件并关联到Pod
+    POD_NAMESPACE_LABEL = "k8s.pod.namespace"
+    POD_NAME_LABEL = "k8s.pod.name"
+    # 容器spec的哈希，kubelet重启后据此判断能否接管原有容器
+    CONTAINER_HASH_LABEL = "k8s.container.hash"
+    # kubelet创建的docker网络带有该label，清理网络时只处理这些网络
+    NETWORK_LABEL = "k8s.kubelet.network"
+    # kubelet的checkpoint文件，记录每个Pod的容器ID和spec哈希，位于项目根目录的Persist目录
+    CHECKPOINT_PATH = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "Persist",
+        "kubelet",
+        "{node_name}",
+        "checkpoint.json",
+    )
+    # checkpoint中保留的已删除Pod的版本号数量，超出时丢弃最早的
+    MAX_POD_TOMBSTONES = 1000
+    # 静态Pod的manifest目录，Node配置的spec.staticPodPath优先；每STATIC_POD_CHECK_INTERVAL秒检查一次变化
+    STATIC_POD_PATH = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "Persist",
+        "kubelet",
+        "{node_name}",
+        "manifests",
+    )
+    STATIC_POD_CHECK_INTERVAL = 5.0
+    # apiServer不可达时，Node每隔该时间（秒）重试注册，期间静态Pod照常运行
+    REGISTER_RETRY_INTERVAL = 5.0
+    # Node心跳间隔（秒），每次在±HEARTBEAT_JITTER比例内随机抖动，同时启动的Node不会同步发送
+    HEARTBEAT_INTERVAL = 2.0
+    HEARTBEAT_JITTER = 0.2
+    # Node的可分配量 = 容量 - 系统预留 - 内存硬驱逐阈值，status.allocatable中声明的值优先
+    SYSTEM_RESERVED_CPU = "100m"
+    SYSTEM_RESERVED_MEMORY = "256Mi"
+    # 内存驱逐：memory.available（内存容量减去全部容器的内存使用）低于HARD时立即驱逐，
+    # 低于SOFT持续EVICTION_SOFT_GRACE_PERIOD秒后驱逐；阈值可以是内存数量，也可以是容量的百分比
+    EVICTION_MEMORY_HARD = "100Mi"
+    EVICTION_MEMORY_SOFT = "10%"
+    EVICTION_SOFT_GRACE_PERIOD = 30.0
+    # 阈值解除后MemoryPressure保持的时间（秒）
+    EVICTION_PRESSURE_TRANSITION_PERIOD = 60.0
+    # PLEG全量relist的周期（秒），用于补上事件流断开期间丢失的状态变化
+    RELIST_PERIOD = 30.0
+    # docker事件流断开后的重连间隔（秒）
+    EVENTS_RECONNECT_INTERVAL = 1.0
+    # 状态管理器批量上报Pod状态的周期（秒），周期内同一Pod的多次变化合并为一次
+    STATUS_FLUSH_INTERVAL = 1.0
+    # CrashLoopBackOff：异常退出的容器第一次立即重启，之后等待时间从INITIAL开始翻倍，最多MAX秒；
+    # 容器稳定运行RESET秒后再崩溃，退避重新计算（与kubernetes的10s/5min/10min一致）
+    CRASH_BACKOFF_INITIAL = 10.0
+    CRASH_BACKOFF_MAX = 300.0
+    CRASH_BACKOFF_RESET = 600.0
+    # 执行Pod创建、删除、重启等docker操作的worker线程数
+    POD_WORKERS = 8
+    # 执行exec探针的线程数，http和tcp探针在ProbeManager的事件循环中异步执行
+    PROBE_EXEC_WORKERS = 4
+    # 清理kubelet创建的无用docker网络的周期（秒），不在每次创建Pod时执行
+    NETWORK_PRUNE_INTERVAL = 300.0
+    # 主循环每次最多取出KAFKA_BATCH_SIZE条消息分发给Pod的worker，没有消息时最多等待KAFKA_POLL_TIMEOUT秒
+    KAFKA_BATCH_SIZE = 64
+    KAFKA_POLL_TIMEOUT = 1.0
+    # 处理完成的消息offset每KAFKA_COMMIT_INTERVAL秒批量异步提交一次
+    KAFKA_COMMIT_INTERVAL = 1.0
+    # 资源指标：每STATS_INTERVAL秒采样一次，每个容器保留STATS_WINDOW个样本，CPU使用量为窗口内的平均值
+    STATS_INTERVAL = 10.0
+    STATS_WINDOW = 6
+    # Pod的pause（sandbox）容器使用的镜像，kubelet启动时预先拉取并且不会被清理
+    PAUSE_IMAGE = "busybox"
+    PAUSE_COMMAND = ["sh", "-c", "echo [INFO]pod network init. && sleep 3600"]
+    # 每个CNI网络预先创建的pause容器数，0表示不使用sandbox池
+    SANDBOX_POOL_SIZE = 2
+    SANDBOX_POOL_PREFIX = "pause_pool_"
+    # 池中pause容器所属的网络
+    SANDBOX_POOL_LABEL = "k8s.sandbox.pool"
+    # 并行拉取镜像的线程数
+    IMAGE_PULL_WORKERS = 4
+    # 镜像所在磁盘使用率超过HIGH（百分比）时按LRU删除未使用的镜像，直到低于LOW
+    IMAGE_GC_HIGH_THRESHOLD = 85
+    IMAGE_GC_LOW_THRESHOLD = 80
+    # docker数据目录不在本机时，按该容量（字节）估算镜像磁盘使用率
+    IMAGE_FS_CAPACITY = 20 * 1024 * 1024 * 1024
+    # 垃圾回收：每GC_INTERVAL秒一轮，每轮最多删除GC_BATCH_SIZE个容器和镜像，有剩余时GC_BACKLOG_INTERVAL秒后继续
+    GC_INTERVAL = 60.0
+    GC_BACKLOG_INTERVAL = 5.0
+    GC_BATCH_SIZE = 20
+    # 创建不足GC_MIN_AGE秒的容器不回收；每个Pod最多保留的已退出容器数
+    GC_MIN_AGE = 60.0
+    MAX_DEAD_CONTAINERS_PER_POD = 1
+    # kubelet提供/stats/summary的默认端口，Node可以通过status.daemonEndpoints.kubeletEndpoint.Port指定
+    STATS_PORT = 10255
+
     def __init__(
         self,
         subnet_ip,
         apiserver,
         node_id,
-        kafka_server,
-        kafka_topic,
+        kafka_server=None,
+        kafka_topic=None,
         cni_name="bridge",
+        node_name=None,
+        stats_port=None,
+        warm_images=None,
+        static_pod_path=None,
+        memory_capacity=None,
     ):
         self.apiserver = apiserver
         self.node_id = node_id
+        # node_id每次启动随机生成，需要跨重启保持的数据（如checkpoint）按node名存放
+        self.node_name = node_name or node_id
+        self.stats_port = stats_port or self.STATS_PORT
+        # 需要预热的镜像（如已注册函数的镜像），注册时由apiServer下发
+        self.warm_images = warm_images or []
+        self.static_pod_path = static_pod_path or self.STATIC_POD_PATH.format(node_name=self.node_name)
+        # 节点内存容量（字节），未知时不做内存压力驱逐
+        self.memory_capacity = memory_capacity
         self.cni_name = cni_name
         self.subnet_ip = subnet_ip
 
         self.kafka_server = kafka_server
         self.topic = kafka_topic
-
-    def consumer_config(self):
-        return {
-            "bootstrap.servers": self.kafka_server,
-            "group.id": self.node_id,
-            "auto.offset.reset": "latest",
-            "enable.auto.commit": False,
-        }
@@ -1,5 +1,8 @@
 from uuid import uuid1
 
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.utils.quantity import parse_cpu, parse_memory
+
 class NodeConfig:
     def __init__(self, arg_json):
         # --- static information ---
@@ -7,20 +10,68 @@ class NodeConfig:
         metadata = arg_json.get("metadata")
         self.name = metadata.get("name")
         self.apiserver = metadata.get("ip")
+        # 拓扑标签，topologySpreadConstraints与podAntiAffinity按标签划分拓扑域
+        self.labels = metadata.get("labels") or {}
 
         spec = arg_json.get("spec")
         self.subnet_ip = spec.get("podCIDR")
         self.taints = spec.get("taints")
+        # 静态Pod的manifest目录，未配置时使用KubeletConfig.STATIC_POD_PATH
+        self.static_pod_path = spec.get("staticPodPath")
         self.json = arg_json
+        self.address = None
+        self._parse_status()
 
         self.status = None
         self.heartbeat_time = None
         self.kafka_server = None
         self.kafka_topic = None
 
+    def _parse_status(self):
+        status = self.json.get("status") or {}
+        # 可分配的Pod数量上限，bind_pod据此做预留检查；未配置时不限制
+        allocatable = status.get("allocatable") or {}
+        self.max_pods = int(allocatable["pods"]) if allocatable.get("pods") else None
+        # CPU（核数）和内存（字节）的容量与可分配量，未上报的资源不参与调度检查
+        self.capacity = self._resources(status.get("capacity"))
+        self.allocatable = self._resources(allocatable)
+        # kubelet内存紧张时上报MemoryPressure，scheduler不再向该Node调度BestEffort的Pod
+        self.memory_pressure = any(
+            condition.get("type") == "MemoryPressure" and condition.get("status") == "True"
+            for condition in status.get("conditions") or []
+        )
+
+        # kubelet的地址和指标端口，apiServer据此代理/stats/summary；未配置InternalIP时保留apiServer取到的请求来源地址
+        self.address = next(
+            (a.get("address") for a in status.get("addresses") or [] if a.get("type") == "InternalIP"), self.address
+        )
+        self.kubelet_port = (
+            (status.get("daemonEndpoints") or {}).get("kubeletEndpoint", {}).get("Port") or KubeletConfig.STATS_PORT
+        )
+
+    @staticmethod
+    def _resources(values):
+        values = values or {}
+        resources = {}
+        if values.get("cpu") is not None:
+            resources["cpu"] = parse_cpu(values["cpu"])
+        if values.get("memory") is not None:
+            resources["memory"] = parse_memory(values["memory"])
+        return resources
+
+    def apply_status(self, delta):
+        """合并心跳中变化的status字段（值为None表示删除），重新计算由status派生的属性"""
+        status = {**(self.json.get("status") or {}), **delta}
+        self.json = {**self.json, "status": {key: value for key, value in status.items() if value is not None}}
+        self._parse_status()
+
     def kubelet_config_args(self):
         return {
             "subnet_ip": self.subnet_ip,
             "apiserver": self.apiserver,
             "node_id": self.id,
+            "node_name": self.name,
+            "stats_port": self.kubelet_port,
+            "static_pod_path": self.static_pod_path,
+            "memory_capacity": self.capacity.get("memory"),
         }
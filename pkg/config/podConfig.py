@@ -1,7 +1,12 @@
 from pkg.config.containerConfig import ContainerConfig
+from pkg.config.priorityConfig import PriorityConfig
+from pkg.utils.quantity import pod_requests
 
 
 class PodConfig:
+    # kubelet上报的静态Pod带有该注解，值为manifest内容的哈希
+    MIRROR_ANNOTATION = "kubernetes.io/config.mirror"
+
     def __init__(self, arg_json):
         # --- static information ---
         metadata = arg_json.get("metadata")
@@ -12,11 +17,21 @@ class PodConfig:
         self.labels = metadata.get("labels", {})
         self.app = self.labels.get("app", None)
         self.env = self.labels.get("env", None)
+        self.owner_references = metadata.get("ownerReferences", [])
+        self.annotations = metadata.get("annotations", {})
+        # apiServer发给kubelet的消息中Pod的版本号（etcd revision），同一个Pod的后续操作版本号更大
+        self.generation = metadata.get("generation")
 
         spec = arg_json.get("spec")
         self.volumes = spec.get("volumes", [])
         containers = spec.get("containers", [])
         self.node_selector = spec.get("nodeSelector", {})
+        # 调度约束：拓扑打散与Pod反亲和，只支持labelSelector.matchLabels
+        self.topology_spread_constraints = spec.get("topologySpreadConstraints", [])
+        self.affinity = spec.get("affinity", {})
+        # 优先级：显式的priority优先，否则由priorityClassName解析
+        self.priority_class_name = spec.get("priorityClassName")
+        self.priority = PriorityConfig.resolve(self.priority_class_name, spec.get("priority"))
         self.volume, self.containers = dict(), []
 
         # 目前只支持hostPath，并且忽略type字段
@@ -46,6 +61,8 @@ class PodConfig:
         self.subnet_ip = None
         self.node_name = None
         self.status = None
+        # 由kubelet的readinessProbe决定，只有ready的Pod会作为Service的端点
+        self.ready = None
 
     def to_dict(self):
         return {
@@ -53,15 +70,24 @@ class PodConfig:
                 "name": self.name,
                 "namespace": self.namespace,
                 "labels": self.labels,
+                "ownerReferences": self.owner_references,
+                "generation": getattr(self, "generation", None),
+                "annotations": getattr(self, "annotations", {}),
             },
             "spec": {
                 "volumes": self.volumes,
                 "containers": [container.to_dict() for container in self.containers],
+                "nodeSelector": self.node_selector,
+                "topologySpreadConstraints": self.topology_spread_constraints,
+                "affinity": self.affinity,
+                "priorityClassName": self.priority_class_name,
+                "priority": self.priority,
             },
             "cni_name": self.cni_name,
             "subnet_ip": self.subnet_ip,
             "node_name": str(self.node_name),
             "status": self.status,
+            "ready": getattr(self, "ready", None),
         }
 
     # wcc: 别加这个
@@ -75,6 +101,41 @@ class PodConfig:
     # 重新初始化容器配置
     # self.containers = [ContainerConfig(self.volume, container) for container in state['spec']['containers']]
 
+    def resource_requests(self):
+        """全部容器资源请求之和：(CPU核数, 内存字节)"""
+        return pod_requests([container.to_dict() for container in self.containers])
+
+    def is_best_effort(self):
+        """没有任何容器声明requests或limits，内存紧张时最先被驱逐，也不会被调度到有内存压力的Node"""
+        return not any(container.to_dict().get("resources") for container in self.containers)
+
+    def is_mirror(self):
+        """kubelet静态Pod在apiServer中的mirror Pod"""
+        return self.MIRROR_ANNOTATION in (getattr(self, "annotations", None) or {})
+
+    def anti_affinity_terms(self):
+        """
+        返回podAntiAffinity的(required, preferred)两组约束
+        required: [(matchLabels, topologyKey)]
+        preferred: [(weight, matchLabels, topologyKey)]
+        """
+        anti = (self.affinity or {}).get("podAntiAffinity") or {}
+        required = [
+            (term.get("labelSelector", {}).get("matchLabels", {}), term.get("topologyKey"))
+            for term in anti.get("requiredDuringSchedulingIgnoredDuringExecution", [])
+        ]
+        preferred = []
+        for term in anti.get("preferredDuringSchedulingIgnoredDuringExecution", []):
+            affinity_term = term.get("podAffinityTerm", {})
+            preferred.append(
+                (
+                    term.get("weight", 1),
+                    affinity_term.get("labelSelector", {}).get("matchLabels", {}),
+                    affinity_term.get("topologyKey"),
+                )
+            )
+        return required, preferred
+
     # 为了方便selector进行，增加了函数实现
     def get_app_label(self):
         """
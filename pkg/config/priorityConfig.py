@@ -0,0 +1,21 @@
+class PriorityConfig:
+    # 内置优先级类，对应Kubernetes的PriorityClass，数值越大优先级越高
+    # 调度器在集群资源不足时，可以驱逐低优先级的Pod为高优先级Pod腾出位置
+    SYSTEM_CRITICAL = "system-critical"
+    FUNCTION_CRITICAL = "function-critical"
+    DEFAULT = "default"
+    BATCH = "batch"
+
+    CLASSES = {
+        SYSTEM_CRITICAL: 2000000000,
+        FUNCTION_CRITICAL: 100000,
+        DEFAULT: 0,
+        BATCH: -100,
+    }
+
+    @classmethod
+    def resolve(cls, class_name=None, priority=None):
+        """显式的priority优先，其次按priorityClassName查表，未知或未指定时为default"""
+        if priority is not None:
+            return int(priority)
+        return cls.CLASSES.get(class_name, cls.CLASSES[cls.DEFAULT])
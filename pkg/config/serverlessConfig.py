@@ -20,6 +20,8 @@ class ServerlessConfig:
     POD_NAMESPACE = 'function-{namespace}'
     POD_NAME = '{name}-{id}'
     POD_PORT = 6000
+    # 函数实例对冷启动延迟敏感，集群资源不足时可以抢占批处理Pod
+    POD_PRIORITY_CLASS = 'function-critical'
 
     # 扩容策略
     MAX_REQUESTS_PER_POD = 4
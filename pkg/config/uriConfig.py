@@ -39,7 +39,15 @@ class URIConfig:
     NODES_URL = URIString("/api/v1/nodes")
     NODE_SPEC_URL = URIString("/api/v1/nodes/<name>")
     NODE_SPEC_STATUS_URL = URIString("/api/v1/nodes/<name>/status")
+    # Node心跳：{"timestamp", "status": 变化的status字段}
+    NODE_HEARTBEAT_URL = URIString("/api/v1/nodes/<name>/heartbeat")
     NODE_ALL_PODS_URL = URIString("/api/v1/nodes/<name>/pods")
+    # NODE_ALL_PODS_URL响应头：读取Pod列表时的etcd revision
+    PODS_REVISION_HEADER = "X-Etcd-Revision"
+    # kubelet批量上报本节点Pod的状态和子网IP
+    NODE_PODS_STATUS_URL = URIString("/api/v1/nodes/<name>/pods/status")
+    # kubelet上报本节点全部静态Pod，apiServer据此创建、更新和删除mirror Pod
+    NODE_MIRROR_PODS_URL = URIString("/api/v1/nodes/<name>/mirrorpods")
 
     # Pod 相关 (命名空间级别)
     GLOBAL_PODS_URL = URIString("/api/v1/pods")
@@ -48,6 +56,14 @@ class URIConfig:
     POD_SPEC_STATUS_URL = URIString("/api/v1/namespaces/<namespace>/pods/<name>/status")
     POD_SPEC_IP_URL = URIString("/api/v1/namespaces/<namespace>/pods/<name>/ip")
 
+    # Pod资源指标，apiServer代理到Pod所在节点kubelet的/stats/summary
+    PODS_METRICS_URL = URIString("/apis/metrics/v1/namespaces/<namespace>/pods")
+    POD_METRICS_URL = URIString("/apis/metrics/v1/namespaces/<namespace>/pods/<name>")
+    # apiServer消息总线的投递统计
+    BUS_METRICS_URL = URIString("/apis/metrics/v1/bus")
+    # apiServer处理Node心跳的负载统计
+    HEARTBEAT_METRICS_URL = URIString("/apis/metrics/v1/heartbeats")
+
     # Service 相关
     GLOBAL_SERVICES_URL = URIString("/api/v1/services")
     SERVICE_URL = URIString("/api/v1/namespaces/<namespace>/services")
@@ -21,9 +21,6 @@ class HPAController:
         self.reconcile_interval = 15  # 调整检查间隔，单位秒
         self.hpas = {}  # 存储所有活动的HPA {namespace/name: hpa_object}
 
-        # 节点信息缓存
-        self.node_cadvisor_urls = {}  # {node_id: cadvisor_url}
-
     def get_all_hpas(self):
         """获取所有HPA配置"""
         try:
@@ -70,21 +67,6 @@ class HPAController:
             print(f"[ERROR]Error updating HPA {hpa.name}: {str(e)}")
         return False
 
-    def get_node_cadvisor_url(self, node_id):
-        """获取节点的cAdvisor URL (现在不使用，但预留接口)"""
-        # 如果已经缓存，直接返回
-        if node_id in self.node_cadvisor_urls:
-            return self.node_cadvisor_urls[node_id]
-
-        # 实际实现中应该通过API获取节点IP，这里简化处理
-        # 例如：通过node_id查询节点信息获取IP
-        # 现在简单返回默认值
-        cadvisor_url = f"http://10.119.15.182:8080"  # 与hpa.py中保持一致，使用固定地址
-
-        # 缓存URL
-        self.node_cadvisor_urls[node_id] = cadvisor_url
-        return cadvisor_url
-
     def evaluate_metrics(self, hpa, target_resource):
         """评估当前指标，决定是扩容还是缩容"""
         cpu_target = None
@@ -108,7 +90,7 @@ class HPAController:
 
         # 获取当前资源使用情况
         try:
-            # 直接使用HPA对象提供的方法获取整机CPU和内存使用率
+            # 目标Pod的平均使用率，指标由各节点kubelet采集、经apiServer汇总
             cpu_usage = hpa.get_cpu_usage_percentage()
             memory_usage = hpa.get_memory_usage_percentage()
 
@@ -248,13 +230,6 @@ class HPAController:
                 self.update_hpa(hpa)
                 return
 
-            # 未来扩展：根据节点ID设置正确的cAdvisor URL
-            # 现在我们先使用hpa.py中预设的URL
-            # node_id = target.node_id
-            # if node_id:
-            #     cadvisor_url = self.get_node_cadvisor_url(node_id)
-            #     hpa.cadvisor_base_url = cadvisor_url
-
             # 评估指标，计算需要的副本数
             new_replicas = self.evaluate_metrics(hpa, target)
 
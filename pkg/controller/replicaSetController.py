@@ -75,8 +75,8 @@ class ReplicaSetController:
             if candidate not in existing_names:
                 return candidate, uid
 
-    def create_pod_from_template(self, namespace, base_pod_name, namespace_pods):
-        """根据基础Pod创建副本"""
+    def create_pod_from_template(self, namespace, base_pod_name, namespace_pods, owner_name=None):
+        """根据基础Pod创建副本，owner_name为所属ReplicaSet，调度器据此把副本打散到不同Node"""
         # 获取基础Pod的配置
         base_pod = self.get_pod_config(namespace, base_pod_name)
         print(f"[INFO]Base pod config: {base_pod}")
@@ -96,6 +96,15 @@ class ReplicaSetController:
         # 复制配置并修改
         pod_config = copy.deepcopy(base_pod)
         pod_config["metadata"]["name"] = replica_name
+        if owner_name:
+            pod_config["metadata"]["ownerReferences"] = [
+                {
+                    "apiVersion": "v1",
+                    "kind": "ReplicaSet",
+                    "name": owner_name,
+                    "uid": owner_name,  # 与ReplicaSet.create_pod一致，简化为名称
+                }
+            ]
 
         if pod_config["spec"] and pod_config["spec"].get("containers"):  # 如果存在
             for container in pod_config["spec"]["containers"]:
@@ -236,7 +245,7 @@ class ReplicaSetController:
                         # 创建新Pod
                         for _ in range(diff):
                             replica_name = self.create_pod_from_template(
-                                namespace, base_pod_name, namespace_pods
+                                namespace, base_pod_name, namespace_pods, rs_name
                             )
 
                             if replica_name:
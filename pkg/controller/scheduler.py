@@ -1,12 +1,31 @@
 import json
-import pickle
 import random
-from time import sleep
-from confluent_kafka import Consumer, KafkaError
+from time import sleep, time
+from uuid import uuid4
 from abc import ABC, abstractmethod
 
 from pkg.apiServer.apiClient import ApiClient
+from pkg.utils.messageBus import message_bus, require_broker
+from pkg.utils.messageCodec import decode_schedule_request
+from pkg.utils.quantity import pod_requests
 from pkg.apiObject.node import STATUS
+from pkg.config.podConfig import PodConfig
+from pkg.controller.schedulerCache import SchedulerCache, HOSTNAME_KEY, pod_labels, node_domain
+
+def merge_list(old_list, new_list):
+    """
+    保持原有顺序同步新增/删除的元素，按name匹配同一个Node并替换为新对象（携带最新状态）
+    每次调度都会用全量Node列表调用update，按name建立索引使同步为O(n)
+    """
+    latest = {getattr(item, "name", item): item for item in new_list}
+    merged = []
+    for item in old_list:
+        key = getattr(item, "name", item)
+        if key in latest:
+            merged.append(latest.pop(key))
+    merged.extend(latest.values())
+    return merged
+
 
 class Strategy(ABC):
     """抽象策略基类，所有方法需由子类实现"""
@@ -21,6 +40,22 @@ class Strategy(ABC):
         """更新策略内部状态（如轮询指针或权重）"""
         raise NotImplementedError("Subclasses must implement update()")
 
+    def assume(self, pod, node):
+        """Pod绑定成功后的回调，需要感知已放置Pod的策略（如拓扑打散）可以覆盖"""
+        pass
+
+    def resync(self, pods):
+        """用apiServer的全量Pod列表校正策略内部缓存，pods为{name: pod_dict}的列表"""
+        pass
+
+    def forget(self, pod_key):
+        """Pod被删除（如抢占驱逐）后的回调"""
+        pass
+
+    def preempt(self, pod):
+        """没有Node能放下该Pod时，返回(node, [被驱逐的pod_key])，不支持抢占的策略返回None"""
+        return None
+
 
 class RandomSelector(Strategy):
     def __init__(self):
@@ -30,10 +65,7 @@ class RandomSelector(Strategy):
     def update(self, new_list):
         """更新内部列表（与RoundRobin逻辑一致）"""
         # 保留原有顺序但同步新增/删除的元素
-        self.list = [item for item in self.list if item in new_list]
-        for item in new_list:
-            if item not in self.list:
-                self.list.append(item)
+        self.list = merge_list(self.list, new_list)
 
     def schedule(self, pod):
         """随机选择一个元素"""
@@ -45,9 +77,10 @@ class RandomSelector(Strategy):
             return self.list[0]
 
         # 随机选择（避免连续重复）
+        candidates = self.list
         if self.last_selected is not None:
             candidates = [item for item in self.list if item != self.last_selected]
-            selected = random.choice(candidates) if candidates else self.last_selected
+        selected = random.choice(candidates) if candidates else self.last_selected
 
         self.last_selected = selected
         return selected
@@ -63,13 +96,7 @@ class RoundRobin(Strategy):
 
     def update(self, new_list):
         """更新内部列表，保持原有顺序但同步新增/删除的元素"""
-        # 删除不存在于新列表中的元素
-        self.list = [item for item in self.list if item in new_list]
-
-        # 添加新元素（保持在新列表中的顺序）
-        for item in new_list:
-            if item not in self.list:
-                self.list.append(item)
+        self.list = merge_list(self.list, new_list)
 
         # 确保指针不越界
         if self.ptr >= len(self.list):
@@ -90,57 +117,304 @@ class RoundRobin(Strategy):
 
 class FilterSelect(Strategy):
     def __init__(self, base_strategy=RandomSelector()):
-        self.base_startegy = base_strategy
+        self.base_strategy = base_strategy
         self.list = []
 
     def update(self, new_list):
-        self.list = [item for item in self.list if item in new_list]
-
-        for item in new_list:
-            if item not in self.list:
-                self.list.append(item)
+        self.list = merge_list(self.list, new_list)
+
+    @staticmethod
+    def check_taints(taints, kvs):
+        for k, v in kvs:
+            has_key = False
+            for taint in taints or []:
+                if taint["key"] == k:
+                    has_key = True
+                    if taint["value"] != v:
+                        return False
+            if has_key == False:
+                return False
+        return True
+
+    def eligible(self, pod, node):
+        """
+        Node为ONLINE，且污点标签满足Pod的nodeSelector：对于给定的key，value必须满足
+        Node上报MemoryPressure时不接受BestEffort的Pod
+        """
+        if getattr(node, "memory_pressure", False) and pod.is_best_effort():
+            return False
+        return node.status == STATUS.ONLINE and self.check_taints(node.taints, pod.node_selector.items())
 
-    def schedule(self, pod):
+    def filter(self, pod):
         """
-        目前只支持设备选择
+        返回可以放置该Pod的Node列表，目前只支持设备选择
         """
+        return [node for node in self.list if self.eligible(pod, node)]
 
-        def check_taints(taints, kvs):
-            for k, v in kvs:
-                has_key = False
-                for taint in taints:
-                    if taint["key"] == k:
-                        has_key = True
-                        if taint["value"] != v:
-                            return False
-                if has_key == False:
-                    return False
-            return True
+    def schedule(self, pod):
+        self.base_strategy.update(self.filter(pod))
+        return self.base_strategy.schedule(pod)
 
-        filter_list = self.list
-        # 根据node状态是否为ONLINE筛选
-        filter_list = [
-            node for node in filter_list if node.status == STATUS.ONLINE
-        ]
 
-        # 根据node的污点标签筛选。对于给定的key，value必须满足
-        filter_list = [
-            node
-            for node in filter_list
-            if check_taints(node.taints, pod.node_selector.items())
-        ]
+class TopologySpreadSelect(FilterSelect):
+    """
+    在FilterSelect的基础上支持topologySpreadConstraints和podAntiAffinity
+    - 过滤：whenUnsatisfiable=DoNotSchedule的打散约束、required反亲和
+    - 打分：whenUnsatisfiable=ScheduleAnyway的打散约束、preferred反亲和；
+      带ownerReferences且没有声明任何约束的Pod（如ReplicaSet副本）默认按hostname软打散
+    - 得分最高的Node中优先选择Pod总数最少的，仍然相同时由base_strategy选择
+    - 容量：Node上的Pod数达到maxPods，或Pod的资源请求超过Node剩余的allocatable时不可放置；
+      此时可以抢占该Node上优先级更低的Pod
+    - 采样：与kubernetes的percentageOfNodesToScore一致，从轮转的起点开始过滤，
+      找到足够数量的可行Node后提前结束，只对这部分Node打分，每个Pod的开销不随集群规模线性增长
+    匹配计数来自SchedulerCache中按Node维护的selector计数器，不需要遍历全部Pod
+    """
+
+    # 集群小于该规模或可行Node少于该数量时不做采样
+    MIN_FEASIBLE_NODES_TO_FIND = 100
+    # percentage_of_nodes_to_score为None时自适应：50% - Node数/125，下限5%
+    MIN_PERCENTAGE_OF_NODES_TO_SCORE = 5
+
+    def __init__(self, base_strategy=None, cache=None, percentage_of_nodes_to_score=None):
+        super().__init__(base_strategy or RoundRobin())
+        self.cache = cache or SchedulerCache()
+        self.percentage_of_nodes_to_score = percentage_of_nodes_to_score
+        # 下一次过滤的起点，使不同Pod依次检查到集群中的所有Node
+        self.next_start_index = 0
+
+    def num_feasible_nodes_to_find(self, num_nodes):
+        """本次过滤需要找到的可行Node数，找到后即停止过滤"""
+        percentage = self.percentage_of_nodes_to_score
+        if num_nodes < self.MIN_FEASIBLE_NODES_TO_FIND or (percentage is not None and percentage >= 100):
+            return num_nodes
+        if percentage is None or percentage <= 0:
+            percentage = max(self.MIN_PERCENTAGE_OF_NODES_TO_SCORE, 50 - num_nodes // 125)
+        return max(num_nodes * percentage // 100, self.MIN_FEASIBLE_NODES_TO_FIND)
+
+    def assume(self, pod, node):
+        self.cache.add_pod(
+            f"{pod.namespace}/{pod.name}",
+            node.name,
+            pod_labels(pod.labels, pod.owner_references),
+            pod.priority,
+            pod.resource_requests(),
+            pod.is_mirror(),
+        )
+
+    def forget(self, pod_key):
+        self.cache.remove_pod(pod_key)
+
+    def resync(self, pods):
+        entries = []
+        for entry in pods:
+            for name, pod in entry.items():
+                node_name = pod.get("node_name")
+                # 被驱逐的Pod不再占用Node的容量，ReplicaSet会在其他Node重建
+                if node_name in (None, "None") or pod.get("status") == "Failed":
+                    continue
+                metadata = pod.get("metadata", {})
+                spec = pod.get("spec", {})
+                entries.append(
+                    (
+                        f"{metadata.get('namespace', 'default')}/{name}",
+                        node_name,
+                        pod_labels(metadata.get("labels"), metadata.get("ownerReferences")),
+                        spec.get("priority") or 0,
+                        pod_requests(spec.get("containers")),
+                        PodConfig.MIRROR_ANNOTATION in (metadata.get("annotations") or {}),
+                    )
+                )
+        self.cache.replace_all(entries)
+
+    @staticmethod
+    def _spread_constraints(pod):
+        """返回(hard, soft)两组打散约束，每项为(maxSkew, matchLabels, topologyKey)"""
+        hard, soft = [], []
+        for constraint in pod.topology_spread_constraints or []:
+            item = (
+                constraint.get("maxSkew", 1),
+                constraint.get("labelSelector", {}).get("matchLabels", {}),
+                constraint.get("topologyKey", HOSTNAME_KEY),
+            )
+            if constraint.get("whenUnsatisfiable", "DoNotSchedule") == "DoNotSchedule":
+                hard.append(item)
+            else:
+                soft.append(item)
+
+        required, preferred = pod.anti_affinity_terms()
+        if not hard and not soft and not required and not preferred and pod.owner_references:
+            # 默认打散：同一owner的副本尽量分布在不同Node
+            labels = pod.labels or pod_labels({}, pod.owner_references)
+            soft.append((1, labels, HOSTNAME_KEY))
+        return hard, soft
+
+    def _free_slots(self, node, totals):
+        """Node剩余可放置的Pod数，未配置maxPods时视为无限"""
+        max_pods = getattr(node, "max_pods", None)
+        if max_pods is None:
+            return float("inf")
+        return max_pods - totals.get(node.name, 0)
+
+    def _free_resources(self, node):
+        """Node剩余可分配的(CPU核数, 内存字节)，未上报allocatable的资源视为无限"""
+        allocatable = getattr(node, "allocatable", None) or {}
+        cpu, memory = self.cache.requested(node.name)
+        return allocatable.get("cpu", float("inf")) - cpu, allocatable.get("memory", float("inf")) - memory
+
+    @staticmethod
+    def _requests_fit(requests, free):
+        """没有请求的资源总是满足，与kubernetes一致"""
+        return all(not requested or requested <= available for requested, available in zip(requests, free))
+
+    def _prefilter(self, pod):
+        """
+        计算过滤所需的全局状态：硬打散约束需要全部候选Node上的最小域计数，
+        只在Pod声明了对应约束时才遍历Node
+        """
+        hard, _ = self._spread_constraints(pod)
+        required, _ = pod.anti_affinity_terms()
+        labels = pod_labels(pod.labels, pod.owner_references)
+
+        spread = []
+        if hard:
+            eligible = [node for node in self.list if self.eligible(pod, node)]
+            for max_skew, match_labels, topology_key in hard:
+                domains = self.cache.domain_counts(match_labels, eligible, topology_key)
+                if not domains:
+                    continue
+                self_match = 1 if all(labels.get(k) == v for k, v in match_labels.items()) else 0
+                spread.append((max_skew, topology_key, domains, min(domains.values()), self_match))
+
+        anti_affinity = []
+        for match_labels, topology_key in required:
+            topology_key = topology_key or HOSTNAME_KEY
+            anti_affinity.append((topology_key, self.cache.domain_counts(match_labels, self.list, topology_key)))
+        return self.cache.counts({}), spread, anti_affinity
+
+    def _fits(self, pod, node, state):
+        totals, spread, anti_affinity = state
+        if not self.eligible(pod, node) or self._free_slots(node, totals) <= 0:
+            return False
+        if not self._requests_fit(pod.resource_requests(), self._free_resources(node)):
+            return False
+        for max_skew, topology_key, domains, min_count, self_match in spread:
+            domain = node_domain(node, topology_key)
+            if domain not in domains or domains[domain] + self_match - min_count > max_skew:
+                return False
+        for topology_key, domains in anti_affinity:
+            if domains.get(node_domain(node, topology_key), 0) > 0:
+                return False
+        return True
+
+    def filter(self, pod):
+        """从next_start_index开始轮转检查Node，找到num_feasible_nodes_to_find个可行Node即提前结束"""
+        num_nodes = len(self.list)
+        if num_nodes == 0:
+            return []
+        state = self._prefilter(pod)
+        to_find = self.num_feasible_nodes_to_find(num_nodes)
+        start = self.next_start_index % num_nodes
+        nodes, checked = [], 0
+        while checked < num_nodes and len(nodes) < to_find:
+            node = self.list[(start + checked) % num_nodes]
+            checked += 1
+            if self._fits(pod, node, state):
+                nodes.append(node)
+        self.next_start_index = (start + checked) % num_nodes
+        return nodes
+
+    def score(self, pod, nodes):
+        """返回{node_name: 分数}，分数越高越好"""
+        _, soft = self._spread_constraints(pod)
+        _, preferred = pod.anti_affinity_terms()
+        scores = {node.name: 0 for node in nodes}
+
+        for _, match_labels, topology_key in soft:
+            domains = self.cache.domain_counts(match_labels, nodes, topology_key)
+            for node in nodes:
+                scores[node.name] -= domains.get(node_domain(node, topology_key), 0)
+
+        for weight, match_labels, topology_key in preferred:
+            domains = self.cache.domain_counts(match_labels, nodes, topology_key or HOSTNAME_KEY)
+            for node in nodes:
+                if domains.get(node_domain(node, topology_key or HOSTNAME_KEY), 0) > 0:
+                    scores[node.name] -= weight
+        return scores
 
-        self.base_strategy.update(filter_list)
+    def schedule(self, pod):
+        nodes = self.filter(pod)
+        if not nodes:
+            return None
+        scores = self.score(pod, nodes)
+        # 约束得分相同时优先选择Pod总数更少的Node，空selector的计数即为每个Node上的Pod总数
+        totals = self.cache.counts({})
+        keys = {node.name: (scores[node.name], -totals.get(node.name, 0)) for node in nodes}
+        best = max(keys.values())
+        self.base_strategy.update([node for node in nodes if keys[node.name] == best])
         return self.base_strategy.schedule(pod)
 
+    def preempt(self, pod):
+        """
+        在容量或资源已满的Node中寻找代价最小的驱逐方案：每个Node按优先级从低到高驱逐，
+        直到Pod数与资源请求都能满足，再在Node之间选择被驱逐Pod的最高优先级最低、数量最少的方案
+        只有优先级严格更低的Pod会被驱逐；打散与反亲和导致的不可调度不通过抢占解决
+        """
+        totals = self.cache.counts({})
+        requests = pod.resource_requests()
+        best = None
+        for node in super().filter(pod):
+            needed = 1 - self._free_slots(node, totals)
+            free = list(self._free_resources(node))
+            if needed <= 0 and self._requests_fit(requests, free):
+                continue
+            lower = sorted(
+                (item for item in self.cache.node_pods(node.name) if item[1] < pod.priority),
+                key=lambda item: item[1],
+            )
+            victims = []
+            for item in lower:
+                if needed <= 0 and self._requests_fit(requests, free):
+                    break
+                victims.append(item)
+                needed -= 1
+                free[0] += item[2][0]
+                free[1] += item[2][1]
+            if not victims or needed > 0 or not self._requests_fit(requests, free):
+                continue
+            cost = (victims[-1][1], len(victims))
+            if best is None or cost < best[0]:
+                best = (cost, node, [pod_key for pod_key, _, _ in victims])
+        if best is None:
+            return None
+        return best[1], best[2]
+
 
 class Scheduler:
-    def __init__(self, uri_config, strategy=RoundRobin()):
+    # 绑定失败（Node预留已满或并发冲突）后换一个Node重试的次数
+    BIND_ATTEMPTS = 3
+    # 策略缓存（已放置的Pod）与apiServer全量同步的间隔，期间依靠绑定结果增量更新
+    RESYNC_INTERVAL = 30.0
+    # 暂时无法调度的Pod按指数退避重试，单位秒
+    UNSCHEDULABLE_BACKOFF = 1.0
+    UNSCHEDULABLE_BACKOFF_MAX = 30.0
+    # 抢占后Pod被提名到腾出位置的Node，有效期内只尝试绑定该Node、不再抢占；超时后放弃提名重新调度
+    NOMINATION_TIMEOUT = 10.0
+
+    def __init__(self, uri_config, strategy=RoundRobin(), api_client=None, name=None):
         self.uri_config = uri_config
-        self.api_client = ApiClient(self.uri_config.HOST, self.uri_config.PORT)
+        # 多个scheduler实例在同一消费组内分摊scheduler主题的分区，name仅用于区分日志和kafka client.id
+        self.name = name or f"scheduler-{uuid4().hex[:8]}"
+        # 允许注入api_client，便于在没有ApiServer的环境下（如schedulerSimulator）运行调度逻辑
+        self.api_client = api_client or ApiClient(self.uri_config.HOST, self.uri_config.PORT)
         self.strategy = strategy
         self.kafka_server = None
         self.kafka_topic = None
+        self.kafka_group = None
+        self.last_resync = 0.0
+        # 暂时无法调度的Pod：pod_key -> (下次重试时间, 已重试次数, pod_config)
+        self.unschedulable = {}
+        # 抢占得到的提名：pod_key -> (Node, 提名过期时间, pod_config)
+        self.nominated = {}
 
     def run(self):
         # 注册到apiServer
@@ -149,22 +423,24 @@ class Scheduler:
         if response:
             self.kafka_server = response["kafka_server"]
             self.kafka_topic = response["kafka_topic"]
-            print(f"[INFO]Successfully register to ApiServer.")
+            self.kafka_group = response.get("kafka_group", "group-1")
+            print(f"[INFO]{self.name} successfully register to ApiServer.")
         else:
             print(f"[ERROR]Cannot register to ApiServer {response}")
             return
 
         try:
-            self.consumer = Consumer(
-                {
-                    "bootstrap.servers": self.kafka_server,
-                    "group.id": "group-1",
-                    "auto.offset.reset": "latest",
-                    "enable.auto.commit": True,
+            self.consumer = message_bus(self.kafka_server).consumer(
+                [self.kafka_topic],
+                self.kafka_group,
+                auto_commit=True,
+                config={
+                    "client.id": self.name,
+                    # 实例加入或退出时只迁移必要的分区，其余scheduler不中断
+                    "partition.assignment.strategy": "cooperative-sticky",
                     "debug": "consumer",
-                }
+                },
             )
-            self.consumer.subscribe([self.kafka_topic])
             print(
                 f"[INFO]Subscribe kafka({self.kafka_server}) topic {self.kafka_topic}"
             )
@@ -181,39 +457,197 @@ class Scheduler:
             if msg is not None:
                 if not msg.error():
                     print(f"[INFO]Receive an message")
-                    pod_config = pickle.loads(msg.value())
-
-                    # 获取node信息
-                    node_response = self.api_client.get(self.uri_config.NODES_URL)
-                    if node_response is None:
-                        print("[ERROR]Get node info failed.")
-                        continue
-
-                    # 执行调度
-                    self.strategy.update(node_response)
-                    select_node = self.strategy.schedule(pod_config)
-                    if select_node is None:
-                        print(
-                            f"[ERROR]Schedule is impossible: no suitable nodes to choose from"
-                        )
-                        return
-
-                    # 向apiServer发送调度结果
-                    uri = self.uri_config.SCHEDULER_POD_URL.format(
-                        namespace=pod_config.namespace,
-                        name=pod_config.name,
-                        node_name=select_node.name,
-                    )
-                    response = self.api_client.put(uri, {})
-                    print(
-                        f"[INFO]Scheduled Pod {pod_config.namespace}:{pod_config.name} to Node {select_node.name}"
-                    )
+                    try:
+                        pod_config = decode_schedule_request(msg.value())
+                    except Exception as e:
+                        # 无法解码的消息（如升级前的pickle格式）跳过，不能让调度循环退出
+                        print(f"[ERROR]Decode schedule request failed: {e}")
+                    else:
+                        self.schedule_pod(pod_config)
                 else:
                     print(f"[ERROR]Message error")
 
+            self.retry_unschedulable()
+
+    def schedule_pod(self, pod_config):
+        """
+        对单个Pod执行一次调度：拉取node信息、运行调度策略、向apiServer发送绑定结果
+        返回被选中的node，无法调度时返回None
+        """
+        # 获取node信息
+        node_response = self.api_client.get(self.uri_config.NODES_URL)
+        if node_response is None:
+            print("[ERROR]Get node info failed.")
+            self._requeue(pod_config)
+            return None
+
+        if time() - self.last_resync > self.RESYNC_INTERVAL:
+            self.resync()
+
+        # 执行调度。绑定由apiServer做CAS，失败时排除该Node后重试
+        # 已有提名时只重试提名的Node：驱逐已经发生，换Node或再次抢占都会让驱逐白白浪费
+        pod_key = f"{pod_config.namespace}/{pod_config.name}"
+        excluded = set()
+        for _ in range(self.BIND_ATTEMPTS):
+            select_node = self._nominated_node(pod_key, node_response)
+            if select_node is None:
+                self.strategy.update([node for node in node_response if node.name not in excluded])
+                select_node = self.strategy.schedule(pod_config)
+            if select_node is None:
+                # 没有Node能放下时尝试抢占低优先级Pod
+                select_node = self._preempt(pod_config)
+            if select_node is None:
+                print(
+                    f"[ERROR]Schedule is impossible: no suitable nodes to choose from"
+                )
+                self._requeue(pod_config)
+                return None
+
+            # 向apiServer发送调度结果
+            uri = self.uri_config.SCHEDULER_POD_URL.format(
+                namespace=pod_config.namespace,
+                name=pod_config.name,
+                node_name=select_node.name,
+            )
+            response = self.api_client.put(uri, {})
+            if response is not None:
+                self.nominated.pop(pod_key, None)
+                self.strategy.assume(pod_config, select_node)
+                self.unschedulable.pop(pod_key, None)
+                print(
+                    f"[INFO]Scheduled Pod {pod_config.namespace}:{pod_config.name} to Node {select_node.name}"
+                )
+                return select_node
+
+            bound = self._already_bound(pod_config)
+            if bound:
+                print(
+                    f"[INFO]Pod {pod_config.namespace}:{pod_config.name} is bound or deleted by others, skip."
+                )
+                self._drop_nomination(pod_key)
+                self.unschedulable.pop(pod_key, None)
+                return None
+            if bound is None:
+                # 无法确认Pod的状态（如apiServer暂时不可用），稍后重试
+                self._requeue(pod_config)
+                return None
+            if pod_key not in self.nominated:
+                excluded.add(select_node.name)
+
+        print(f"[ERROR]Bind Pod {pod_config.namespace}:{pod_config.name} failed after {self.BIND_ATTEMPTS} attempts")
+        self._requeue(pod_config)
+        return None
+
+    def _preempt(self, pod_config):
+        """
+        按策略给出的方案通过apiServer删除被驱逐的Pod，返回腾出位置的Node
+        驱逐前先把Pod提名到该Node并在策略缓存中占住位置，腾出的容量不会被本scheduler调度的其他Pod抢走；
+        提名有效期内该Pod绑定失败也不会再次抢占。任何一个被驱逐Pod删除失败时放弃提名并返回None
+        """
+        result = self.strategy.preempt(pod_config)
+        if result is None:
+            return None
+        node, victims = result
+        print(
+            f"[INFO]Preempt {victims} on Node {node.name} for Pod {pod_config.namespace}:{pod_config.name} (priority {pod_config.priority})"
+        )
+        key = f"{pod_config.namespace}/{pod_config.name}"
+        self.nominated[key] = (node, time() + self.NOMINATION_TIMEOUT, pod_config)
+        for pod_key in victims:
+            namespace, name = pod_key.split("/", 1)
+            # apiServer删除Pod时同步释放其在Node上的预留，随后即可绑定；404说明已经被删除，同样腾出了位置
+            status, _ = self.api_client.delete(
+                self.uri_config.POD_SPEC_URL.format(namespace=namespace, name=name), ret_status=True
+            )
+            if status not in (200, 404):
+                print(f"[ERROR]Evict Pod {pod_key} failed (status {status}), drop nomination of Pod {key}")
+                self._drop_nomination(key)
+                return None
+            self.strategy.forget(pod_key)
+        self.strategy.assume(pod_config, node)
+        return node
+
+    def _nominated_node(self, pod_key, node_response):
+        """返回Pod仍然有效的提名Node；提名过期或Node已不存在时放弃提名"""
+        if pod_key not in self.nominated:
+            return None
+        node, expire, _ = self.nominated[pod_key]
+        for current in node_response:
+            if current.name == node.name and time() < expire:
+                return current
+        print(f"[INFO]Drop nomination of Pod {pod_key} on Node {node.name}")
+        self._drop_nomination(pod_key)
+        return None
+
+    def _drop_nomination(self, pod_key):
+        if self.nominated.pop(pod_key, None) is not None:
+            self.strategy.forget(pod_key)
+
+    def _requeue(self, pod_config):
+        """放入无法调度队列，按指数退避稍后重试"""
+        key = f"{pod_config.namespace}/{pod_config.name}"
+        attempts = self.unschedulable[key][1] + 1 if key in self.unschedulable else 1
+        delay = min(self.UNSCHEDULABLE_BACKOFF * 2 ** (attempts - 1), self.UNSCHEDULABLE_BACKOFF_MAX)
+        self.unschedulable[key] = (time() + delay, attempts, pod_config)
+
+    def retry_unschedulable(self, now=None):
+        """重试到期的无法调度Pod，高优先级先重试；已被删除或已被绑定的Pod直接丢弃，无法确认状态的Pod继续退避"""
+        now = time() if now is None else now
+        due = [entry[2] for entry in self.unschedulable.values() if entry[0] <= now]
+        for pod_config in sorted(due, key=lambda pod: -pod.priority):
+            bound = self._already_bound(pod_config)
+            if bound:
+                key = f"{pod_config.namespace}/{pod_config.name}"
+                self._drop_nomination(key)
+                self.unschedulable.pop(key, None)
+                continue
+            if bound is None:
+                self._requeue(pod_config)
+                continue
+            self.schedule_pod(pod_config)
+
+    def resync(self):
+        """拉取全部Pod校正策略缓存，覆盖被删除的Pod和其他scheduler绑定的Pod"""
+        pods = self.api_client.get(self.uri_config.GLOBAL_PODS_URL)
+        if pods is None:
+            print("[ERROR]Get pods for resync failed.")
+            return
+        self.strategy.resync(pods)
+        # 提名的Pod尚未绑定，全量同步后重新占住提名Node上的位置
+        for node, _, pod_config in self.nominated.values():
+            self.strategy.assume(pod_config, node)
+        self.last_resync = time()
+
+    def _already_bound(self, pod_config):
+        """
+        绑定失败后检查Pod是否已经被其他scheduler绑定或已经被删除
+        只有apiServer返回404或Pod已有node_name时返回True；请求失败等无法确认的情况返回None
+        """
+        status, pod = self.api_client.get(
+            self.uri_config.POD_SPEC_URL.format(namespace=pod_config.namespace, name=pod_config.name),
+            ret_status=True,
+        )
+        if status == 404:
+            return True
+        if pod is None:
+            print(f"[WARNING]Cannot get Pod {pod_config.namespace}:{pod_config.name} (status {status}), retry later.")
+            return None
+        return pod.get("node_name") not in (None, "None")
 
 if __name__ == "__main__":
+    import argparse
     from pkg.config.uriConfig import URIConfig
 
-    scheduler = Scheduler(URIConfig)
+    parser = argparse.ArgumentParser(description="Start a scheduler instance. Instances share the scheduler consumer group.")
+    parser.add_argument(
+        "--percentage-of-nodes-to-score",
+        type=int,
+        default=None,
+        help="Stop filtering after this percentage of nodes are feasible (default: adaptive)",
+    )
+    parser.add_argument("--name", type=str, default=None, help="Scheduler instance name")
+    args = parser.parse_args()
+
+    require_broker("Scheduler")
+    scheduler = Scheduler(URIConfig, TopologySpreadSelect(percentage_of_nodes_to_score=args.percentage_of_nodes_to_score), name=args.name)
     scheduler.run()
@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+# Pod的ownerReferences作为一个伪标签参与计数，便于按所属ReplicaSet做打散
+OWNER_LABEL = "__owner__"
+HOSTNAME_KEY = "kubernetes.io/hostname"
+
+
+def selector_key(match_labels):
+    """把matchLabels转换为可哈希的规范形式，作为计数器的键"""
+    return tuple(sorted(match_labels.items()))
+
+
+def pod_labels(labels, owner_references):
+    """Pod参与计数的标签：metadata.labels加上owner伪标签"""
+    result = dict(labels or {})
+    for owner in owner_references or []:
+        result[OWNER_LABEL] = owner.get("uid") or owner.get("name")
+        break
+    return result
+
+
+def node_domain(node, topology_key):
+    """Node在某个拓扑键下所属的域，hostname默认取node名"""
+    labels = getattr(node, "labels", None) or {}
+    if topology_key == HOSTNAME_KEY:
+        return labels.get(topology_key, node.name)
+    return labels.get(topology_key)
+
+
+class SchedulerCache:
+    """
+    调度器本地缓存：记录每个Pod所在的Node，并为每个出现过的labelSelector维护按Node的匹配计数
+    - 调度时按selector查询各Node上的匹配Pod数是O(1)，不需要遍历全部Pod
+    - 新selector第一次出现时扫描一遍缓存建立计数，之后随Pod的绑定/删除增量更新
+    - resync用apiServer的全量Pod列表校正缓存，处理被删除或由其他scheduler绑定的Pod
+    - 按Node索引Pod及其优先级，供抢占时挑选驱逐对象
+    - 按Node累计Pod的资源请求(CPU, 内存)，调度时与Node的allocatable比较
+    """
+
+    def __init__(self):
+        # pod_key -> (node_name, labels, priority, requests, mirror)
+        self.pods = {}
+        # node_name -> set(pod_key)
+        self.node_index = defaultdict(set)
+        # node_name -> [CPU核数, 内存字节]
+        self.node_requests = defaultdict(lambda: [0.0, 0])
+        # selector_key -> {node_name: count}
+        self.counters = {}
+
+    @staticmethod
+    def _match(match_labels, labels):
+        return all(labels.get(k) == v for k, v in match_labels)
+
+    def add_pod(self, pod_key, node_name, labels, priority=0, requests=(0.0, 0), mirror=False):
+        if pod_key in self.pods:
+            self.remove_pod(pod_key)
+        self.pods[pod_key] = (node_name, labels, priority, requests, mirror)
+        self.node_index[node_name].add(pod_key)
+        used = self.node_requests[node_name]
+        used[0] += requests[0]
+        used[1] += requests[1]
+        for key, counts in self.counters.items():
+            if self._match(key, labels):
+                counts[node_name] += 1
+
+    def remove_pod(self, pod_key):
+        entry = self.pods.pop(pod_key, None)
+        if entry is None:
+            return
+        node_name, labels, _, requests, _ = entry
+        self.node_index[node_name].discard(pod_key)
+        used = self.node_requests[node_name]
+        used[0] -= requests[0]
+        used[1] -= requests[1]
+        for key, counts in self.counters.items():
+            if self._match(key, labels):
+                counts[node_name] -= 1
+                if counts[node_name] <= 0:
+                    del counts[node_name]
+
+    def replace_all(self, entries):
+        """entries为(pod_key, node_name, labels, priority, requests, mirror)的列表"""
+        self.pods = {}
+        self.node_index = defaultdict(set)
+        self.node_requests = defaultdict(lambda: [0.0, 0])
+        for key in self.counters:
+            self.counters[key] = defaultdict(int)
+        for pod_key, node_name, labels, priority, requests, mirror in entries:
+            self.add_pod(pod_key, node_name, labels, priority, requests, mirror)
+
+    def node_pods(self, node_name):
+        """返回Node上可以被驱逐的[(pod_key, priority, requests)]；静态Pod的mirror不能通过apiServer删除，不返回"""
+        return [
+            (pod_key, self.pods[pod_key][2], self.pods[pod_key][3])
+            for pod_key in self.node_index.get(node_name, ())
+            if not self.pods[pod_key][4]
+        ]
+
+    def requested(self, node_name):
+        """Node上全部Pod的资源请求之和：(CPU核数, 内存字节)"""
+        used = self.node_requests.get(node_name)
+        return (used[0], used[1]) if used else (0.0, 0)
+
+    def counts(self, match_labels):
+        """返回{node_name: 匹配该selector的Pod数}"""
+        key = selector_key(match_labels)
+        counts = self.counters.get(key)
+        if counts is None:
+            counts = defaultdict(int)
+            for node_name, labels, _, _ in self.pods.values():
+                if self._match(key, labels):
+                    counts[node_name] += 1
+            self.counters[key] = counts
+        return counts
+
+    def domain_counts(self, match_labels, nodes, topology_key):
+        """把按Node的计数聚合到拓扑域，只统计nodes中带有该拓扑键的Node"""
+        counts = self.counts(match_labels)
+        result = {}
+        for node in nodes:
+            domain = node_domain(node, topology_key)
+            if domain is None:
+                continue
+            result[domain] = result.get(domain, 0) + counts.get(node.name, 0)
+        return result
@@ -0,0 +1,507 @@
+"""
+调度器模拟器：在没有Kafka、ApiServer和Docker的环境下离线运行Scheduler的调度策略。
+- InProcessBus：进程内消息总线，与Kafka相同的分区和消费组语义，不需要broker
+- FakeApiServer/FakeApiClient：在内存中保存node和pod，模拟ApiServer的node查询与pod绑定接口
+- trace：RS扩容、函数突发、节点故障等事件序列，由SchedulerSimulator回放并统计吞吐、延迟和放置质量
+"""
+
+import io
+import re
+import pickle
+import argparse
+import contextlib
+from time import perf_counter
+from collections import defaultdict
+
+from pkg.apiObject.node import STATUS as NODE_STATUS
+from pkg.apiObject.pod import STATUS as POD_STATUS
+from pkg.config.nodeConfig import NodeConfig
+from pkg.config.podConfig import PodConfig
+from pkg.config.uriConfig import URIConfig
+from pkg.config.kafkaConfig import KafkaConfig
+from pkg.controller.scheduler import Scheduler, RoundRobin, RandomSelector, FilterSelect, TopologySpreadSelect
+from pkg.utils.messageBus import InProcessBus
+from pkg.utils.messageCodec import encode_schedule_request, decode_schedule_request
+
+
+class FakeApiServer:
+    """内存中的ApiServer，只实现调度器需要的node与pod接口"""
+
+    def __init__(self, node_configs):
+        self.nodes = {node.name: node for node in node_configs}
+        self.pods = {}
+        self.bind_time = {}
+        self.node_counts = defaultdict(int)
+        # 被抢占删除的Pod
+        self.preempted = []
+        # 绑定时目标节点已经下线的次数
+        self.offline_bindings = 0
+
+    def add_node(self, node_config):
+        node_config.status = NODE_STATUS.ONLINE
+        self.nodes[node_config.name] = node_config
+
+    def fail_node(self, name):
+        self.nodes[name].status = NODE_STATUS.OFFLINE
+
+    def add_pod(self, pod_config):
+        pod_config.status = POD_STATUS.CREATING
+        self.pods[(pod_config.namespace, pod_config.name)] = pod_config
+
+    def get_nodes(self):
+        # 与ApiServer.get_nodes一致，经过一次pickle序列化，调度器拿到的是副本
+        return pickle.loads(pickle.dumps(list(self.nodes.values())))
+
+    def get_pods(self):
+        return [{pod.name: pod.to_dict()} for pod in self.pods.values()]
+
+    def get_pod(self, namespace, name):
+        pod = self.pods.get((namespace, name))
+        return pod.to_dict() if pod is not None else None
+
+    def bind_pod(self, namespace, name, node_name):
+        """与ApiServer.bind_pod语义一致：已绑定的Pod或预留已满的Node返回失败"""
+        pod = self.pods.get((namespace, name))
+        node = self.nodes.get(node_name)
+        if pod is None or node is None or pod.node_name is not None:
+            return None
+        if node.max_pods is not None and self.node_counts[node_name] >= node.max_pods:
+            return None
+        if self.nodes[node_name].status != NODE_STATUS.ONLINE:
+            self.offline_bindings += 1
+        pod.node_name = node_name
+        self.node_counts[node_name] += 1
+        self.bind_time[(namespace, name)] = perf_counter()
+        return {"message": "Pod bind successfully"}
+
+    def delete_pod(self, namespace, name):
+        pod = self.pods.pop((namespace, name), None)
+        if pod is None:
+            return None
+        if pod.node_name is not None:
+            self.node_counts[pod.node_name] -= 1
+        self.preempted.append(pod)
+        return {"message": "Pod delete successfully"}
+
+
+class FakeApiClient:
+    """替换ApiClient，按uriConfig中的路由把请求转发给FakeApiServer"""
+
+    def __init__(self, api_server, uri_config=URIConfig):
+        self.api_server = api_server
+        self.uri_config = uri_config
+        self.bind_pattern = self._compile(uri_config.SCHEDULER_POD_URL)
+        self.pod_pattern = self._compile(uri_config.POD_SPEC_URL)
+
+    @staticmethod
+    def _compile(uri):
+        return re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", uri) + "$")
+
+    def get(self, path, params=None, ret_status=False):
+        data = None
+        if path == self.uri_config.NODES_URL:
+            data = self.api_server.get_nodes()
+        elif path == self.uri_config.GLOBAL_PODS_URL:
+            data = self.api_server.get_pods()
+        elif self.pod_pattern.match(path):
+            data = self.api_server.get_pod(**self.pod_pattern.match(path).groupdict())
+        if ret_status:
+            return (200 if data is not None else 404), data
+        return data
+
+    def post(self, path, data):
+        if path == self.uri_config.SCHEDULER_URL:
+            return {"kafka_server": "in-memory", "kafka_topic": KafkaConfig.SCHEDULER_TOPIC}
+        return None
+
+    def put(self, path, data):
+        match = self.bind_pattern.match(path)
+        if match:
+            return self.api_server.bind_pod(**match.groupdict())
+        return None
+
+    def delete(self, path, data=None, ret_status=False):
+        match = self.pod_pattern.match(path)
+        data = self.api_server.delete_pod(**match.groupdict()) if match else None
+        if ret_status:
+            return (200 if data is not None else 404), data
+        return data
+
+
+# -------------------- 合成集群与trace --------------------
+ZONE_KEY = "topology.kubernetes.io/zone"
+
+
+def make_node(name, taints=None, labels=None):
+    return NodeConfig(
+        {
+            "metadata": {"name": name, "ip": "127.0.0.1", "labels": labels or {}},
+            "spec": {"podCIDR": "10.5.0.0/16", "taints": taints or []},
+        }
+    )
+
+
+def make_nodes(count, taints_fn=None, zones=3, max_pods=None):
+    """生成count个ONLINE节点，分布在zones个可用区，taints_fn(i)可以为第i个节点指定污点"""
+    nodes = []
+    for i in range(count):
+        node = make_node(f"sim-node-{i}", taints_fn(i) if taints_fn else None, {ZONE_KEY: f"zone-{i % zones}"})
+        node.status = NODE_STATUS.ONLINE
+        node.max_pods = max_pods
+        nodes.append(node)
+    return nodes
+
+
+def make_pod(namespace, name, labels=None, node_selector=None, owner=None, spec=None):
+    metadata = {"name": name, "namespace": namespace, "labels": labels or {}}
+    if owner:
+        metadata["ownerReferences"] = [{"kind": "ReplicaSet", "name": owner, "uid": owner}]
+    return PodConfig(
+        {
+            "metadata": metadata,
+            "spec": {
+                "containers": [{"name": f"{name}-c", "image": "busybox"}],
+                "nodeSelector": node_selector or {},
+                **(spec or {}),
+            },
+        }
+    )
+
+
+# trace是step的列表，每个step是事件的列表。同一个step中的pod会先全部入队再统一调度，用于模拟突发流量
+# 事件格式：("add_pod", PodConfig) / ("add_node", NodeConfig) / ("fail_node", node_name)
+
+
+def rs_scale_up_trace(replicas, app="sim-rs", namespace="default", steps=1, spec=None):
+    """ReplicaSet扩容：同一模板的副本分steps批创建，副本带有指向ReplicaSet的ownerReferences"""
+    trace, per_step = [], max(1, replicas // steps)
+    for start in range(0, replicas, per_step):
+        trace.append(
+            [
+                ("add_pod", make_pod(namespace, f"{app}-{i}", labels={"app": app}, owner=app, spec=spec))
+                for i in range(start, min(replicas, start + per_step))
+            ]
+        )
+    return trace
+
+
+def zone_spread_trace(groups, replicas):
+    """多个ReplicaSet交替扩容，每个都声明按可用区的硬打散约束"""
+    trace = []
+    for g in range(groups):
+        app = f"sim-zone-{g}"
+        spec = {
+            "topologySpreadConstraints": [
+                {
+                    "maxSkew": 1,
+                    "topologyKey": ZONE_KEY,
+                    "whenUnsatisfiable": "DoNotSchedule",
+                    "labelSelector": {"matchLabels": {"app": app}},
+                }
+            ]
+        }
+        trace.extend(rs_scale_up_trace(replicas, app=app, spec=spec))
+    return trace
+
+
+def function_burst_trace(functions, burst, namespace="default"):
+    """函数突发：每个函数同时冷启动burst个实例，全部在同一个step中到达"""
+    step = []
+    for f in range(functions):
+        name = f"func-{f}"
+        for i in range(burst):
+            step.append(
+                (
+                    "add_pod",
+                    make_pod(f"function-{namespace}", f"{name}-{i}", labels={"app": name}),
+                )
+            )
+    return [step]
+
+
+def contention_trace(nodes, per_node, critical):
+    """资源争抢：先用批处理Pod占满每个Node的maxPods，随后到达一批function-critical的函数冷启动"""
+    for node in nodes:
+        node.max_pods = per_node
+    batch = [
+        ("add_pod", make_pod("default", f"batch-{i}", labels={"app": "batch"}, spec={"priorityClassName": "batch"}))
+        for i in range(per_node * len(nodes))
+    ]
+    functions = [
+        (
+            "add_pod",
+            make_pod(
+                "function-default",
+                f"func-critical-{i}",
+                labels={"app": "func-critical"},
+                spec={"priorityClassName": "function-critical"},
+            ),
+        )
+        for i in range(critical)
+    ]
+    return [batch, functions]
+
+
+def node_failure_trace(node_names, pods_before, pods_after, failed=1, app="sim-fail"):
+    """节点故障：先调度一批pod，随后failed个节点下线，再调度一批pod"""
+    trace = rs_scale_up_trace(pods_before, app=app)
+    trace.append([("fail_node", name) for name in node_names[:failed]])
+    trace.append(
+        [
+            ("add_pod", make_pod("default", f"{app}-{i}", labels={"app": app}))
+            for i in range(pods_before, pods_before + pods_after)
+        ]
+    )
+    return trace
+
+
+TRACES = {
+    "rs": lambda nodes: rs_scale_up_trace(200, steps=4),
+    "burst": lambda nodes: function_burst_trace(10, 50),
+    "zone": lambda nodes: zone_spread_trace(5, 31),
+    "contention": lambda nodes: contention_trace(nodes, 10, 2 * len(nodes)),
+    "failure": lambda nodes: node_failure_trace([n.name for n in nodes], 100, 100, failed=max(1, len(nodes) // 4)),
+}
+
+STRATEGIES = {
+    "roundrobin": RoundRobin,
+    "random": RandomSelector,
+    "filter": lambda: FilterSelect(RoundRobin()),
+    "spread": TopologySpreadSelect,
+}
+
+
+# -------------------- 模拟与统计 --------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SimulationReport:
+    def __init__(
+        self, strategy_name, trace_name, elapsed, latencies, api_server, critical_latencies=(), strategy_times=()
+    ):
+        self.strategy_name = strategy_name
+        self.trace_name = trace_name
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+        # 优先级大于0的Pod（如function-critical）的调度延迟
+        self.critical_latencies = sorted(critical_latencies)
+        # 每次调用策略schedule的耗时
+        self.strategy_times = sorted(strategy_times)
+        self.scheduled = len(latencies)
+        self.unscheduled = sum(1 for pod in api_server.pods.values() if pod.node_name is None)
+        self.preempted = len(api_server.preempted)
+        self.throughput = self.scheduled / elapsed if elapsed > 0 else 0.0
+        self.quality = self._placement_quality(api_server)
+
+    @staticmethod
+    def _placement_quality(api_server):
+        online = [n for n in api_server.nodes.values() if n.status == NODE_STATUS.ONLINE]
+        per_node = {node.name: 0 for node in online}
+        groups = defaultdict(lambda: defaultdict(int))
+        displaced, selector_violations = 0, 0
+        for pod in api_server.pods.values():
+            if pod.node_name is None:
+                continue
+            node = api_server.nodes[pod.node_name]
+            # 所在节点已下线的pod
+            if node.status != NODE_STATUS.ONLINE:
+                displaced += 1
+                continue
+            per_node[node.name] += 1
+            groups[pod.labels.get("app")][node.name] += 1
+            taints = {t["key"]: t["value"] for t in node.taints or []}
+            if any(taints.get(k) != v for k, v in pod.node_selector.items()):
+                selector_violations += 1
+
+        counts = list(per_node.values()) or [0]
+        mean = sum(counts) / len(counts)
+        stddev = (sum((c - mean) ** 2 for c in counts) / len(counts)) ** 0.5
+        # 同一组（app标签）的pod在在线节点之间、可用区之间的最大差值
+        max_skew, max_zone_skew = 0, 0
+        for group in groups.values():
+            group_counts = [group.get(name, 0) for name in per_node]
+            max_skew = max(max_skew, max(group_counts) - min(group_counts))
+            zones = defaultdict(int)
+            for node in online:
+                zones[node.labels.get(ZONE_KEY)] += group.get(node.name, 0)
+            max_zone_skew = max(max_zone_skew, max(zones.values()) - min(zones.values()))
+        return {
+            "online_nodes": len(online),
+            "pods_per_node_max": max(counts),
+            "pods_per_node_stddev": stddev,
+            "imbalance": max(counts) / mean if mean else 0.0,
+            "max_group_skew": max_skew,
+            "max_zone_skew": max_zone_skew,
+            "offline_bindings": api_server.offline_bindings,
+            "displaced_pods": displaced,
+            "selector_violations": selector_violations,
+        }
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy_name,
+            "trace": self.trace_name,
+            "scheduled": self.scheduled,
+            "unscheduled": self.unscheduled,
+            "preempted": self.preempted,
+            "elapsed_s": self.elapsed,
+            "pods_per_sec": self.throughput,
+            "latency_ms": {
+                "p50": percentile(self.latencies, 50) * 1000,
+                "p90": percentile(self.latencies, 90) * 1000,
+                "p99": percentile(self.latencies, 99) * 1000,
+                "max": (self.latencies[-1] if self.latencies else 0.0) * 1000,
+                "critical_p99": percentile(self.critical_latencies, 99) * 1000,
+                "strategy_p50": percentile(self.strategy_times, 50) * 1000,
+                "strategy_p99": percentile(self.strategy_times, 99) * 1000,
+            },
+            "quality": self.quality,
+        }
+
+    def __str__(self):
+        d = self.to_dict()
+        lat, q = d["latency_ms"], d["quality"]
+        return (
+            f"[{d['strategy']}/{d['trace']}] scheduled={d['scheduled']} unscheduled={d['unscheduled']} preempted={d['preempted']} "
+            f"throughput={d['pods_per_sec']:.1f} pods/s "
+            f"latency p50={lat['p50']:.3f}ms p90={lat['p90']:.3f}ms p99={lat['p99']:.3f}ms max={lat['max']:.3f}ms critical_p99={lat['critical_p99']:.3f}ms "
+            f"strategy p50={lat['strategy_p50']:.3f}ms p99={lat['strategy_p99']:.3f}ms | "
+            f"max/node={q['pods_per_node_max']} stddev={q['pods_per_node_stddev']:.2f} "
+            f"imbalance={q['imbalance']:.2f} group_skew={q['max_group_skew']} zone_skew={q['max_zone_skew']} "
+            f"offline_bindings={q['offline_bindings']} displaced={q['displaced_pods']} selector_violations={q['selector_violations']}"
+        )
+
+
+class SchedulerSimulator:
+    """
+    使用InProcessBus和FakeApiServer驱动真实的Scheduler.schedule_pod
+    消息值与ApiServer.add_pod一致，由messageCodec编码，所以序列化开销也被计入
+    """
+
+    def __init__(self, strategy_factory, nodes, uri_config=URIConfig, quiet=True, schedulers=1):
+        self.uri_config = uri_config
+        self.api_server = FakeApiServer(nodes)
+        self.bus = InProcessBus()
+        self.topic = KafkaConfig.SCHEDULER_TOPIC
+        self.bus.create_topics({self.topic: KafkaConfig.SCHEDULER_PARTITIONS})
+        # 多scheduler模式：每个实例有独立的策略状态，作为同一消费组的成员分摊分区
+        self.schedulers = [
+            (
+                Scheduler(uri_config, strategy_factory(), api_client=FakeApiClient(self.api_server, uri_config), name=f"sim-scheduler-{i}"),
+                self.bus.consumer([self.topic], KafkaConfig.SCHEDULER_GROUP, auto_offset_reset="earliest", auto_commit=True),
+            )
+            for i in range(schedulers)
+        ]
+        # 单独统计策略本身（过滤+打分）的耗时，不含拉取Node列表与绑定
+        self.strategy_times = []
+        for scheduler, _ in self.schedulers:
+            scheduler.strategy.schedule = self._timed(scheduler.strategy.schedule)
+        self.quiet = quiet
+
+    def _timed(self, schedule):
+        def wrapper(pod):
+            start = perf_counter()
+            try:
+                return schedule(pod)
+            finally:
+                self.strategy_times.append(perf_counter() - start)
+
+        return wrapper
+
+    def _drain(self, enqueue_time, latencies, critical_latencies):
+        busy = True
+        # 各scheduler轮流处理一条消息，直到所有分区为空
+        while busy:
+            busy = False
+            for scheduler, consumer in self.schedulers:
+                msg = consumer.poll(timeout=0)
+                if msg is None:
+                    continue
+                busy = True
+                pod_config = decode_schedule_request(msg.value())
+                if scheduler.schedule_pod(pod_config) is not None:
+                    self._record(pod_config, enqueue_time, latencies, critical_latencies)
+        # 队列清空后，每个scheduler立即重试一轮无法调度的Pod（模拟退避时间到期）
+        for scheduler, _ in self.schedulers:
+            for key, (_, _, pod_config) in list(scheduler.unschedulable.items()):
+                if scheduler.schedule_pod(pod_config) is not None:
+                    self._record(pod_config, enqueue_time, latencies, critical_latencies)
+
+    def _record(self, pod_config, enqueue_time, latencies, critical_latencies):
+        key = (pod_config.namespace, pod_config.name)
+        latency = self.api_server.bind_time[key] - enqueue_time[key]
+        latencies.append(latency)
+        if pod_config.priority > 0:
+            critical_latencies.append(latency)
+
+    def replay(self, trace, strategy_name="", trace_name=""):
+        latencies, critical_latencies, enqueue_time, elapsed = [], [], {}, 0.0
+        # 调度器的日志输出会主导耗时，模拟时默认屏蔽
+        out = io.StringIO() if self.quiet else None
+        with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+            for step in trace:
+                for event, arg in step:
+                    if event == "add_node":
+                        self.api_server.add_node(arg)
+                    elif event == "fail_node":
+                        self.api_server.fail_node(arg)
+                    elif event == "add_pod":
+                        self.api_server.add_pod(arg)
+                        enqueue_time[(arg.namespace, arg.name)] = perf_counter()
+                        self.bus.produce(self.topic, encode_schedule_request(arg), key=f"{arg.namespace}/{arg.name}")
+                start = perf_counter()
+                self._drain(enqueue_time, latencies, critical_latencies)
+                elapsed += perf_counter() - start
+        return SimulationReport(
+            strategy_name, trace_name, elapsed, latencies, self.api_server, critical_latencies, self.strategy_times
+        )
+
+
+def simulate(strategy_name, trace_name, node_count, uri_config=URIConfig, schedulers=1, strategy_factory=None):
+    nodes = make_nodes(node_count)
+    trace = TRACES[trace_name](nodes)
+    simulator = SchedulerSimulator(strategy_factory or STRATEGIES[strategy_name], nodes, uri_config, schedulers=schedulers)
+    return simulator.replay(trace, strategy_name, trace_name)
+
+
+def sampling_benchmark(trace_name, node_count, percentages, uri_config=URIConfig):
+    """对比不同percentageOfNodesToScore下spread策略的延迟与放置质量，None表示自适应"""
+    reports = []
+    for percentage in percentages:
+        name = f"spread@{'auto' if percentage is None else f'{percentage}%'}"
+        factory = lambda percentage=percentage: TopologySpreadSelect(percentage_of_nodes_to_score=percentage)
+        reports.append(simulate(name, trace_name, node_count, uri_config, strategy_factory=factory))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay synthetic traces against scheduler strategies offline.")
+    parser.add_argument("--strategy", choices=list(STRATEGIES) + ["all"], default="all")
+    parser.add_argument("--trace", choices=list(TRACES) + ["all"], default="all")
+    parser.add_argument("--nodes", type=int, default=20, help="Number of synthetic nodes")
+    parser.add_argument("--schedulers", type=int, default=1, help="Scheduler instances sharing the partitioned topic")
+    parser.add_argument(
+        "--sweep-percentage",
+        action="store_true",
+        help="Compare percentageOfNodesToScore settings of the spread strategy instead",
+    )
+    args = parser.parse_args()
+
+    if args.sweep_percentage:
+        traces = list(TRACES) if args.trace == "all" else [args.trace]
+        print(f"[INFO]Sweeping percentageOfNodesToScore on {args.nodes} nodes.")
+        for trace_name in traces:
+            for report in sampling_benchmark(trace_name, args.nodes, [100, 50, 10, 5, None]):
+                print(report)
+        raise SystemExit(0)
+
+    strategies = list(STRATEGIES) if args.strategy == "all" else [args.strategy]
+    traces = list(TRACES) if args.trace == "all" else [args.trace]
+    print(f"[INFO]Simulating {len(strategies)} strategies x {len(traces)} traces on {args.nodes} nodes.")
+    for trace_name in traces:
+        for strategy_name in strategies:
+            print(simulate(strategy_name, trace_name, args.nodes, schedulers=args.schedulers))
@@ -3,10 +3,10 @@ import time
 import threading
 import logging
 from typing import Dict, List, Set
-from confluent_kafka import Producer, KafkaException
 from pkg.apiObject.service import Service
 from pkg.config.serviceConfig import ServiceConfig
 from pkg.apiServer.apiClient import ApiClient
+from pkg.utils.messageBus import message_bus
 
 class ServiceController:
     """Service控制器，负责Service的生命周期管理"""
@@ -20,14 +20,12 @@ class ServiceController:
         # API客户端
         self.api_client = ApiClient(uri_config.HOST, uri_config.PORT)
         
-        # Kafka生产者（用于向ServiceProxy发送规则更新）
-        self.kafka_producer = None
+        # 消息总线（用于向ServiceProxy发送规则更新）
+        self.bus = None
         if kafka_config:
             try:
-                self.kafka_producer = Producer({
-                    'bootstrap.servers': kafka_config.BOOTSTRAP_SERVER
-                })
-                print("ServiceController已连接到Kafka")
+                self.bus = message_bus(kafka_config.BOOTSTRAP_SERVER)
+                print("ServiceController已连接到消息总线")
             except Exception as e:
                 print(f"连接Kafka失败: {e}")
         
@@ -194,8 +192,8 @@ class ServiceController:
             self.service_configs[service_name] = service_config
             
             # 向所有节点广播Service创建规则
-            endpoints = [f"{pod.get('subnet_ip', '')}:{service_config.get_port_config()['targetPort']}" 
-                        for pod in matching_pods if pod.get('subnet_ip')]
+            endpoints = [f"{Service.endpoint_ip(pod)}:{service_config.get_port_config()['targetPort']}" 
+                        for pod in matching_pods if Service.endpoint_ip(pod)]
             self._broadcast_service_rules("CREATE", service_name, service_config, endpoints)
             
             print(f"Service {service_name} 创建成功")
@@ -222,8 +220,8 @@ class ServiceController:
             
             if is_updated:
                 # 向所有节点广播Service更新规则
-                endpoints = [f"{pod.get("subnet_ip","")}:{new_config.get_port_config()['targetPort']}" 
-                            for pod in matching_pods if pod.get('subnet_ip')]
+                endpoints = [f"{Service.endpoint_ip(pod)}:{new_config.get_port_config()['targetPort']}" 
+                            for pod in matching_pods if Service.endpoint_ip(pod)]
                 self._broadcast_service_rules("UPDATE", service_name, new_config, endpoints)
 
         except Exception as e:
@@ -329,8 +327,8 @@ class ServiceController:
     
     def _broadcast_service_rules(self, action: str, service_name: str, service_config: ServiceConfig, endpoints: List[str] = None):
         """向所有节点广播Service规则更新"""
-        if not self.kafka_producer:
-            print("Kafka生产者未配置，无法广播Service规则")
+        if not self.bus:
+            print("消息总线未配置，无法广播Service规则")
             return
             
         try:
@@ -357,10 +355,10 @@ class ServiceController:
                     node_name = node.name if hasattr(node, 'name') else str(node)
                     topic = self.kafka_config.SERVICE_PROXY_TOPIC.format(name=node_name)
                     
-                    self.kafka_producer.produce(
+                    self.bus.produce(
                         topic,
-                        key=action,
-                        value=json.dumps(rule_data).encode('utf-8')
+                        json.dumps(rule_data).encode('utf-8'),
+                        key=action
                     )
                     
                     print(f"已向节点 {node_name} 发送Service {action}消息")
@@ -369,7 +367,7 @@ class ServiceController:
                     print(f"向节点发送Service规则失败: {e}")
             
             # 确保消息发送
-            self.kafka_producer.flush()
+            self.bus.flush()
             print(f"已向 {len(nodes)} 个节点广播Service {action}规则: {service_name}")
             
         except Exception as e:
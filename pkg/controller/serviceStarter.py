@@ -20,6 +20,7 @@ from pkg.config.uriConfig import URIConfig
 from pkg.config.etcdConfig import EtcdConfig
 from pkg.config.kafkaConfig import KafkaConfig
 from pkg.apiServer.etcd import Etcd
+from pkg.utils.messageBus import require_broker
 
 
 class ServiceStarter:
@@ -108,4 +109,5 @@ def main():
 
 
 if __name__ == "__main__":
+    require_broker("ServiceController")
     main()
@@ -432,6 +432,28 @@ class KubectlClient:
         except Exception as e:
             print(f"Error getting pods: {e}")
 
+    def top_pods(self, namespace: str = None) -> None:
+        """显示 Pod 的 CPU 和内存使用量，指标由各节点 kubelet 采集"""
+        try:
+            ns = namespace or self.default_namespace
+            response = self.api_client.get(self.uri_config.PODS_METRICS_URL.format(namespace=ns))
+            pods = (response or {}).get("pods", [])
+            if not pods:
+                print(f"No metrics available for pods in {ns}.")
+                return
+
+            headers = ["NAME", "CPU(cores)", "MEMORY(bytes)", "NODE"]
+            rows = []
+            for pod in sorted(pods, key=lambda p: p["name"]):
+                cpu = "<unknown>" if pod.get("cpu") is None else f"{int(pod['cpu'] * 1000)}m"
+                memory = f"{int(pod.get('memory', 0) / (1024 * 1024))}Mi"
+                rows.append([pod["name"], cpu, memory, pod.get("node_name", "<none>")])
+
+            print(self.format_table_output(headers, rows))
+
+        except Exception as e:
+            print(f"Error getting pod metrics: {e}")
+
     def describe_pod(self, pod_name: str, namespace: str = None) -> None:
         """描述特定 Pod 的详细信息"""
         try:
@@ -1215,6 +1237,10 @@ def main():
                               help="资源类型")
     delete_parser.add_argument("name", help="资源名称")
     
+    # top 命令
+    top_parser = subparsers.add_parser("top", help="显示资源的 CPU 和内存使用量")
+    top_parser.add_argument("resource", choices=["pods", "pod"], help="资源类型")
+
     # scale 命令 (仅针对 ReplicaSet)
     scale_parser = subparsers.add_parser("scale", help="扩缩容资源")
     scale_parser.add_argument("resource", choices=["replicaset", "rs"], help="资源类型")
@@ -1287,6 +1313,10 @@ def main():
             elif args.resource == "function":
                 kubectl.delete_function(args.name, namespace=args.namespace)
                 
+        elif args.command == "top":
+            if args.resource in ["pods", "pod"]:
+                kubectl.top_pods(namespace=args.namespace)
+
         elif args.command == "scale":
             if args.resource in ["replicaset", "rs"]:
                 kubectl.scale_replicaset(args.name, args.replicas, namespace=args.namespace)
@@ -0,0 +1,79 @@
+import os
+import json
+from threading import Lock
+
+
+class CheckpointManager:
+    """
+    kubelet本地的checkpoint：{"pods": {pod_key: Pod.checkpoint()}, "tombstones": {pod_key: 删除时的版本号}}，保存为json文件
+    每次Pod创建、更新、删除后整体写入临时文件再原子替换，kubelet中途崩溃也不会留下损坏的文件
+    kubelet重启时据此接管仍在运行、spec未变的容器，并清理已不属于本节点的Pod留下的容器
+    Pod记录和删除记录中的版本号用于在重新消费消息时跳过已经处理过的操作，删除记录最多保留max_tombstones个
+    """
+
+    def __init__(self, path, max_tombstones=1000):
+        self.path = path
+        self.max_tombstones = max_tombstones
+        self.lock = Lock()
+        self.entries, self.tombstones = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}, {}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING]Kubelet checkpoint {self.path} is unreadable, ignore it: {e}")
+            return {}, {}
+        if "pods" in data:
+            entries, tombstones = data["pods"], data.get("tombstones", {})
+        else:  # 旧格式只有{pod_key: Pod.checkpoint()}，pod_key中总是包含"/"
+            entries, tombstones = data, {}
+        print(f"[INFO]Load kubelet checkpoint with {len(entries)} pods from {self.path}")
+        return entries, tombstones
+
+    def _flush(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"pods": self.entries, "tombstones": self.tombstones}, file)
+        os.replace(tmp_path, self.path)
+
+    def get(self, pod_key):
+        with self.lock:
+            return self.entries.get(pod_key)
+
+    def pod_keys(self):
+        with self.lock:
+            return list(self.entries)
+
+    def generations(self):
+        """{pod_key: 已经处理的最新版本号}，包括已删除的Pod"""
+        with self.lock:
+            generations = dict(self.tombstones)
+            for pod_key, entry in self.entries.items():
+                if entry.get("generation") is not None:
+                    generations[pod_key] = entry["generation"]
+            return generations
+
+    def record(self, pod_key, entry):
+        with self.lock:
+            self.entries[pod_key] = entry
+            self.tombstones.pop(pod_key, None)
+            self._flush()
+
+    def tombstone(self, pod_key, generation):
+        """Pod按版本号删除：删除其记录并保留删除时的版本号"""
+        with self.lock:
+            self.entries.pop(pod_key, None)
+            self.tombstones.pop(pod_key, None)
+            self.tombstones[pod_key] = generation
+            while len(self.tombstones) > self.max_tombstones:
+                del self.tombstones[next(iter(self.tombstones))]
+            self._flush()
+
+    def remove(self, pod_key):
+        with self.lock:
+            if self.entries.pop(pod_key, None) is not None:
+                self._flush()
@@ -0,0 +1,99 @@
+from threading import Lock
+from time import time, strftime, gmtime
+
+from pkg.config.priorityConfig import PriorityConfig
+from pkg.utils.quantity import parse_threshold
+
+
+class EvictionManager:
+    """
+    内存压力驱逐，在MetricsCollector每轮采样之后执行，只使用已有的样本，不额外读取cgroup
+    - memory.available = 节点内存容量 - 全部容器最新的内存使用
+    - 低于hard阈值立即驱逐；低于soft阈值持续grace_period秒后驱逐
+    - 每轮最多驱逐一个Pod，等下一轮采样反映回收效果后再判断，避免一次驱逐过多
+    - 驱逐顺序与kubernetes一致：内存使用超过requests的Pod优先，其次优先级低的优先，最后超出requests越多越优先
+    - 静态Pod和system-critical优先级的Pod不驱逐
+    - 阈值满足时MemoryPressure为True，阈值解除后保持transition_period秒，避免在阈值附近反复切换
+    """
+
+    def __init__(self, pod_manager, metrics_collector, capacity, hard, soft, grace_period, transition_period, evict):
+        self.pod_manager = pod_manager
+        self.metrics_collector = metrics_collector
+        self.capacity = capacity
+        self.hard = parse_threshold(hard, capacity)
+        self.soft = parse_threshold(soft, capacity)
+        self.grace_period = grace_period
+        self.transition_period = transition_period
+        # evict(state, reason)，由kubelet在Pod的worker中删除容器并上报Failed
+        self.evict = evict
+        self.lock = Lock()
+        self.soft_since = None
+        self.last_met = None
+        self.pressure = False
+        self.transition_time = time()
+        self.stats = {"available": None, "evictions": 0, "last_eviction": None}
+
+    def synchronize(self, now=None):
+        """检查一次内存压力，返回被驱逐的Pod的(namespace, name)，没有驱逐时返回None"""
+        if not self.capacity:
+            return None
+        now = now or time()
+        usage = self.metrics_collector.pod_memory()
+        available = self.capacity - sum(usage.values())
+        hard_met = self.hard is not None and available < self.hard
+        soft_met = self.soft is not None and available < self.soft
+        if not soft_met:
+            self.soft_since = None
+        elif self.soft_since is None:
+            self.soft_since = now
+
+        with self.lock:
+            self.stats["available"] = available
+            if hard_met or soft_met:
+                self.last_met = now
+            pressure = self.last_met is not None and now - self.last_met <= self.transition_period
+            if pressure != self.pressure:
+                self.pressure, self.transition_time = pressure, now
+                print(f"[{'WARNING' if pressure else 'INFO'}]Node memory pressure: {pressure}, available {available} bytes")
+
+        if not hard_met and not (soft_met and now - self.soft_since >= self.grace_period):
+            return None
+        victim = self._select(usage)
+        if victim is None:
+            print("[WARNING]Node is under memory pressure but no pod can be evicted")
+            return None
+        threshold = "hard" if hard_met else "soft"
+        self.evict(victim, f"memory available {available} bytes is below the {threshold} eviction threshold")
+        with self.lock:
+            self.stats["evictions"] += 1
+            self.stats["last_eviction"] = now
+        return victim.key
+
+    def _select(self, usage):
+        """按驱逐顺序选出第一个可以驱逐的Pod"""
+        best, best_rank = None, None
+        for state in self.pod_manager.snapshot():
+            config = state.pod.config
+            if config.is_mirror() or config.priority >= PriorityConfig.CLASSES[PriorityConfig.SYSTEM_CRITICAL]:
+                continue
+            used = usage.get(state.key, 0)
+            _, requested = config.resource_requests()
+            rank = (used <= requested, config.priority, requested - used)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = state, rank
+        return best
+
+    def condition(self):
+        """上报到Node status.conditions中的MemoryPressure"""
+        with self.lock:
+            pressure, transition_time = self.pressure, self.transition_time
+        return {
+            "type": "MemoryPressure",
+            "status": "True" if pressure else "False",
+            "reason": "KubeletHasInsufficientMemory" if pressure else "KubeletHasSufficientMemory",
+            "lastTransitionTime": strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(transition_time)),
+        }
+
+    def metrics(self):
+        with self.lock:
+            return {**self.stats, "pressure": self.pressure}
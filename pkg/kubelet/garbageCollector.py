@@ -0,0 +1,140 @@
+from collections import defaultdict
+from threading import Thread, Lock
+from time import sleep, time
+
+from pkg.config.kubeletConfig import KubeletConfig
+
+
+class GarbageCollector:
+    """
+    kubelet的垃圾回收，在后台线程中增量执行，每轮最多删除batch个对象，有剩余时缩短下一轮的间隔
+    - 孤儿容器：所属Pod已经不在本节点的容器和sandbox，以及不属于当前Pod实例的pause容器
+    - 死亡容器：仍在本节点的Pod中不再被跟踪的已退出容器，每个Pod最多保留max_dead_per_pod个最新的
+    - 镜像：只处理本kubelet拉取或使用过的镜像，先删除它们重新拉取后留下的无tag旧版本，再按ImageManager的磁盘水位和LRU删除未使用的镜像
+    创建时间不足min_age的容器不处理，避免与正在创建中的Pod竞争
+    restored被设置之前（kubelet重启后恢复的Pod还没有创建或接管完成）不回收容器，否则重启前的容器都会被当作孤儿删除
+    protected_pods返回还不在pod_manager中、但容器不能回收的Pod：checkpoint中记录的、worker中正在创建或接管的
+    """
+
+    def __init__(self, runtime, pod_manager, image_manager, images_in_use, interval, backlog_interval,
+                 min_age, max_dead_per_pod, batch, restored, protected_pods):
+        self.runtime = runtime
+        self.pod_manager = pod_manager
+        self.protected_pods = protected_pods
+        self.image_manager = image_manager
+        self.images_in_use = images_in_use
+        self.interval = interval
+        self.backlog_interval = backlog_interval
+        self.min_age = min_age
+        self.max_dead_per_pod = max_dead_per_pod
+        self.batch = batch
+        self.restored = restored
+        self.lock = Lock()
+        self.stats = {
+            "runs": 0,
+            "containers_removed": 0,
+            "sandboxes_removed": 0,
+            "images_removed": 0,
+            "bytes_freed": 0,
+            "pending": 0,
+            "last_run": None,
+            "last_duration": 0.0,
+        }
+
+    def start(self):
+        Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                pending = self.collect()
+            except Exception as e:
+                print(f"[ERROR]Garbage collection failed: {e}")
+                pending = 0
+            sleep(self.backlog_interval if pending else self.interval)
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def _candidates(self, now):
+        """返回(需要删除的sandbox, 需要删除的容器)，都按创建时间从旧到新排列"""
+        tracked_ids, tracked_pods = set(), set()
+        for state in self.pod_manager.snapshot():
+            tracked_pods.add(state.key)
+            tracked_ids.update(container.id for container in state.pod.containers)
+        protected = set(self.protected_pods()) - tracked_pods
+        protected_sandboxes = {f"pause_{namespace}_{name}" for namespace, name in protected}
+
+        sandboxes, containers = [], []
+        dead = defaultdict(list)
+        for container in self.runtime.list_labeled(KubeletConfig.POD_NAME_LABEL):
+            if container["id"] in tracked_ids or now - container["created"] < self.min_age:
+                continue
+            name = container["name"]
+            if name.startswith(KubeletConfig.SANDBOX_POOL_PREFIX):
+                # 空闲的sandbox由SandboxPool管理
+                continue
+            if name.startswith("pause_"):
+                # 当前Pod实例的pause容器已在tracked_ids中，剩下的都是已删除或已重建的Pod留下的
+                if name not in protected_sandboxes:
+                    sandboxes.append(container)
+                continue
+            labels = container["labels"]
+            pod_key = (labels.get(KubeletConfig.POD_NAMESPACE_LABEL), labels.get(KubeletConfig.POD_NAME_LABEL))
+            if pod_key in protected:
+                continue
+            if pod_key not in tracked_pods:
+                containers.append(container)
+            elif container["state"] != "running":
+                dead[pod_key].append(container)
+        for pod_containers in dead.values():
+            pod_containers.sort(key=lambda c: c["created"], reverse=True)
+            containers.extend(pod_containers[self.max_dead_per_pod:])
+        sandboxes.sort(key=lambda c: c["created"])
+        containers.sort(key=lambda c: c["created"])
+        return sandboxes, containers
+
+    def collect(self, now=None):
+        """执行一轮回收，返回本轮因数量限制没有处理的容器数"""
+        if not self.restored.is_set():
+            return 0
+        start = time()
+        now = now or start
+        budget = self.batch
+        sandboxes, containers = self._candidates(now)
+        removed_sandboxes, removed_containers = 0, 0
+        for kind, candidates in (("sandbox", sandboxes), ("container", containers)):
+            for container in candidates:
+                if budget <= 0:
+                    break
+                budget -= 1
+                try:
+                    self.runtime.remove(container["id"], force=True)
+                except Exception as e:
+                    print(f"[WARNING]GC remove {kind} {container['name']} failed: {e}")
+                    continue
+                if kind == "sandbox":
+                    removed_sandboxes += 1
+                else:
+                    removed_containers += 1
+        pending = len(sandboxes) + len(containers) - (self.batch - budget)
+        if removed_sandboxes or removed_containers:
+            print(f"[INFO]GC removed {removed_sandboxes} orphan sandboxes and {removed_containers} dead containers")
+
+        images_removed, bytes_freed = 0, 0
+        if budget > 0:
+            images_removed, bytes_freed = self.image_manager.remove_dangling(limit=budget)
+            removed, freed = self.image_manager.garbage_collect(self.images_in_use(), limit=budget)
+            images_removed, bytes_freed = images_removed + removed, bytes_freed + freed
+
+        with self.lock:
+            self.stats["runs"] += 1
+            self.stats["sandboxes_removed"] += removed_sandboxes
+            self.stats["containers_removed"] += removed_containers
+            self.stats["images_removed"] += images_removed
+            self.stats["bytes_freed"] += bytes_freed
+            self.stats["pending"] = pending
+            self.stats["last_run"] = now
+            self.stats["last_duration"] = time() - start
+        return pending
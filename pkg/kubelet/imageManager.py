@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import time
+
+from pkg.kubelet.runtime import normalize_image
+
+
+class ImageManager:
+    """
+    kubelet的本地镜像缓存
+    - prepull在收到Pod时立即在线程池中并行拉取其镜像，Pod的worker创建容器前用ensure等待，拉取不再阻塞在containers.run中
+    - 同一个镜像同时只拉取一次，并发的请求共享同一个Future
+    - 记录每个镜像最近一次被Pod使用的时间；磁盘使用率超过high_threshold时按LRU删除未被使用的镜像，直到低于low_threshold
+      清理由kubelet的GarbageCollector定期调用
+    - 只清理本kubelet拉取或使用过的镜像：记录这些镜像的ID，同名镜像重新拉取后留下的无tag旧版本也按ID清理；
+      主机上的其他镜像不会被删除
+    - pin的镜像（pause镜像、已注册函数的镜像）预先拉取并且不会被删除
+    """
+
+    def __init__(self, runtime, max_workers, high_threshold, low_threshold):
+        self.runtime = runtime
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-pull")
+        self.lock = Lock()
+        # image -> 正在拉取的Future
+        self.pulling = {}
+        # image -> 最近一次使用时间
+        self.last_used = {}
+        self.pinned = set()
+        # 本kubelet拉取或使用过的镜像：image -> 镜像ID
+        self.image_ids = {}
+        # 这些镜像曾经的ID，重新拉取后成为dangling的旧版本也属于本kubelet
+        self.known_ids = set()
+
+    def prepull(self, images, pin=False):
+        """异步拉取本地没有的镜像，返回对应的Future列表"""
+        futures, started = [], []
+        with self.lock:
+            for image in {normalize_image(image) for image in images if image}:
+                if pin:
+                    self.pinned.add(image)
+                future = self.pulling.get(image)
+                if future is None:
+                    future = self.executor.submit(self._pull, image)
+                    self.pulling[image] = future
+                    started.append((image, future))
+                futures.append(future)
+        # 已经完成的Future会在add_done_callback中直接调用回调，不能在持有锁时注册
+        for image, future in started:
+            future.add_done_callback(lambda _, image=image: self._done(image))
+        return futures
+
+    def _done(self, image):
+        with self.lock:
+            self.pulling.pop(image, None)
+
+    def _pull(self, image):
+        image_id = self.runtime.image_id(image)
+        if image_id is None:
+            start = time()
+            self.runtime.pull_image(image)
+            print(f"[INFO]Pulled image {image} in {time() - start:.1f}s")
+            image_id = self.runtime.image_id(image)
+        with self.lock:
+            self.image_ids[image] = image_id
+            self.known_ids.add(image_id)
+
+    def ensure(self, images):
+        """等待镜像就绪，拉取失败时抛出异常"""
+        for future in self.prepull(images):
+            future.result()
+
+    def touch(self, images):
+        now = time()
+        with self.lock:
+            for image in images:
+                if image:
+                    self.last_used[normalize_image(image)] = now
+
+    def remove_dangling(self, limit=None):
+        """
+        删除本kubelet记录过的、已经没有tag的旧版本镜像，一次最多删除limit个
+        返回(删除的镜像数, 释放的字节数)
+        """
+        with self.lock:
+            known = self.known_ids - set(self.image_ids.values())
+        if not known:
+            return 0, 0
+        removed, freed = 0, 0
+        for image_id, size in self.runtime.dangling_images().items():
+            if removed == limit:
+                break
+            if image_id not in known:
+                continue
+            try:
+                self.runtime.remove_image(image_id)
+            except Exception as e:
+                # 仍被容器使用的旧版本删除失败，留到下次
+                print(f"[WARNING]Remove dangling image {image_id[:19]} failed: {e}")
+                continue
+            removed, freed = removed + 1, freed + size
+            with self.lock:
+                self.known_ids.discard(image_id)
+        return removed, freed
+
+    def garbage_collect(self, in_use, limit=None):
+        """
+        磁盘使用率超过high_threshold时按LRU删除本kubelet拉取或使用过的镜像，一次最多删除limit个
+        返回(删除的镜像数, 释放的字节数)
+        """
+        used, capacity = self.runtime.image_fs_usage()
+        if capacity <= 0 or used * 100 < capacity * self.high_threshold:
+            return 0, 0
+        target = capacity * self.low_threshold / 100
+        with self.lock:
+            protected = {normalize_image(image) for image in in_use} | self.pinned | set(self.pulling)
+            last_used = dict(self.last_used)
+            managed = set(self.image_ids)
+        # 拉取后还没有被Pod使用的镜像视为最久未使用；没有记录的镜像不属于本kubelet，不删除
+        candidates = sorted(
+            ((last_used.get(image, 0), image, size) for image, size in self.runtime.list_images().items()
+             if image in managed and image not in protected),
+        )
+        removed, freed = 0, 0
+        for _, image, size in candidates:
+            if used - freed <= target or removed == limit:
+                break
+            try:
+                self.runtime.remove_image(image)
+            except Exception as e:
+                print(f"[WARNING]Remove image {image} failed: {e}")
+                continue
+            removed, freed = removed + 1, freed + size
+            with self.lock:
+                self.last_used.pop(image, None)
+                self.known_ids.discard(self.image_ids.pop(image, None))
+            print(f"[INFO]Removed unused image {image} ({size / 1024 / 1024:.0f}MiB)")
+        return removed, freed
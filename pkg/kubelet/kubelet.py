@@ -1,14 +1,30 @@
-import json
 import logging
 import sys
 import os
-from time import sleep
-from confluent_kafka import Consumer, KafkaError
-from threading import Thread
+from time import sleep, time
+from threading import Thread, Event, Lock
 
 from pkg.apiObject.pod import Pod, STATUS
 from pkg.config.podConfig import PodConfig
 from pkg.apiServer.apiClient import ApiClient
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.config.kafkaConfig import KafkaConfig
+from pkg.kubelet.pleg import PLEG
+from pkg.kubelet.podWorkers import PodWorkers
+from pkg.kubelet.podManager import PodManager
+from pkg.kubelet.runtime import DockerRuntime
+from pkg.kubelet.checkpoint import CheckpointManager
+from pkg.kubelet.statusManager import StatusManager
+from pkg.kubelet.probeManager import ProbeManager
+from pkg.kubelet.metricsCollector import MetricsCollector
+from pkg.kubelet.imageManager import ImageManager
+from pkg.kubelet.sandboxPool import SandboxPool
+from pkg.kubelet.garbageCollector import GarbageCollector
+from pkg.kubelet.offsetTracker import OffsetTracker
+from pkg.kubelet.staticPods import StaticPodSource
+from pkg.kubelet.evictionManager import EvictionManager
+from pkg.utils.messageBus import message_bus
+from pkg.utils import messageCodec
 
 # 配置日志记录
 logging.basicConfig(
@@ -22,131 +38,499 @@ logger = logging.getLogger('Kubelet')
 
 class Kubelet:
     """
-    kubelet可以细分为Cri、PLEG等组件，分别用于容器管理和容器状态监控等。
-    我认为这样细分会增加阅读难度，所以我将这些组件的功能全部实现在同一个循环中
+    kubelet由主循环和若干组件组成，主循环只负责消费消息和事件并分发，不直接执行耗时的docker操作
+    - PodManager：kubelet维护的Pod及其容器状态，按(namespace, name)和容器ID索引
+    - PLEG：消费docker事件并定期relist，只有状态发生变化的Pod才会检查重启和上报状态
+    - PodWorkers：每个Pod一个串行队列，创建、删除、重启等docker操作在worker线程中执行
+    - ImageManager / SandboxPool：并行预拉取镜像、预先创建pause容器，缩短Pod创建的关键路径
+    - ProbeManager：执行liveness/readiness探针
+    - StatusManager：批量上报Pod状态；StaticPodSource：本地manifest目录中的静态Pod和对应的mirror Pod
+    - CheckpointManager：记录容器ID、spec哈希和消息版本号，kubelet重启后据此接管容器、跳过重放的消息
+    - GarbageCollector：后台回收孤儿容器、死亡容器和镜像
+    - MetricsCollector / EvictionManager：采集资源使用，内存不足时驱逐Pod
     """
 
-    def __init__(self, config, uri_config):
+    def __init__(self, config, uri_config, runtime=None):
         self.config = config
         self.uri_config = uri_config
         self.api_client = ApiClient(self.uri_config.HOST, self.uri_config.PORT)
-        self.pods_cache = []
-        self.pods_status = []
         # 三个状态：apiserver存储的状态，kubelet存储的状态，Pod本身的状态。
         # 可以保证：如果http请求正常送达，则前两者保持一致。在kubelet每一轮loop后短时间内后两者一致
+        # 后两者保存在pod_manager的PodState中，按(namespace, name)和容器ID索引
+        self.pod_manager = PodManager()
 
-        self.consumer = Consumer(config.consumer_config())
-        self.consumer.subscribe([config.topic])
-        print(f"[INFO]Subscribe kafka({config.kafka_server}) topic {config.topic}")
+        # 所有Pod和PLEG共享同一个容器运行时，连接池大小与worker数匹配
+        self.runtime = runtime or DockerRuntime(max_pool_size=KubeletConfig.POD_WORKERS + 2)
 
-    def apply(self, pod_config_list):
-        self.pods_cache = [Pod(pod_config) for pod_config in pod_config_list]
-        self.pods_status = [STATUS.CREATING] * len(self.pods_cache)
+        self.pleg = PLEG(self.runtime)
+        # 主循环只负责分发，创建、删除、重启等docker操作在各Pod的worker中执行
+        self.pod_workers = PodWorkers(KubeletConfig.POD_WORKERS)
+        # Pod状态和子网IP的变化由状态管理器合并后批量上报
+        self.status_manager = StatusManager(
+            self.api_client, self.uri_config, config.node_name, KubeletConfig.STATUS_FLUSH_INTERVAL
+        )
+        # 存活和就绪探针在一个asyncio事件循环中执行，结果变化时回调
+        self.probe_manager = ProbeManager(
+            self.runtime, self._on_readiness, self._on_liveness_failure, KubeletConfig.PROBE_EXEC_WORKERS
+        )
+        # 镜像在收到Pod时就开始并行拉取，pause镜像和需要预热的镜像常驻本地
+        self.image_manager = ImageManager(
+            self.runtime,
+            KubeletConfig.IMAGE_PULL_WORKERS,
+            KubeletConfig.IMAGE_GC_HIGH_THRESHOLD,
+            KubeletConfig.IMAGE_GC_LOW_THRESHOLD,
+        )
+        self.image_manager.prepull([KubeletConfig.PAUSE_IMAGE, *config.warm_images], pin=True)
+        # 预先创建的pause容器，Pod创建时直接取用
+        self.sandbox_pool = SandboxPool(self.runtime, uri_config.COREDNS_IP, KubeletConfig.SANDBOX_POOL_SIZE)
+        # 本节点容器的资源指标，供HPA和kubectl top通过apiServer查询
+        # apply恢复的Pod全部创建或接管完成之后设置；在此之前pod_manager中的Pod不完整，垃圾回收不能开始
+        self.restored = Event()
+        self.metrics_collector = MetricsCollector(
+            self.runtime, self.pod_manager, config.node_name, KubeletConfig.STATS_INTERVAL, KubeletConfig.STATS_WINDOW
+        )
+        # 后台增量回收已退出的容器、孤儿sandbox和镜像，回收统计随/stats/summary一起提供
+        self.garbage_collector = GarbageCollector(
+            self.runtime,
+            self.pod_manager,
+            self.image_manager,
+            self._images_in_use,
+            KubeletConfig.GC_INTERVAL,
+            KubeletConfig.GC_BACKLOG_INTERVAL,
+            KubeletConfig.GC_MIN_AGE,
+            KubeletConfig.MAX_DEAD_CONTAINERS_PER_POD,
+            KubeletConfig.GC_BATCH_SIZE,
+            self.restored,
+            self._protected_pods,
+        )
+        self.metrics_collector.node_metrics["gc"] = self.garbage_collector.metrics
+        # 每轮资源采样之后检查内存压力，必要时驱逐一个Pod
+        self.eviction_manager = EvictionManager(
+            self.pod_manager,
+            self.metrics_collector,
+            config.memory_capacity,
+            KubeletConfig.EVICTION_MEMORY_HARD,
+            KubeletConfig.EVICTION_MEMORY_SOFT,
+            KubeletConfig.EVICTION_SOFT_GRACE_PERIOD,
+            KubeletConfig.EVICTION_PRESSURE_TRANSITION_PERIOD,
+            self._evict,
+        )
+        self.metrics_collector.listeners.append(self.eviction_manager.synchronize)
+        self.metrics_collector.node_metrics["eviction"] = self.eviction_manager.metrics
+        # 本地checkpoint，kubelet重启后接管仍在运行的容器而不是全部删除重建
+        self.checkpoints = CheckpointManager(
+            KubeletConfig.CHECKPOINT_PATH.format(node_name=config.node_name), KubeletConfig.MAX_POD_TOMBSTONES
+        )
+        # 每个Pod已经分发的最新版本号，只在主循环中访问；重新消费时版本号不大于它的消息直接跳过
+        self.generations = self.checkpoints.generations()
+        # apply拿到的Pod列表读取时的etcd revision，版本号不大于它的消息都已反映在列表中，无论是哪个Pod都跳过
+        self.revision_floor = 0
+
+        # 本地manifest目录中的静态Pod，不需要等待apiServer
+        self.static_pods = StaticPodSource(
+            config.static_pod_path, config.node_name, KubeletConfig.STATIC_POD_CHECK_INTERVAL
+        )
+
+        # 消息在worker中处理完成后才提交offset，提交按分区合并后异步发送
+        self.offsets = OffsetTracker()
+        self.last_commit = 0.0
+        # 注册到apiServer之前没有消息队列，只运行静态Pod
+        self.consumer = None
+        if config.kafka_server is not None:
+            self.connect(config.kafka_server, config.topic)
+
+    def connect(self, kafka_server, topic, warm_images=()):
+        """注册到apiServer后订阅本节点的Pod主题，可以在run开始之后调用"""
+        self.config.kafka_server, self.config.topic = kafka_server, topic
+        if warm_images:
+            self.config.warm_images = list(warm_images)
+            self.image_manager.prepull(self.config.warm_images, pin=True)
+        self.consumer = message_bus(kafka_server).consumer(
+            [topic],
+            KafkaConfig.KUBELET_GROUP.format(name=self.config.node_name),
+            auto_offset_reset=KafkaConfig.KUBELET_OFFSET_RESET,
+            on_commit=self._on_commit,
+        )
+        print(f"[INFO]Subscribe kafka({kafka_server}) topic {topic}")
+
+    def sync_static_pods(self):
+        """扫描manifest目录，按变化创建、更新、删除静态Pod；静态Pod列表变化时重新同步mirror Pod"""
+        first = self.static_pods.last_check == 0
+        added, updated, removed = self.static_pods.scan()
+        for pod_key in removed:
+            namespace, name = pod_key.split("/", 1)
+            self.pod_workers.dispatch(pod_key, self._delete_pod, namespace, name)
+        for handler, configs in ((self._add_pod, added), (self._update_pod, updated)):
+            for config in configs:
+                self.image_manager.prepull(self._images(config))
+                self.pod_workers.dispatch(f"{config.namespace}/{config.name}", handler, config)
+        if added or updated or removed:
+            print(f"[INFO]Static pods: {len(added)} added, {len(updated)} updated, {len(removed)} removed")
+        if first or added or updated or removed:
+            self.status_manager.set_mirror_pods(self.static_pods.mirror_pods())
+
+    def apply(self, pod_config_list, revision=0):
+        # 节点重启时恢复的Pod并行创建，checkpoint中spec未变的容器直接接管
+        # 在connect之前调用，主循环还没有消费消息，版本号不需要加锁
+        # 静态Pod由manifest目录管理，apiServer中的mirror Pod不需要创建；已被驱逐的Pod不再恢复
+        pod_config_list = [
+            pod_config
+            for pod_config in pod_config_list
+            if not pod_config.is_mirror() and pod_config.status != STATUS.FAILED
+        ]
+        pod_keys = self.static_pods.pod_keys()
+        self.revision_floor = max(self.revision_floor, revision)
+        self.image_manager.prepull(image for pod_config in pod_config_list for image in self._images(pod_config))
+        work = []
+        for pod_config in pod_config_list:
+            pod_key = f"{pod_config.namespace}/{pod_config.name}"
+            pod_keys.add(pod_key)
+            # apiServer给出Pod键当前的版本号，之后重放的不大于它的消息都跳过；旧版本apiServer不带版本号时沿用checkpoint
+            if getattr(pod_config, "generation", None) is None:
+                pod_config.generation = self.generations.get(pod_key)
+            elif pod_config.generation > self.generations.get(pod_key, 0):
+                self.generations[pod_key] = pod_config.generation
+            work.append((pod_key, self._add_pod, pod_config))
+        # checkpoint中已经不属于本节点的Pod，删除其遗留的容器
+        for pod_key in self.checkpoints.pod_keys():
+            if pod_key not in pod_keys:
+                work.append((pod_key, self._remove_orphan, pod_key))
+
+        # 全部完成后才允许垃圾回收
+        remaining, lock = [len(work)], Lock()
+
+        def done():
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                self.restored.set()
+                print(f"[INFO]Restored {len(pod_config_list)} pods.")
+
+        for pod_key, handler, arg in work:
+            self.pod_workers.dispatch(pod_key, handler, arg, done=done)
+        if not work:
+            self.restored.set()
+
+    def _protected_pods(self):
+        """checkpoint中记录的、worker中有未完成任务的Pod，(namespace, name)"""
+        pod_keys = set(self.checkpoints.pod_keys()) | self.pod_workers.pending()
+        return {tuple(pod_key.split("/", 1)) for pod_key in pod_keys}
+
+    def _remove_orphan(self, pod_key):
+        entry = self.checkpoints.get(pod_key) or {}
+        for name, record in entry.get("containers", {}).items():
+            try:
+                self.runtime.remove(record["id"], force=True)
+            except Exception as e:
+                print(f"[WARNING]Remove orphan container {name} failed: {e}")
+        self.checkpoints.remove(pod_key)
+        print(f"[INFO]Removed orphan containers of pod {pod_key}")
 
     def run(self):
+        self.pleg.start()
+        self.status_manager.start()
+        self.probe_manager.start()
+        self.metrics_collector.start(self.config.stats_port)
+        self.sandbox_pool.start([self.config.cni_name])
+        self.garbage_collector.start()
         while True:
-            # 接收Pod修改请求
-            msg = self.consumer.poll(timeout=1.0)
-            if msg is not None:
-                if not msg.error():
+            if self.static_pods.check_due():
+                self.sync_static_pods()
+
+            # 接收Pod修改请求：等待第一条消息，再不阻塞地取出已经到达的其余消息，一起分发
+            for msg in self._consume():
+                if msg.error():
+                    print(f"[ERROR]Message error: {msg.error()}")
+                    continue
+                done = self.offsets.track(msg)
+                try:
                     print(
                         f"[INFO]Receive an message with key = {msg.key().decode('utf-8')}"
                     )
                     self.update_pod(
                         msg.key().decode("utf-8"),
-                        json.loads(msg.value().decode("utf-8")),
+                        messageCodec.decode(msg.value()),
+                        done,
                     )
-                    self.consumer.commit(asynchronous=False)
-                else:
-                    print(f"[ERROR]Message error")
-
-            # 重启异常退出的容器
-            for pod in self.pods_cache:
-                pod.restart_crash()
-
-            # 监控状态变化并生成PLEG事件
-            for i, pod in enumerate(self.pods_cache):
-                status = pod.refresh_status()
-                if status != self.pods_status[i]:
-                    self.pods_status[i] = status
-                    uri = self.uri_config.POD_SPEC_STATUS_URL.format(
-                        namespace=pod.config.namespace, name=pod.config.name
-                    )
-                    self.api_client.put(uri, {"status": status})
+                except Exception as e:
+                    print(f"[ERROR]Handle message failed: {e}")
+                    done()
+            self._commit_offsets()
+
+            # 消费PLEG事件，按容器ID找到对应Pod并更新容器状态
+            for event in self.pleg.drain():
+                state = self.pod_manager.get_by_container(event.container_id)
+                if state is not None and state.pod.update_container_state(
+                    event.container_id, event.state, event.exit_code
+                ):
+                    self.pod_manager.mark_dirty(state)
+
+            # 定期relist，校正事件流遗漏的状态
+            if self.pleg.relist_due():
+                try:
+                    states = self.pleg.relist()
+                    for state in self.pod_manager.snapshot():
+                        state.pod.apply_relist(states)
+                        self.pod_manager.mark_dirty(state)
+                except Exception as e:
+                    print(f"[ERROR]PLEG relist failed: {e}")
+
+            self.sync_dirty_pods()
+
+            self.runtime.housekeeping()
+
+    def _consume(self):
+        if self.consumer is None:
+            sleep(KubeletConfig.KAFKA_POLL_TIMEOUT)
+            return []
+        msg = self.consumer.poll(timeout=KubeletConfig.KAFKA_POLL_TIMEOUT)
+        if msg is None:
+            return []
+        return [msg] + self.consumer.consume(num_messages=KubeletConfig.KAFKA_BATCH_SIZE - 1, timeout=0)
+
+    def _commit_offsets(self):
+        now = time()
+        if now - self.last_commit < KubeletConfig.KAFKA_COMMIT_INTERVAL:
+            return
+        self.last_commit = now
+        offsets = self.offsets.take()
+        if offsets and self.consumer is not None:
+            self.consumer.commit(offsets=offsets, asynchronous=True)
+
+    @staticmethod
+    def _on_commit(err, partitions):
+        # 提交失败的offset不重试：之后的提交会覆盖它，崩溃时最多重复处理这一批消息
+        if err is not None:
+            print(f"[WARNING]Commit kafka offsets failed: {err}")
+
+    @staticmethod
+    def _images(config):
+        return [KubeletConfig.PAUSE_IMAGE] + [container.image for container in config.containers]
+
+    def _images_in_use(self):
+        return {image for state in self.pod_manager.snapshot() for image in self._images(state.pod.config)}
+
+    def _ensure_images(self, config):
+        """等待Pod的镜像拉取完成；拉取失败时仍然尝试创建，由容器运行时报告错误"""
+        try:
+            self.image_manager.ensure(self._images(config))
+        except Exception as e:
+            print(f"[WARNING]Pull images of pod {config.namespace}:{config.name} failed: {e}")
 
-    def update_pod(self, type, data):
-        if type in ["ADD", "UPDATE", "DELETE", "GET"]:
+    def sync_dirty_pods(self):
+        """把状态有变化的Pod交给各自的worker检查重启和上报状态"""
+        for state in self.pod_manager.take_dirty(time()):
+            namespace, name = state.key
+            self.pod_workers.dispatch(f"{namespace}/{name}", self._sync_pod, state)
+
+    def _on_readiness(self, pod, container_name, ready):
+        """在ProbeManager的事件循环线程中调用，只记录结果，由主循环的同步上报"""
+        state = self.pod_manager.get(pod.config.namespace, pod.config.name)
+        if state is None or state.pod is not pod:
+            return
+        pod.readiness[container_name] = ready
+        self.pod_manager.mark_dirty(state)
+
+    def _on_liveness_failure(self, pod, container):
+        """容器重启交给Pod的worker执行，与该Pod的其他操作保持顺序"""
+        state = self.pod_manager.get(pod.config.namespace, pod.config.name)
+        if state is None or state.pod is not pod:
+            return
+        self.pod_workers.dispatch(f"{pod.config.namespace}/{pod.config.name}", self._restart_unhealthy, state, container)
+
+    def _restart_unhealthy(self, state, container):
+        if self.pod_manager.get(*state.key) is not state:
+            return
+        try:
+            state.pod.restart_unhealthy(container)
+        except Exception as e:
+            print(f"[ERROR]Restart unhealthy container {container.name} failed: {e}")
+        self.pod_manager.mark_dirty(state)
+
+    def _sync_pod(self, state):
+        """重启异常退出的容器，并在状态变化时上报apiServer"""
+        pod = state.pod
+        # Pod可能已经在排队期间被删除或替换
+        if self.pod_manager.get(*state.key) is not state:
+            return
+        try:
+            retry_at = pod.restart_crash()
+            if retry_at is not None:
+                self.pod_manager.schedule_retry(state, retry_at)
+        except Exception as e:
+            print(f"[ERROR]Restart crashed container of pod {pod.config.namespace}:{pod.config.name} failed: {e}")
+        status = pod.refresh_status()
+        if status != state.reported_status:
+            state.reported_status = status
+            self.status_manager.set_status(pod.config.namespace, pod.config.name, status)
+        ready = pod.ready
+        if ready != state.reported_ready:
+            state.reported_ready = ready
+            self.status_manager.set_ready(pod.config.namespace, pod.config.name, ready)
+
+    def _accept(self, pod_key, generation):
+        """
+        消息带有版本号时，只处理比该Pod已经分发过的版本更新的消息
+        重放、乱序到达的旧消息返回False；旧版本apiServer发送的不带版本号的消息总是处理
+        不大于恢复时Pod列表revision的消息也跳过：已删除很久、不在列表中也没有tombstone的Pod不会被重新创建
+        """
+        if generation is None:
+            return True
+        if generation <= max(self.generations.get(pod_key, 0), self.revision_floor):
+            print(f"[INFO]Skip stale message of pod {pod_key} with generation {generation}")
+            return False
+        self.generations[pod_key] = generation
+        if len(self.generations) > 2 * KubeletConfig.MAX_POD_TOMBSTONES:
+            # 已删除Pod的版本号以checkpoint中保留的为准
+            self.generations = {**self.checkpoints.generations(), pod_key: generation}
+        return True
+
+    def update_pod(self, type, data, done=None):
+        """done在这条消息处理完成后调用，分发给worker的操作在执行结束后才调用；跳过的旧消息立即调用"""
+        if type in ["ADD", "UPDATE", "DELETE", "GET", "PREPULL"]:
             print(f"[INFO]Kubelet {type} pod with data: {data}")
+        elif type == "HEARTBEAT":
+            # ApiServer创建Node主题时写入的占位消息，首次加入从头重放时会读到，无需处理
+            pass
         else:
             print(f"[ERROR]Unknown kubelet operation {type}.")
 
-        # ADD和UPDATE中，status缓存都设置为CREATING，这与apiserver一致。后续通过PLEG事件修改状态
-        if type == "ADD":
+        # 同一个Pod的操作在其worker中按消息顺序执行，不同Pod的操作并行
+        # 镜像在分发前就开始拉取，与同一worker中排在前面的操作并行
+        if type in ("ADD", "UPDATE"):
             config = PodConfig(data)
-            # 从kubelet缓存的Pod信息检查命名是否冲突
-            for pod in self.pods_cache:
-                if (
-                    pod.config.namespace == config.namespace
-                    and pod.config.name == config.name
-                ):
-                    print(
-                        f'[ERROR]Pod name "{config.namespace}:{config.name}" already exists'
-                    )
-                    return
-            try:  # 尝试创建docker，可能出现名称重复、客户端未连接等容器运行时错误
-                new_pod = Pod(config,self.api_client,self.uri_config)
-            except Exception as e:
-                print(f"[ERROR]Docker create fail: {e}")
+            pod_key = f"{config.namespace}/{config.name}"
+            if self._accept(pod_key, config.generation):
+                self.image_manager.prepull(self._images(config))
+                handler = self._add_pod if type == "ADD" else self._update_pod
+                self.pod_workers.dispatch(pod_key, handler, config, done=done)
+                return
+        elif type == "DELETE":
+            namespace, name, generation = data["namespace"], data["name"], data.get("generation")
+            pod_key = f"{namespace}/{name}"
+            if self._accept(pod_key, generation):
+                self.pod_workers.dispatch(pod_key, self._delete_pod, namespace, name, generation, done=done)
                 return
+        else:
+            if type == "PREPULL":
+                # 预热已知的热点镜像（如新注册函数的镜像）
+                self.image_manager.prepull(data.get("images", []), pin=True)
+            if done is not None:
+                done()
 
-            self.pods_cache.append(new_pod)
-            self.pods_status.append(STATUS.CREATING)
-            print(f'[INFO]Kubelet create pod "{config.namespace}:{config.name}".')
+    # ADD和UPDATE中，status缓存都设置为CREATING，这与apiserver一致。后续通过PLEG事件修改状态
+    def _add_pod(self, config):
+        # 从kubelet缓存的Pod信息检查命名是否冲突
+        if self.pod_manager.get(config.namespace, config.name) is not None:
+            if config.generation is not None:
+                # 带版本号的操作按目标状态执行：Pod已经存在时（apply已经创建或之前的消息被重放）按更新处理
+                self._update_pod(config)
+                return
+            print(
+                f'[ERROR]Pod name "{config.namespace}:{config.name}" already exists'
+            )
+            return
+        pod_key = f"{config.namespace}/{config.name}"
+        self._ensure_images(config)
+        try:  # 尝试创建docker，可能出现名称重复、客户端未连接等容器运行时错误
+            new_pod = Pod(
+                config, None, self.uri_config, self.runtime, self.checkpoints.get(pod_key), self.sandbox_pool
+            )
+        except Exception as e:
+            print(f"[ERROR]Docker create fail: {e}")
+            return
+        self.image_manager.touch(self._images(config))
+        self.status_manager.set_subnet_ip(config.namespace, config.name, new_pod.subnet_ip)
+        self.checkpoints.record(pod_key, new_pod.checkpoint())
 
-        elif type == "UPDATE":
-            config = PodConfig(data)
-            # lcl: update又是在做什么？
-            # wcc: 别急
-            for i, pod in enumerate(self.pods_cache):
-                if (
-                    pod.config.namespace == config.namespace
-                    and pod.config.name == config.name
-                ):
-                    try:  # 在旧容器删除过程中出现了容器运行时错误
-                        self.pods_cache[i].remove()
-                        del self.pods_cache[i]
-                        del self.pods_status[i]
-                    except Exception as e:
-                        print(f"[ERROR]Docker rm fail: {e}")
-                        return
-                    try:  # 在新容器创建过程中出现容器运行时错误
-                        self.pods_cache.append(Pod(config))
-                        self.pods_status.append(STATUS.CREATING)
-                    except Exception as e:
-                        print(f"[ERROR]Docker create fail: {e}")
-                        return
-                    print(f'[INFO]Pod "{config.namespace}:{config.name}" updated.')
-                    return
+        self.pod_manager.add(new_pod, STATUS.CREATING)
+        self.probe_manager.add_pod(new_pod)
+        print(f'[INFO]Kubelet create pod "{config.namespace}:{config.name}".')
+
+    def _update_pod(self, config):
+        # lcl: update又是在做什么？
+        # wcc: 别急
+        state = self.pod_manager.get(config.namespace, config.name)
+        if state is None:
+            if config.generation is not None:
+                # 对应的ADD没有在本节点执行（如创建失败），按创建处理
+                self._add_pod(config)
+                return
             # 从kubelet的缓存信息中无法找到对应的Pod
             print(f'[WARNING]Pod "{config.namespace}:{config.name}" not found.')
+            return
+        if config.generation is not None and config.to_dict()["spec"] == state.pod.config.to_dict()["spec"]:
+            # spec没有变化，只记录新的版本号，不重建容器
+            state.pod.config.generation = config.generation
+            self.checkpoints.record(f"{config.namespace}/{config.name}", state.pod.checkpoint())
+            return
 
-        elif type == "DELETE":
-            namespace, name = data["namespace"], data["name"]
-            # lcl: delete逻辑完全没有实现，需要实现
-            # wcc: 别急
-            for i, pod in enumerate(self.pods_cache):
-                if pod.config.namespace == namespace and pod.config.name == name:
-                    try:  # 在旧容器删除过程中出现了容器运行时错误
-                        self.pods_cache[i].remove()
-                        del self.pods_cache[i]
-                        del self.pods_status[i]
-                    except Exception as e:
-                        print(f"[ERROR]Docker rm fail: {e}")
-                        return
-                    print(f'[INFO]Pod "{namespace}:{name}" deleted.')
-                    return
+        try:  # 在旧容器删除过程中出现了容器运行时错误
+            state.pod.remove()
+        except Exception as e:
+            print(f"[ERROR]Docker rm fail: {e}")
+            return
+        self.pod_manager.remove(config.namespace, config.name, state)
+        self.probe_manager.remove_pod(config.namespace, config.name)
+        self._ensure_images(config)
+        try:  # 在新容器创建过程中出现容器运行时错误
+            new_pod = Pod(config, None, self.uri_config, self.runtime, sandbox_pool=self.sandbox_pool)
+        except Exception as e:
+            print(f"[ERROR]Docker create fail: {e}")
+            return
+        self.image_manager.touch(self._images(config))
+        self.status_manager.set_subnet_ip(config.namespace, config.name, new_pod.subnet_ip)
+        self.checkpoints.record(f"{config.namespace}/{config.name}", new_pod.checkpoint())
+        self.pod_manager.add(new_pod, STATUS.CREATING)
+        self.probe_manager.add_pod(new_pod)
+        print(f'[INFO]Pod "{config.namespace}:{config.name}" updated.')
+
+    def _evict(self, state, reason):
+        namespace, name = state.key
+        self.pod_workers.dispatch(f"{namespace}/{name}", self._evict_pod, namespace, name, reason)
+
+    def _evict_pod(self, namespace, name, reason):
+        state = self.pod_manager.get(namespace, name)
+        if state is None:
+            return
+        try:
+            state.pod.remove()
+        except Exception as e:
+            print(f"[ERROR]Docker rm fail: {e}")
+            return
+        self.pod_manager.remove(namespace, name, state)
+        self.probe_manager.remove_pod(namespace, name)
+        self.checkpoints.remove(f"{namespace}/{name}")
+        # 上报Failed：ReplicaSet在其他Node重建，apiServer释放该Pod在本Node的预留
+        self.status_manager.set_status(namespace, name, STATUS.FAILED)
+        self.status_manager.set_ready(namespace, name, False)
+        print(f'[WARNING]Pod "{namespace}:{name}" evicted: {reason}')
+
+    def _delete_pod(self, namespace, name, generation=None):
+        # lcl: delete逻辑完全没有实现，需要实现
+        # wcc: 别急
+        state = self.pod_manager.get(namespace, name)
+        if state is None:
             # 从kubelet的缓存信息中无法找到对应的Pod
             print(f'[WARNING]Pod "{namespace}:{name}" not found.')
+            if generation is not None:
+                self.checkpoints.tombstone(f"{namespace}/{name}", generation)
+            return
+
+        try:  # 在旧容器删除过程中出现了容器运行时错误
+            state.pod.remove()
+        except Exception as e:
+            print(f"[ERROR]Docker rm fail: {e}")
+            return
+        self.pod_manager.remove(namespace, name, state)
+        self.probe_manager.remove_pod(namespace, name)
+        self.status_manager.forget(namespace, name)
+        if generation is not None:
+            self.checkpoints.tombstone(f"{namespace}/{name}", generation)
+        else:
+            self.checkpoints.remove(f"{namespace}/{name}")
+        print(f'[INFO]Pod "{namespace}:{name}" deleted.')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+import json
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from time import sleep, time
+from urllib.parse import urlparse, parse_qs
+
+
+class MetricsCollector:
+    """
+    节点本地的资源指标采集，替代外部的cAdvisor
+    - 后台线程每interval秒对本节点全部容器采样一次（runtime.container_stats），每个容器保留最近window个样本的环形缓冲
+    - CPU使用量（核数）按缓冲中最早和最新样本的差值计算，即最近window*interval秒内的平均值；内存取最新样本
+    - 网络按Pod统计：Pod内的容器共享pause容器的网络命名空间，取pause容器的收发字节数
+    - serve在STATS端口上提供GET /stats/summary[?namespace=&name=]，apiServer代理给HPA和kubectl top
+    - node_metrics中注册的其他组件指标（如GC统计）以同名字段附加在summary中
+    - listeners在每轮采样之后调用（如内存压力驱逐），直接使用本轮的样本
+    """
+
+    SUMMARY_PATH = "/stats/summary"
+
+    def __init__(self, runtime, pod_manager, node_name, interval, window):
+        self.runtime = runtime
+        self.pod_manager = pod_manager
+        self.node_name = node_name
+        self.interval = interval
+        self.window = window
+        self.lock = Lock()
+        # container_id -> deque(样本)
+        self.samples = {}
+        # 字段名 -> 返回该组件指标的函数
+        self.node_metrics = {}
+        self.listeners = []
+        self.server = None
+
+    def start(self, port=None):
+        Thread(target=self._run, daemon=True).start()
+        if port is not None:
+            self.serve(port)
+
+    def _run(self):
+        while True:
+            try:
+                self.collect()
+                for listener in self.listeners:
+                    listener()
+            except Exception as e:
+                print(f"[ERROR]Collect container metrics failed: {e}")
+            sleep(self.interval)
+
+    def collect(self):
+        """对当前全部容器采样一次，已删除容器的缓冲随之丢弃"""
+        alive = set()
+        for state in self.pod_manager.snapshot():
+            for container in state.pod.containers:
+                alive.add(container.id)
+                try:
+                    sample = self.runtime.container_stats(container.id)
+                except Exception:
+                    continue
+                with self.lock:
+                    buffer = self.samples.get(container.id)
+                    if buffer is None:
+                        buffer = self.samples[container.id] = deque(maxlen=self.window)
+                    buffer.append(sample)
+        with self.lock:
+            for container_id in list(self.samples):
+                if container_id not in alive:
+                    del self.samples[container_id]
+
+    def pod_memory(self):
+        """每个Pod全部容器最新样本的内存使用之和：{(namespace, name): 字节}"""
+        states = self.pod_manager.snapshot()
+        result = {}
+        with self.lock:
+            for state in states:
+                result[state.key] = sum(
+                    self.samples[container.id][-1]["memory"]
+                    for container in state.pod.containers
+                    if self.samples.get(container.id)
+                )
+        return result
+
+    @staticmethod
+    def _usage(buffer):
+        """返回(cpu核数, 内存, rx_bytes, tx_bytes, rx速率, tx速率)，只有一个样本时速率为None"""
+        first, last = buffer[0], buffer[-1]
+        elapsed = last["timestamp"] - first["timestamp"]
+        if elapsed <= 0:
+            return None, last["memory"], last["rx_bytes"], last["tx_bytes"], None, None
+        return (
+            max(last["cpu"] - first["cpu"], 0) / elapsed,
+            last["memory"],
+            last["rx_bytes"],
+            last["tx_bytes"],
+            max(last["rx_bytes"] - first["rx_bytes"], 0) / elapsed,
+            max(last["tx_bytes"] - first["tx_bytes"], 0) / elapsed,
+        )
+
+    def pod_summary(self, pod):
+        containers = []
+        network = None
+        with self.lock:
+            buffers = [(container, list(self.samples.get(container.id, ()))) for container in pod.containers]
+        for index, (container, buffer) in enumerate(buffers):
+            if not buffer:
+                continue
+            cpu, memory, rx_bytes, tx_bytes, rx_rate, tx_rate = self._usage(buffer)
+            # 第一个容器是pause容器，只贡献网络指标
+            if index == 0:
+                network = {"rx_bytes": rx_bytes, "tx_bytes": tx_bytes, "rx_rate": rx_rate, "tx_rate": tx_rate}
+            containers.append({"name": container.name, "cpu": cpu, "memory": memory})
+        cpu_values = [c["cpu"] for c in containers if c["cpu"] is not None]
+        return {
+            "namespace": pod.config.namespace,
+            "name": pod.config.name,
+            "cpu": sum(cpu_values) if cpu_values else None,
+            "memory": sum(c["memory"] for c in containers),
+            "network": network,
+            "containers": containers[1:] if network is not None else containers,
+        }
+
+    def summary(self, namespace=None, name=None):
+        pods = [
+            self.pod_summary(state.pod)
+            for state in self.pod_manager.snapshot()
+            if (namespace is None or state.pod.config.namespace == namespace)
+            and (name is None or state.pod.config.name == name)
+        ]
+        summary = {"node": self.node_name, "timestamp": time(), "window": self.window * self.interval, "pods": pods}
+        for field, metrics in self.node_metrics.items():
+            summary[field] = metrics()
+        return summary
+
+    def serve(self, port):
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != collector.SUMMARY_PATH:
+                    self.send_error(404)
+                    return
+                query = parse_qs(url.query)
+                body = json.dumps(
+                    collector.summary(query.get("namespace", [None])[0], query.get("name", [None])[0])
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[INFO]Kubelet stats summary served on port {port}")
@@ -0,0 +1,45 @@
+from collections import defaultdict
+from threading import Lock
+
+
+class OffsetTracker:
+    """
+    跟踪已经消费但还没有处理完成的Kafka消息，只提交每个分区中连续处理完成的offset
+    - 消息交给Pod的worker异步处理，不同Pod的消息完成顺序与消费顺序不同
+    - 分区中较早的消息未完成时，之后已完成的消息也不提交；kubelet崩溃后从最早未完成的消息重新消费
+    - take返回自上次调用以来可以提交的{(topic, partition): 下一个offset}，由主循环批量异步提交
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        # (topic, partition) -> {offset: 是否完成}，同一分区的消息按offset顺序消费，dict保持插入顺序
+        self.inflight = defaultdict(dict)
+        # (topic, partition) -> 可以提交的下一个offset
+        self.ready = {}
+
+    def track(self, msg):
+        """记录一条消息，返回处理完成时调用的回调"""
+        key, offset = (msg.topic(), msg.partition()), msg.offset()
+        with self.lock:
+            self.inflight[key][offset] = False
+        return lambda: self._done(key, offset)
+
+    def _done(self, key, offset):
+        with self.lock:
+            inflight = self.inflight[key]
+            inflight[offset] = True
+            while inflight:
+                first = next(iter(inflight))
+                if not inflight[first]:
+                    break
+                del inflight[first]
+                self.ready[key] = first + 1
+
+    def take(self):
+        with self.lock:
+            ready, self.ready = self.ready, {}
+        return ready
+
+    def pending(self):
+        with self.lock:
+            return sum(len(inflight) for inflight in self.inflight.values())
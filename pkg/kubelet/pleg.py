@@ -0,0 +1,107 @@
+import queue
+from time import sleep, time
+from threading import Thread
+
+from pkg.config.kubeletConfig import KubeletConfig
+
+
+class PodLifecycleEvent:
+    """一次容器状态变化：所属Pod、容器ID、docker状态和退出码"""
+
+    def __init__(self, namespace, name, container_id, state, exit_code=0):
+        self.namespace = namespace
+        self.name = name
+        self.container_id = container_id
+        self.state = state
+        self.exit_code = exit_code
+
+    def __str__(self):
+        return f"PodLifecycleEvent({self.namespace}:{self.name}, {self.container_id[:12]}, {self.state}, {self.exit_code})"
+
+
+class PLEG:
+    """
+    Pod生命周期事件生成器：订阅docker events，只关注带有kubelet label的容器
+    - 事件由后台线程放入队列，kubelet主循环调用drain取出后更新Pod的容器状态，不再逐个容器reload
+    - 每RELIST_PERIOD秒做一次relist，用一次list调用校正全部容器状态，补上事件流断开期间丢失的事件
+    docker API的调用量从O(容器数 × 循环频率)降为O(状态变化数)
+    """
+
+    # docker事件到容器状态（与docker inspect的State.Status一致）的映射，其余事件忽略
+    EVENT_STATES = {
+        "create": "created",
+        "start": "running",
+        "restart": "running",
+        "unpause": "running",
+        "pause": "paused",
+        "die": "exited",
+        "destroy": "removed",
+    }
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.events = queue.Queue()
+        self.last_relist = 0.0
+        self.stopped = False
+        self.stream = None
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self._watch, daemon=True)
+        self.thread.start()
+        print(f"[INFO]PLEG started, relist period {KubeletConfig.RELIST_PERIOD}s")
+
+    def stop(self):
+        self.stopped = True
+        if self.stream is not None:
+            self.stream.close()
+
+    def _watch(self):
+        while not self.stopped:
+            try:
+                self.stream = self.runtime.events(
+                    {"type": "container", "label": [KubeletConfig.POD_NAME_LABEL]}
+                )
+                for event in self.stream:
+                    self._handle(event)
+            except Exception as e:
+                if self.stopped:
+                    return
+                print(f"[WARNING]PLEG docker events stream broken: {e}")
+            # 事件流中断期间可能丢失事件，下一轮循环立即relist
+            self.last_relist = 0.0
+            sleep(KubeletConfig.EVENTS_RECONNECT_INTERVAL)
+
+    def _handle(self, event):
+        # 旧版本docker的事件没有Action字段，使用status
+        state = self.EVENT_STATES.get(event.get("Action") or event.get("status"))
+        if state is None:
+            return
+        actor = event.get("Actor", {})
+        attributes = actor.get("Attributes", {})
+        namespace = attributes.get(KubeletConfig.POD_NAMESPACE_LABEL)
+        name = attributes.get(KubeletConfig.POD_NAME_LABEL)
+        if namespace is None or name is None:
+            return
+        exit_code = int(attributes.get("exitCode") or 0)
+        self.events.put(PodLifecycleEvent(namespace, name, actor.get("ID") or event.get("id"), state, exit_code))
+
+    def drain(self):
+        """取出队列中全部事件，不阻塞"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def relist_due(self, now=None):
+        return (now or time()) - self.last_relist >= KubeletConfig.RELIST_PERIOD
+
+    def relist(self):
+        """
+        一次list调用取回本机全部容器的状态，返回{container_id: (state, exit_code)}
+        不按label过滤，这样没有label的旧容器（如复用的pause容器）也能被校正
+        """
+        self.last_relist = time()
+        return self.runtime.container_states()
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+from threading import Lock
+
+
+class PodState:
+    """kubelet中单个Pod的记录：Pod对象和最近一次上报给apiServer的状态及就绪情况"""
+
+    __slots__ = ("pod", "reported_status", "reported_ready")
+
+    def __init__(self, pod, reported_status):
+        self.pod = pod
+        self.reported_status = reported_status
+        self.reported_ready = None
+
+    @property
+    def key(self):
+        return self.pod.config.namespace, self.pod.config.name
+
+
+class PodManager:
+    """
+    kubelet的Pod索引：按(namespace, name)和容器ID索引PodState，查找都是O(1)
+    pod worker线程和主循环并发访问，所有操作在内部加锁；主循环通过snapshot遍历，不受并发增删影响
+    同时记录需要检查重启和上报状态的Pod（收到PLEG事件或刚刚创建）
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        # (namespace, name) -> PodState
+        self.pods = {}
+        # container_id -> PodState
+        self.containers = {}
+        # 需要同步的(namespace, name)
+        self.dirty = set()
+        # 处于CrashLoopBackOff的Pod的定时同步：[(retry_at, seq, state)]
+        self.retries = []
+        self.seq = itertools.count()
+
+    def __len__(self):
+        return len(self.pods)
+
+    def add(self, pod, reported_status):
+        """加入一个新建的Pod并标记为需要同步，同名的旧记录会被替换"""
+        state = PodState(pod, reported_status)
+        with self.lock:
+            self._remove(state.key)
+            self.pods[state.key] = state
+            for container_id in pod.container_states:
+                self.containers[container_id] = state
+            self.dirty.add(state.key)
+        return state
+
+    def _remove(self, key):
+        state = self.pods.pop(key, None)
+        if state is not None:
+            for container_id in state.pod.container_states:
+                if self.containers.get(container_id) is state:
+                    del self.containers[container_id]
+            self.dirty.discard(key)
+        return state
+
+    def remove(self, namespace, name, state=None):
+        """删除Pod的记录；指定state时只有当前记录仍是该state才删除"""
+        with self.lock:
+            if state is not None and self.pods.get((namespace, name)) is not state:
+                return None
+            return self._remove((namespace, name))
+
+    def get(self, namespace, name):
+        with self.lock:
+            return self.pods.get((namespace, name))
+
+    def get_by_container(self, container_id):
+        with self.lock:
+            return self.containers.get(container_id)
+
+    def snapshot(self):
+        """当前全部PodState的列表副本"""
+        with self.lock:
+            return list(self.pods.values())
+
+    def mark_dirty(self, state):
+        with self.lock:
+            if self.pods.get(state.key) is state:
+                self.dirty.add(state.key)
+
+    def schedule_retry(self, state, retry_at):
+        """退避时间到期后再次同步该Pod"""
+        with self.lock:
+            heapq.heappush(self.retries, (retry_at, next(self.seq), state))
+
+    def take_dirty(self, now):
+        """取出并清空需要同步的Pod，包括退避时间已到期的Pod"""
+        with self.lock:
+            while self.retries and self.retries[0][0] <= now:
+                _, _, state = heapq.heappop(self.retries)
+                if self.pods.get(state.key) is state:
+                    self.dirty.add(state.key)
+            keys, self.dirty = self.dirty, set()
+            return [self.pods[key] for key in keys if key in self.pods]
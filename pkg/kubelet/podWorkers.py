@@ -0,0 +1,56 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+
+class PodWorkers:
+    """
+    每个Pod一个串行的工作队列，所有队列共享一个有上限的线程池
+    - 同一个Pod的操作（创建、更新、删除、重启）按提交顺序依次执行
+    - 不同Pod的操作并行执行，慢的docker操作不会阻塞kubelet主循环
+    - done在fn执行结束后调用（无论是否成功），用于确认对应的Kafka消息已处理
+    """
+
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pod-worker")
+        self.lock = Lock()
+        # pod_key -> deque[(fn, args, done)]，只包含正在执行或等待执行的Pod
+        self.queues = {}
+
+    def dispatch(self, pod_key, fn, *args, done=None):
+        """把fn(*args)追加到pod_key的队列，该Pod没有正在执行的任务时提交到线程池"""
+        with self.lock:
+            work = self.queues.get(pod_key)
+            if work is not None:
+                work.append((fn, args, done))
+                return
+            self.queues[pod_key] = deque([(fn, args, done)])
+        self.executor.submit(self._run, pod_key)
+
+    def _run(self, pod_key):
+        while True:
+            with self.lock:
+                work = self.queues[pod_key]
+                if not work:
+                    del self.queues[pod_key]
+                    return
+                fn, args, done = work.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[ERROR]Pod worker {pod_key} failed: {e}")
+            finally:
+                if done is not None:
+                    done()
+
+    def busy(self, pod_key):
+        with self.lock:
+            return pod_key in self.queues
+
+    def pending(self):
+        """有正在执行或等待执行任务的pod_key"""
+        with self.lock:
+            return set(self.queues)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,133 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Lock
+
+
+class ProbeManager:
+    """
+    执行容器的livenessProbe和readinessProbe
+    - 所有探针运行在同一个后台线程的asyncio事件循环中，每个探针是一个协程，不为每个容器占用线程
+    - httpGet和tcpSocket探针直接用asyncio的连接完成；exec探针需要调用docker，放到一个小线程池中执行
+    - 探针结果按successThreshold/failureThreshold去抖，只有结果变化时才回调kubelet
+      on_readiness(pod, container_name, ready)；on_liveness_failure(pod, container)
+    """
+
+    def __init__(self, runtime, on_readiness, on_liveness_failure, exec_workers=4):
+        self.runtime = runtime
+        self.on_readiness = on_readiness
+        self.on_liveness_failure = on_liveness_failure
+        self.executor = ThreadPoolExecutor(max_workers=exec_workers, thread_name_prefix="probe-exec")
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.lock = Lock()
+        # (namespace, name) -> [concurrent.futures.Future]
+        self.tasks = {}
+
+    def start(self):
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def add_pod(self, pod):
+        """为Pod中配置了探针的容器启动探针，同名Pod原有的探针会被取消"""
+        key = (pod.config.namespace, pod.config.name)
+        containers = {container.name: container for container in pod.containers}
+        futures = []
+        for container_config in pod.config.containers:
+            container = containers.get(container_config.name)
+            if container is None:
+                continue
+            for kind, probe in (("liveness", container_config.liveness_probe),
+                                ("readiness", container_config.readiness_probe)):
+                if probe is not None:
+                    futures.append(asyncio.run_coroutine_threadsafe(
+                        self._probe_loop(pod, container, kind, probe), self.loop
+                    ))
+        with self.lock:
+            previous = self.tasks.pop(key, [])
+            if futures:
+                self.tasks[key] = futures
+        for future in previous:
+            future.cancel()
+
+    def remove_pod(self, namespace, name):
+        with self.lock:
+            futures = self.tasks.pop((namespace, name), [])
+        for future in futures:
+            future.cancel()
+
+    async def _probe_loop(self, pod, container, kind, probe):
+        await asyncio.sleep(probe.initial_delay)
+        # readiness在第一次成功前为未就绪，liveness在失败前视为存活
+        result = kind == "liveness"
+        successes, failures = 0, 0
+        while True:
+            state, _ = pod.container_states.get(container.id, (None, 0))
+            if state != "running":
+                # 未运行的容器不就绪；其重启由CrashLoopBackOff处理，不计入liveness失败
+                if kind == "readiness":
+                    successes, failures = 0, failures + 1
+                else:
+                    successes = 0
+            elif await self._probe(pod, container, probe):
+                successes, failures = successes + 1, 0
+            else:
+                successes, failures = 0, failures + 1
+
+            if not result and successes >= probe.success_threshold:
+                result = True
+                if kind == "readiness":
+                    self.on_readiness(pod, container.name, True)
+            elif result and failures >= probe.failure_threshold:
+                result = False
+                if kind == "readiness":
+                    self.on_readiness(pod, container.name, False)
+                else:
+                    print(f"[WARNING]Container {container.name} failed liveness probe, restart it")
+                    self.on_liveness_failure(pod, container)
+                    # 重启后的容器重新经过initialDelaySeconds再开始检查
+                    result, failures = True, 0
+                    await asyncio.sleep(probe.initial_delay)
+            await asyncio.sleep(probe.period)
+
+    async def _probe(self, pod, container, probe):
+        try:
+            if probe.exec_command:
+                exit_code = await asyncio.wait_for(
+                    self.loop.run_in_executor(
+                        self.executor, self.runtime.exec_command, container.id, probe.exec_command
+                    ),
+                    probe.timeout,
+                )
+                return exit_code == 0
+            if probe.http_get:
+                return await asyncio.wait_for(self._http_get(pod, probe.http_get), probe.timeout)
+            host = probe.tcp_socket.get("host") or pod.subnet_ip
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, int(probe.tcp_socket["port"])), probe.timeout
+            )
+            writer.close()
+            return True
+        except (OSError, asyncio.TimeoutError, ValueError):
+            return False
+        except Exception as e:
+            print(f"[WARNING]Probe of container {container.name} failed: {e}")
+            return False
+
+    @staticmethod
+    async def _http_get(pod, http_get):
+        """HTTP/1.0 GET，状态码在[200, 400)之间为成功"""
+        host = http_get.get("host") or pod.subnet_ip
+        reader, writer = await asyncio.open_connection(host, int(http_get["port"]))
+        try:
+            path = http_get.get("path", "/")
+            writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}\r\nUser-Agent: kube-probe\r\n\r\n".encode("utf-8"))
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        parts = status_line.decode("latin-1").split()
+        return len(parts) >= 2 and parts[1].isdigit() and 200 <= int(parts[1]) < 400
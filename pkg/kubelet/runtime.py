@@ -0,0 +1,573 @@
+import os
+import re
+import queue
+import shutil
+import itertools
+from abc import ABC, abstractmethod
+from threading import Lock
+from time import sleep, time
+
+from docker.errors import ImageNotFound
+
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.utils.dockerClient import docker_client
+
+
+def parse_exit_code(status):
+    """从docker ps的Status字段（如"Exited (137) 5 seconds ago"）解析退出码"""
+    match = re.match(r"Exited \((-?\d+)\)", status or "")
+    return int(match.group(1)) if match else 0
+
+
+def normalize_image(image):
+    """补全镜像的默认tag，busybox和busybox:latest视为同一个镜像"""
+    if "@" in image or ":" in image.rsplit("/", 1)[-1]:
+        return image
+    return f"{image}:latest"
+
+
+def read_net_dev(pid):
+    """从/proc/<pid>/net/dev读取容器网络命名空间中除lo以外的收发字节数"""
+    rx_bytes, tx_bytes = 0, 0
+    with open(f"/proc/{pid}/net/dev") as f:
+        for line in f.readlines()[2:]:
+            interface, data = line.split(":", 1)
+            if interface.strip() == "lo":
+                continue
+            fields = data.split()
+            rx_bytes += int(fields[0])
+            tx_bytes += int(fields[8])
+    return rx_bytes, tx_bytes
+
+
+class ContainerRuntime(ABC):
+    """
+    类似CRI的容器运行时接口，由kubelet持有并注入Pod和PLEG
+    返回的容器对象需要提供id、name、status、attrs属性（与docker.models.containers.Container一致）
+    """
+
+    @abstractmethod
+    def run_container(self, **kwargs):
+        """创建并启动容器，参数与docker的containers.run一致"""
+
+    @abstractmethod
+    def list_containers(self, name):
+        """按名称查找容器（包括已退出的）"""
+
+    @abstractmethod
+    def inspect(self, container_id):
+        """返回docker inspect的结果"""
+
+    @abstractmethod
+    def start(self, container_id):
+        pass
+
+    @abstractmethod
+    def stop(self, container_id):
+        pass
+
+    @abstractmethod
+    def kill(self, container_id):
+        pass
+
+    @abstractmethod
+    def restart(self, container_id):
+        pass
+
+    @abstractmethod
+    def remove(self, container_id, force=False):
+        pass
+
+    @abstractmethod
+    def rename(self, container_id, name):
+        pass
+
+    @abstractmethod
+    def exec_command(self, container_id, command):
+        """在容器中执行命令并等待结束，返回退出码"""
+
+    @abstractmethod
+    def events(self, filters):
+        """返回容器事件的迭代器，事件格式与docker events一致，迭代器需要支持close"""
+
+    @abstractmethod
+    def container_states(self):
+        """一次调用返回本机全部容器的{container_id: (state, exit_code)}"""
+
+    @abstractmethod
+    def list_labeled(self, label):
+        """一次调用返回带有label的全部容器：[{"id", "name", "state", "labels", "created"}]，created为unix时间戳"""
+
+    @abstractmethod
+    def container_stats(self, container_id):
+        """
+        容器资源使用的一次采样：{"timestamp", "cpu": 累计CPU时间（秒）, "memory": 字节, "rx_bytes", "tx_bytes"}
+        cpu是累计值，使用率由两次采样的差值计算
+        """
+
+    @abstractmethod
+    def image_id(self, image):
+        """返回本地镜像的ID，镜像不存在时返回None"""
+
+    @abstractmethod
+    def pull_image(self, image):
+        pass
+
+    @abstractmethod
+    def remove_image(self, image):
+        pass
+
+    @abstractmethod
+    def dangling_images(self):
+        """返回没有tag的镜像（如同名镜像重新拉取后留下的旧版本）的{镜像ID: 大小（字节）}"""
+
+    @abstractmethod
+    def list_images(self):
+        """返回本地镜像的{镜像名:tag: 大小（字节）}"""
+
+    @abstractmethod
+    def image_fs_usage(self):
+        """返回存放镜像的文件系统的(已用字节, 总字节)"""
+
+    @abstractmethod
+    def prune_networks(self):
+        """删除kubelet创建的、当前没有使用的网络"""
+
+    def ensure_network(self, name):
+        """确保Pod使用的网络存在"""
+        pass
+
+    def housekeeping(self, now=None):
+        """由kubelet主循环周期性调用，执行低频的全局维护操作"""
+        pass
+
+
+class DockerRuntime(ContainerRuntime):
+    """
+    基于docker-py的运行时：整个kubelet共享一个带连接池的DockerClient
+    - 清理网络只在housekeeping中每NETWORK_PRUNE_INTERVAL秒执行一次，不再在每个Pod创建时执行
+    - 网络只在第一次使用时检查/创建，创建的网络带有NETWORK_LABEL；清理时只删除带该label、且不在缓存中的网络
+    """
+
+    # docker自带的网络，不需要创建
+    BUILTIN_NETWORKS = {None, "bridge", "host", "none"}
+    # 容器的cgroup目录：cgroup v2的systemd驱动和cgroupfs驱动，以及cgroup v1
+    CGROUP_V2_DIRS = ("/sys/fs/cgroup/system.slice/docker-{id}.scope", "/sys/fs/cgroup/docker/{id}")
+    CGROUP_V1_CPU = "/sys/fs/cgroup/cpuacct/docker/{id}/cpuacct.usage"
+    CGROUP_V1_MEMORY = "/sys/fs/cgroup/memory/docker/{id}/memory.usage_in_bytes"
+
+    def __init__(self, client=None, max_pool_size=10):
+        self.client = client or docker_client(max_pool_size=max_pool_size)
+        self.networks = set()
+        self.network_lock = Lock()
+        self.last_prune = time()
+        # container_id -> (cgroup读取函数, 容器进程pid)，cgroup不可读（如docker desktop）时为(None, None)
+        self.stats_sources = {}
+        # docker的数据目录，不在本机（如docker desktop的虚拟机）时为None
+        self.root_dir = False
+
+    def run_container(self, **kwargs):
+        return self.client.containers.run(**kwargs)
+
+    def list_containers(self, name):
+        return self.client.containers.list(all=True, filters={"name": name})
+
+    def inspect(self, container_id):
+        return self.client.api.inspect_container(container_id)
+
+    def start(self, container_id):
+        self.client.api.start(container_id)
+
+    def stop(self, container_id):
+        self.client.api.stop(container_id)
+
+    def kill(self, container_id):
+        self.client.api.kill(container_id)
+
+    def restart(self, container_id):
+        self.client.api.restart(container_id)
+
+    def remove(self, container_id, force=False):
+        self.client.api.remove_container(container_id, force=force)
+        self.stats_sources.pop(container_id, None)
+
+    def rename(self, container_id, name):
+        self.client.api.rename(container_id, name)
+
+    def exec_command(self, container_id, command):
+        exec_id = self.client.api.exec_create(container_id, command)["Id"]
+        self.client.api.exec_start(exec_id)
+        return self.client.api.exec_inspect(exec_id)["ExitCode"]
+
+    def events(self, filters):
+        return self.client.events(decode=True, filters=filters)
+
+    def container_states(self):
+        return {
+            container["Id"]: (container.get("State"), parse_exit_code(container.get("Status")))
+            for container in self.client.api.containers(all=True)
+        }
+
+    def container_stats(self, container_id):
+        """
+        优先直接读取cgroup和/proc文件，每次采样只是几次文件读取；
+        读不到时回退到docker stats API（one_shot，不等待第二次采样）
+        """
+        source = self.stats_sources.get(container_id)
+        if source is None:
+            source = self._stats_source(container_id)
+            self.stats_sources[container_id] = source
+        read_cgroup, pid = source
+        if read_cgroup is not None:
+            try:
+                cpu, memory = read_cgroup()
+                rx_bytes, tx_bytes = read_net_dev(pid) if pid else (0, 0)
+                return {"timestamp": time(), "cpu": cpu, "memory": memory, "rx_bytes": rx_bytes, "tx_bytes": tx_bytes}
+            except (OSError, ValueError):
+                # 容器重启后pid变化，下次重新查找
+                self.stats_sources.pop(container_id, None)
+        return self._api_stats(container_id)
+
+    def _stats_source(self, container_id):
+        for directory in self.CGROUP_V2_DIRS:
+            directory = directory.format(id=container_id)
+            if os.path.exists(os.path.join(directory, "cpu.stat")):
+                read_cgroup = lambda d=directory: self._read_cgroup_v2(d)
+                break
+        else:
+            cpu_path = self.CGROUP_V1_CPU.format(id=container_id)
+            memory_path = self.CGROUP_V1_MEMORY.format(id=container_id)
+            if not os.path.exists(cpu_path):
+                return None, None
+            read_cgroup = lambda: self._read_cgroup_v1(cpu_path, memory_path)
+        pid = self.inspect(container_id).get("State", {}).get("Pid")
+        return read_cgroup, pid
+
+    @staticmethod
+    def _read_cgroup_v2(directory):
+        with open(os.path.join(directory, "cpu.stat")) as f:
+            usage_usec = next(int(line.split()[1]) for line in f if line.startswith("usage_usec"))
+        with open(os.path.join(directory, "memory.current")) as f:
+            memory = int(f.read())
+        return usage_usec / 1e6, memory
+
+    @staticmethod
+    def _read_cgroup_v1(cpu_path, memory_path):
+        with open(cpu_path) as f:
+            usage_ns = int(f.read())
+        with open(memory_path) as f:
+            memory = int(f.read())
+        return usage_ns / 1e9, memory
+
+    def _api_stats(self, container_id):
+        stats = self.client.api.stats(container_id, stream=False, one_shot=True)
+        networks = (stats.get("networks") or {}).values()
+        return {
+            "timestamp": time(),
+            "cpu": stats.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage", 0) / 1e9,
+            "memory": stats.get("memory_stats", {}).get("usage", 0),
+            "rx_bytes": sum(network.get("rx_bytes", 0) for network in networks),
+            "tx_bytes": sum(network.get("tx_bytes", 0) for network in networks),
+        }
+
+    def image_id(self, image):
+        try:
+            return self.client.api.inspect_image(image)["Id"]
+        except ImageNotFound:
+            return None
+
+    def pull_image(self, image):
+        self.client.images.pull(image)
+
+    def remove_image(self, image):
+        self.client.api.remove_image(image)
+
+    def list_images(self):
+        return {
+            tag: image.get("Size", 0)
+            for image in self.client.api.images()
+            for tag in image.get("RepoTags") or []
+            if tag != "<none>:<none>"
+        }
+
+    def image_fs_usage(self):
+        """docker数据目录所在磁盘的使用量；数据目录不在本机时以全部镜像大小和IMAGE_FS_CAPACITY估算"""
+        if self.root_dir is False:
+            root_dir = self.client.info().get("DockerRootDir")
+            self.root_dir = root_dir if root_dir and os.path.exists(root_dir) else None
+        if self.root_dir is not None:
+            usage = shutil.disk_usage(self.root_dir)
+            return usage.used, usage.total
+        return sum(self.list_images().values()), KubeletConfig.IMAGE_FS_CAPACITY
+
+    def list_labeled(self, label):
+        return [
+            {
+                "id": container["Id"],
+                "name": (container.get("Names") or ["/"])[0].lstrip("/"),
+                "state": container.get("State"),
+                "labels": container.get("Labels") or {},
+                "created": container.get("Created", 0),
+            }
+            for container in self.client.api.containers(all=True, filters={"label": label})
+        ]
+
+    def dangling_images(self):
+        return {image["Id"]: image.get("Size", 0) for image in self.client.api.images(filters={"dangling": True})}
+
+    def ensure_network(self, name):
+        if name in self.BUILTIN_NETWORKS or name in self.networks:
+            return
+        with self.network_lock:
+            if name in self.networks:
+                return
+            if not self.client.networks.list(names=[name]):
+                self.client.networks.create(name, driver="bridge", labels={KubeletConfig.NETWORK_LABEL: "true"})
+                print(f"[INFO]Create docker network {name}")
+            self.networks.add(name)
+
+    def prune_networks(self):
+        # 与ensure_network互斥：已经确认过、可能正要用来创建容器的网络在缓存中，不会被删除
+        # 不使用networks.prune，它会删除主机上其他程序创建的、暂时没有容器的网络
+        with self.network_lock:
+            for network in self.client.networks.list(filters={"label": KubeletConfig.NETWORK_LABEL}):
+                if network.name in self.networks:
+                    continue
+                try:
+                    network.remove()
+                    print(f"[INFO]Remove docker network {network.name}")
+                except Exception as e:
+                    # 还有容器连接的网络删除失败，留到下次
+                    print(f"[INFO]Keep docker network {network.name}: {e}")
+
+    def housekeeping(self, now=None):
+        now = now or time()
+        if now - self.last_prune < KubeletConfig.NETWORK_PRUNE_INTERVAL:
+            return
+        self.last_prune = now
+        try:
+            self.prune_networks()
+        except Exception as e:
+            print(f"[WARNING]Prune docker networks failed: {e}")
+
+
+class FakeContainer:
+    """FakeRuntime中的容器，属性与docker的Container一致"""
+
+    def __init__(self, container_id, name, labels):
+        self.id = container_id
+        self.name = name
+        self.labels = labels or {}
+        self.status = "created"
+        self.exit_code = 0
+        self.created = time()
+
+    @property
+    def attrs(self):
+        return {
+            "Id": self.id,
+            "Name": f"/{self.name}",
+            "State": {"Status": self.status, "ExitCode": self.exit_code},
+            "Config": {"Labels": self.labels},
+            "NetworkSettings": {"IPAddress": f"10.0.{int(self.id[-4:], 16) % 256}.{int(self.id[-2:], 16)}", "Networks": {}},
+        }
+
+    def reload(self):
+        pass
+
+
+class FakeEventStream:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        while not self.closed:
+            try:
+                yield self.events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRuntime(ContainerRuntime):
+    """
+    内存中的运行时，用于在没有docker的环境下测试kubelet和做基准测试
+    op_latency为每次运行时调用的耗时，prune_latency为一次networks.prune的耗时
+    """
+
+    def __init__(self, op_latency=0.0, prune_latency=0.0, pull_latency=0.0, image_size=100 * 1024 * 1024,
+                 image_fs_capacity=10 * 1024 * 1024 * 1024):
+        self.op_latency = op_latency
+        self.prune_latency = prune_latency
+        self.pull_latency = pull_latency
+        self.image_size = image_size
+        self.image_fs_capacity = image_fs_capacity
+        # 镜像名:tag -> 大小
+        self.images = {}
+        # 镜像名:tag -> 镜像ID，重新拉取时生成新的ID，旧ID进入dangling
+        self.image_ids = {}
+        # 没有tag的镜像ID -> 大小
+        self.dangling = {}
+        self.pulls = 0
+        self.lock = Lock()
+        self.containers = {}
+        self.ids = itertools.count(1)
+        self.calls = 0
+        self.subscribers = []
+        # container_id -> exec_command的退出码，用于模拟exec探针失败
+        self.exec_codes = {}
+        # container_id -> (CPU核数, 内存字节)，用于模拟容器负载
+        self.loads = {}
+        self.started = time()
+
+    def _call(self, latency=None):
+        with self.lock:
+            self.calls += 1
+        sleep(self.op_latency if latency is None else latency)
+
+    def _emit(self, container, action):
+        event = {
+            "Type": "container",
+            "Action": action,
+            "Actor": {
+                "ID": container.id,
+                "Attributes": {**container.labels, "name": container.name, "exitCode": str(container.exit_code)},
+            },
+        }
+        for events in self.subscribers:
+            events.put(event)
+
+    def _get(self, container_id):
+        container = self.containers.get(container_id)
+        if container is None:
+            raise KeyError(f"No such container: {container_id}")
+        return container
+
+    def run_container(self, **kwargs):
+        self._call()
+        image = normalize_image(kwargs.get("image") or "")
+        if image not in self.images:
+            # 与docker一样，本地没有镜像时在创建容器的关键路径上拉取
+            self.pull_image(image)
+        with self.lock:
+            if any(c.name == kwargs.get("name") for c in self.containers.values()):
+                raise ValueError(f"Conflict. The container name {kwargs.get('name')} is already in use")
+            container = FakeContainer(f"{next(self.ids):064x}", kwargs.get("name"), kwargs.get("labels"))
+            self.containers[container.id] = container
+        self._emit(container, "create")
+        container.status = "running"
+        self._emit(container, "start")
+        return container
+
+    def list_containers(self, name):
+        self._call()
+        return [c for c in list(self.containers.values()) if name in c.name]
+
+    def inspect(self, container_id):
+        self._call()
+        return self._get(container_id).attrs
+
+    def start(self, container_id):
+        self._call()
+        container = self._get(container_id)
+        container.status, container.exit_code = "running", 0
+        self._emit(container, "start")
+
+    def stop(self, container_id):
+        self.exit(container_id, 0)
+
+    def kill(self, container_id):
+        self.exit(container_id, 137)
+
+    def exit(self, container_id, exit_code):
+        """模拟容器退出，也可以由测试直接调用来模拟崩溃"""
+        self._call()
+        container = self._get(container_id)
+        container.status, container.exit_code = "exited", exit_code
+        self._emit(container, "die")
+
+    def restart(self, container_id):
+        self.start(container_id)
+
+    def remove(self, container_id, force=False):
+        self._call()
+        with self.lock:
+            container = self.containers.pop(container_id)
+        container.status = "removed"
+        self._emit(container, "destroy")
+
+    def rename(self, container_id, name):
+        self._call()
+        with self.lock:
+            if any(c.name == name for c in self.containers.values()):
+                raise ValueError(f"Conflict. The container name {name} is already in use")
+            self._get(container_id).name = name
+
+    def exec_command(self, container_id, command):
+        self._call()
+        self._get(container_id)
+        return self.exec_codes.get(container_id, 0)
+
+    def events(self, filters):
+        events = queue.Queue()
+        self.subscribers.append(events)
+        return FakeEventStream(events)
+
+    def container_states(self):
+        self._call()
+        return {c.id: (c.status, c.exit_code) for c in list(self.containers.values())}
+
+    def container_stats(self, container_id):
+        self._get(container_id)
+        now = time()
+        cores, memory = self.loads.get(container_id, (0.0, 0))
+        return {"timestamp": now, "cpu": cores * (now - self.started), "memory": memory, "rx_bytes": 0, "tx_bytes": 0}
+
+    def list_labeled(self, label):
+        self._call()
+        return [
+            {"id": c.id, "name": c.name, "state": c.status, "labels": dict(c.labels), "created": c.created}
+            for c in list(self.containers.values())
+            if label in c.labels
+        ]
+
+    def dangling_images(self):
+        self._call()
+        return dict(self.dangling)
+
+    def image_id(self, image):
+        self._call()
+        return self.image_ids.get(normalize_image(image))
+
+    def pull_image(self, image):
+        self._call(self.pull_latency)
+        image = normalize_image(image)
+        with self.lock:
+            self.pulls += 1
+            if image in self.image_ids:
+                self.dangling[self.image_ids[image]] = self.images[image]
+            self.images[image] = self.image_size
+            self.image_ids[image] = f"sha256:{next(self.ids):064x}"
+
+    def remove_image(self, image):
+        self._call()
+        with self.lock:
+            if image in self.dangling:
+                del self.dangling[image]
+                return
+            image = normalize_image(image)
+            del self.images[image]
+            del self.image_ids[image]
+
+    def list_images(self):
+        self._call()
+        return dict(self.images)
+
+    def image_fs_usage(self):
+        return sum(self.images.values()) + sum(self.dangling.values()), self.image_fs_capacity
+
+    def prune_networks(self):
+        self._call(self.prune_latency)
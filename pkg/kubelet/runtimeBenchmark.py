@@ -0,0 +1,109 @@
+"""
+Pod创建延迟基准测试：对比每个Pod各建一个docker客户端并执行networks.prune（旧实现）
+与kubelet共享一个运行时（新实现），以及串行创建与pod worker并行创建的差异
+- --runtime fake：使用FakeRuntime，op_latency/prune_latency模拟docker调用耗时，不需要docker
+- --runtime docker：在本机docker上真实创建busybox容器，结束后删除
+"""
+
+import io
+import argparse
+import contextlib
+from time import perf_counter
+
+from pkg.apiObject.pod import Pod
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.config.podConfig import PodConfig
+from pkg.config.uriConfig import URIConfig
+from pkg.kubelet.podWorkers import PodWorkers
+from pkg.kubelet.runtime import DockerRuntime, FakeRuntime
+
+
+def make_pod_config(index, prefix):
+    return PodConfig(
+        {
+            "metadata": {"name": f"{prefix}-{index}", "namespace": "bench"},
+            "spec": {
+                "containers": [
+                    {"name": f"{prefix}-{index}-c", "image": "busybox", "command": ["sleep", "3600"]}
+                ]
+            },
+        }
+    )
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RuntimeBenchmark:
+    def __init__(self, runtime_factory, pods, workers):
+        self.runtime_factory = runtime_factory
+        self.pods = pods
+        self.workers = workers
+
+    def _create(self, config, runtime, legacy, latencies, created):
+        start = perf_counter()
+        if legacy:
+            # 旧实现：每个Pod新建客户端，并在创建前执行一次全局的networks.prune
+            runtime = self.runtime_factory()
+            runtime.prune_networks()
+        pod = Pod(config, None, URIConfig, runtime)
+        latencies.append(perf_counter() - start)
+        created.append(pod)
+
+    def run(self, legacy, parallel):
+        shared = self.runtime_factory()
+        latencies, created = [], []
+        configs = [make_pod_config(i, f"bench-{'legacy' if legacy else 'shared'}-{'par' if parallel else 'seq'}") for i in range(self.pods)]
+        start = perf_counter()
+        if parallel:
+            workers = PodWorkers(self.workers)
+            for config in configs:
+                workers.dispatch(config.name, self._create, config, shared, legacy, latencies, created)
+            workers.shutdown()
+        else:
+            for config in configs:
+                self._create(config, shared, legacy, latencies, created)
+        elapsed = perf_counter() - start
+        for pod in created:
+            try:
+                pod.remove()
+            except Exception as e:
+                print(f"[WARNING]Remove benchmark pod failed: {e}")
+        latencies.sort()
+        return {
+            "mode": f"{'per-pod client+prune' if legacy else 'shared runtime'}/{'workers' if parallel else 'serial'}",
+            "pods": len(latencies),
+            "total_s": elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure pod creation latency with per-pod vs shared container runtime.")
+    parser.add_argument("--runtime", choices=["fake", "docker"], default="fake")
+    parser.add_argument("--pods", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=KubeletConfig.POD_WORKERS)
+    parser.add_argument("--op-latency", type=float, default=0.005, help="Fake runtime latency per call (s)")
+    parser.add_argument("--prune-latency", type=float, default=0.05, help="Fake runtime latency of networks.prune (s)")
+    args = parser.parse_args()
+
+    if args.runtime == "fake":
+        fake = FakeRuntime(args.op_latency, args.prune_latency)
+        factory = lambda: fake
+    else:
+        factory = lambda: DockerRuntime(max_pool_size=args.workers + 2)
+
+    benchmark = RuntimeBenchmark(factory, args.pods, args.workers)
+    for legacy, parallel in [(True, False), (False, False), (False, True)]:
+        # Pod创建的日志输出会干扰计时，屏蔽掉
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = benchmark.run(legacy, parallel)
+        print(
+            f"[{result['mode']}] pods={result['pods']} total={result['total_s']:.2f}s "
+            f"latency p50={result['p50_ms']:.1f}ms p99={result['p99_ms']:.1f}ms"
+        )
@@ -0,0 +1,105 @@
+import uuid
+from collections import defaultdict, deque
+from threading import Thread, Lock, Event
+
+from pkg.config.kubeletConfig import KubeletConfig
+
+
+class SandboxPool:
+    """
+    预先创建的pause（sandbox）容器池，每个CNI网络保留size个已经启动并分配好IP的pause容器
+    - Pod创建时用claim取出一个并改名为该Pod的pause容器名，创建sandbox和等待docker网络不再在Pod启动的关键路径上
+    - 被取走后由后台线程补充；池为空时返回None，由Pod按原来的方式创建
+    - 池中的容器带有SANDBOX_POOL_LABEL，kubelet重启后接管仍在运行的，其余删除
+    """
+
+    # 没有指定CNI网络的Pod使用docker默认的bridge网络
+    DEFAULT_NETWORK = "bridge"
+
+    def __init__(self, runtime, dns, size):
+        self.runtime = runtime
+        self.dns = dns
+        self.size = size
+        self.lock = Lock()
+        # network -> deque(container)
+        self.pools = defaultdict(deque)
+        self.wakeup = Event()
+        self.thread = None
+
+    def start(self, networks):
+        if self.size <= 0:
+            return
+        self._adopt()
+        with self.lock:
+            for network in networks:
+                self.pools[network or self.DEFAULT_NETWORK]
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.wakeup.set()
+
+    def _adopt(self):
+        for container in self.runtime.list_containers(KubeletConfig.SANDBOX_POOL_PREFIX):
+            network = container.labels.get(KubeletConfig.SANDBOX_POOL_LABEL)
+            if container.status == "running" and network is not None:
+                self.pools[network].append(container)
+                continue
+            try:
+                self.runtime.remove(container.id, force=True)
+            except Exception as e:
+                print(f"[WARNING]Remove stale sandbox {container.name} failed: {e}")
+
+    def claim(self, network, name):
+        """取出network的一个空闲sandbox并改名为name，没有可用的sandbox时返回None"""
+        if self.size <= 0:
+            return None
+        network = network or self.DEFAULT_NETWORK
+        while True:
+            with self.lock:
+                pool = self.pools[network]
+                container = pool.popleft() if pool else None
+            self.wakeup.set()
+            if container is None:
+                return None
+            try:
+                # 池中的容器可能已经退出（如pause进程到期），丢弃后继续取下一个
+                if self.runtime.inspect(container.id).get("State", {}).get("Status") != "running":
+                    self.runtime.remove(container.id, force=True)
+                    continue
+                self.runtime.rename(container.id, name)
+                container.reload()
+                return container
+            except Exception as e:
+                print(f"[WARNING]Claim sandbox {container.name} failed: {e}")
+
+    def _create(self, network):
+        self.runtime.ensure_network(network)
+        return self.runtime.run_container(
+            image=KubeletConfig.PAUSE_IMAGE,
+            name=f"{KubeletConfig.SANDBOX_POOL_PREFIX}{network}_{uuid.uuid4().hex[:8]}",
+            detach=True,
+            command=KubeletConfig.PAUSE_COMMAND,
+            network=network,
+            dns=[self.dns],
+            # PLEG按POD_NAME_LABEL过滤事件，池中的容器被取走后需要继续产生事件
+            labels={
+                KubeletConfig.POD_NAMESPACE_LABEL: "",
+                KubeletConfig.POD_NAME_LABEL: "",
+                KubeletConfig.SANDBOX_POOL_LABEL: network,
+            },
+        )
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                missing = {network: self.size - len(pool) for network, pool in self.pools.items()}
+            for network, count in missing.items():
+                for _ in range(count):
+                    try:
+                        container = self._create(network)
+                    except Exception as e:
+                        print(f"[ERROR]Create sandbox in network {network} failed: {e}")
+                        break
+                    with self.lock:
+                        self.pools[network].append(container)
@@ -0,0 +1,106 @@
+import os
+import hashlib
+from time import time
+
+import yaml
+
+from pkg.config.podConfig import PodConfig
+
+
+class StaticPodSource:
+    """
+    本地manifest目录中的静态Pod：每个yaml文件描述一个Pod，kubelet启动时直接创建，不依赖apiServer
+    - Pod名加上"-{node_name}"后缀，与其他节点的同名静态Pod区分；mirror注解记录manifest内容的哈希
+    - 每check_interval秒扫描一次目录，按文件内容的哈希判断新增、修改和删除
+    - 解析失败的文件跳过，之前创建的Pod保持不变，直到文件被修复或删除
+    apiServer可达后，静态Pod作为mirror Pod上报，只用于展示和调度计算，不能通过apiServer修改或删除
+    """
+
+    def __init__(self, manifest_dir, node_name, check_interval):
+        self.manifest_dir = manifest_dir
+        self.node_name = node_name
+        self.check_interval = check_interval
+        self.last_check = 0.0
+        # path -> (内容哈希, PodConfig)
+        self.manifests = {}
+        # 解析失败的文件 path -> 内容哈希，内容不变时不重复报警
+        self.invalid = {}
+
+    def check_due(self, now=None):
+        return (now or time()) - self.last_check >= self.check_interval
+
+    def pod_keys(self):
+        return {f"{config.namespace}/{config.name}" for _, config in self.manifests.values()}
+
+    def mirror_pods(self):
+        """上报给apiServer的mirror Pod：metadata和spec"""
+        return [config.to_dict() for _, config in self.manifests.values()]
+
+    def _load(self, content, digest):
+        data = yaml.safe_load(content)
+        if not isinstance(data, dict) or data.get("kind") != "Pod":
+            raise ValueError("manifest is not a Pod")
+        config = PodConfig(data)
+        config.name = f"{config.name}-{self.node_name}"
+        config.annotations = {
+            **config.annotations,
+            PodConfig.MIRROR_ANNOTATION: digest[:16],
+        }
+        config.node_name = self.node_name
+        return config
+
+    def scan(self):
+        """扫描manifest目录，返回(新增的PodConfig列表, 修改的PodConfig列表, 删除的pod_key列表)"""
+        self.last_check = time()
+        try:
+            names = sorted(os.listdir(self.manifest_dir))
+        except FileNotFoundError:
+            names = []
+        paths = {
+            os.path.join(self.manifest_dir, name)
+            for name in names
+            if name.endswith((".yaml", ".yml")) and not name.startswith(".")
+        }
+
+        added, updated, removed = [], [], []
+        for path in sorted(paths):
+            try:
+                with open(path, "rb") as file:
+                    content = file.read()
+            except OSError as e:
+                print(f"[WARNING]Read static pod manifest {path} failed: {e}")
+                continue
+            digest = hashlib.sha256(content).hexdigest()
+            previous = self.manifests.get(path)
+            if (previous is not None and previous[0] == digest) or self.invalid.get(path) == digest:
+                continue
+            try:
+                config = self._load(content, digest)
+            except Exception as e:
+                print(f"[WARNING]Invalid static pod manifest {path}: {e}")
+                self.invalid[path] = digest
+                continue
+            self.invalid.pop(path, None)
+            if any(
+                (other.namespace, other.name) == (config.namespace, config.name)
+                for other_path, (_, other) in self.manifests.items()
+                if other_path != path
+            ):
+                print(f"[WARNING]Static pod {config.namespace}/{config.name} in {path} is already defined, skip it")
+                continue
+            if previous is None:
+                added.append(config)
+            elif (previous[1].namespace, previous[1].name) != (config.namespace, config.name):
+                # 文件中的Pod改名：删除旧Pod，创建新Pod
+                removed.append(f"{previous[1].namespace}/{previous[1].name}")
+                added.append(config)
+            else:
+                updated.append(config)
+            self.manifests[path] = (digest, config)
+
+        for path in set(self.invalid) - paths:
+            del self.invalid[path]
+        for path in set(self.manifests) - paths:
+            _, config = self.manifests.pop(path)
+            removed.append(f"{config.namespace}/{config.name}")
+        return added, updated, removed
@@ -0,0 +1,87 @@
+from threading import Thread, Lock
+from time import sleep
+
+
+class StatusManager:
+    """
+    合并并批量上报Pod状态：状态和子网IP的变化先写入dirty表，同一个Pod的多次变化只保留最新值
+    后台线程每隔flush_interval秒通过批量接口一次性上报，apiServer在一个etcd事务中写入
+    上报失败时把这批变化放回dirty表（不覆盖期间产生的更新），下一轮重试
+    静态Pod的列表变化后先同步mirror Pod，同步成功之前不上报状态，避免mirror Pod还不存在时状态被apiServer跳过
+    """
+
+    def __init__(self, api_client, uri_config, node_name, flush_interval):
+        self.api_client = api_client
+        self.uri = uri_config.NODE_PODS_STATUS_URL.format(name=node_name)
+        self.mirror_uri = uri_config.NODE_MIRROR_PODS_URL.format(name=node_name)
+        self.flush_interval = flush_interval
+        self.lock = Lock()
+        # pod_key -> {"namespace", "name", "status", "subnet_ip", "ready"}
+        self.dirty = {}
+        # 等待同步的静态Pod列表，None表示已经同步
+        self.mirror_pods = None
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _update(self, namespace, name, **fields):
+        with self.lock:
+            entry = self.dirty.setdefault(f"{namespace}/{name}", {"namespace": namespace, "name": name})
+            entry.update(fields)
+
+    def set_status(self, namespace, name, status):
+        self._update(namespace, name, status=status)
+
+    def set_subnet_ip(self, namespace, name, subnet_ip):
+        self._update(namespace, name, subnet_ip=subnet_ip)
+
+    def set_ready(self, namespace, name, ready):
+        self._update(namespace, name, ready=ready)
+
+    def set_mirror_pods(self, pods):
+        with self.lock:
+            self.mirror_pods = pods
+
+    def _sync_mirror_pods(self):
+        with self.lock:
+            pods, self.mirror_pods = self.mirror_pods, None
+        if pods is None:
+            return True
+        if self.api_client.put(self.mirror_uri, {"pods": pods}) is None:
+            print(f"[WARNING]Sync {len(pods)} mirror pods failed, retry later.")
+            with self.lock:
+                if self.mirror_pods is None:
+                    self.mirror_pods = pods
+            return False
+        return True
+
+    def forget(self, namespace, name):
+        """Pod被删除后丢弃尚未上报的变化"""
+        with self.lock:
+            self.dirty.pop(f"{namespace}/{name}", None)
+
+    def flush(self):
+        if not self._sync_mirror_pods():
+            return 0
+        with self.lock:
+            batch, self.dirty = self.dirty, {}
+        if not batch:
+            return 0
+        response = self.api_client.put(self.uri, {"pods": list(batch.values())})
+        if response is None:
+            print(f"[WARNING]Report status of {len(batch)} pods failed, retry later.")
+            with self.lock:
+                for pod_key, entry in batch.items():
+                    self.dirty[pod_key] = {**entry, **self.dirty.get(pod_key, {})}
+            return 0
+        return len(batch)
+
+    def _run(self):
+        while True:
+            sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR]Status manager flush failed: {e}")
@@ -7,10 +7,11 @@ import sys
 import random
 import string
 from typing import List, Optional, Dict, Set
-from confluent_kafka import Consumer, KafkaError
 from threading import Thread
 from time import sleep
 
+from pkg.utils.messageBus import message_bus, require_broker
+
 
 class KubeProxy:
     """Service代理类，负责管理iptables规则和NAT转换"""
@@ -57,15 +58,9 @@ class KubeProxy:
         """初始化Kafka消费者"""
         try:
             topic = self.kafka_config.SERVICE_PROXY_TOPIC.format(name=self.node_name)
-            consumer_config = {
-                'bootstrap.servers': self.kafka_config.BOOTSTRAP_SERVER,
-                'group.id': f'kubeproxy-{self.node_name}',
-                'auto.offset.reset': 'latest',
-                'enable.auto.commit': False,
-            }
-            
-            self.consumer = Consumer(consumer_config)
-            self.consumer.subscribe([topic])
+            self.consumer = message_bus(self.kafka_config.BOOTSTRAP_SERVER).consumer(
+                [topic], f'kubeproxy-{self.node_name}'
+            )
             self.logger.info(f"KubeProxy已订阅Kafka主题: {topic}")
             
         except Exception as e:
@@ -98,7 +93,7 @@ class KubeProxy:
                     if not msg.error():
                         self._handle_service_update(msg)
                         self.consumer.commit(asynchronous=False)
-                    elif msg.error().code() != KafkaError._PARTITION_EOF:
+                    else:
                         self.logger.error(f"Kafka消费错误: {msg.error()}")
                 
                 sleep(0.1)  # 防止CPU占用过高
@@ -1070,4 +1065,5 @@ def main():
 
 
 if __name__ == "__main__":
+    require_broker("KubeProxy")
     main()
@@ -0,0 +1,122 @@
+"""
+单进程部署：ApiServer、Scheduler、Node（kubelet）和ReplicaSet控制器运行在同一个进程中，
+通过进程内消息总线通信，不需要Kafka broker；仍然需要etcd
+- --fake-runtime：kubelet使用内存中的FakeRuntime，不需要docker，用于基准测试
+- --nodes N：以--node-config为模板启动N个Node，名称、子网和kubelet指标端口依次编号
+各组件单独成进程时（scripts/start.sh）只能使用Kafka后端，见messageBus.require_broker
+"""
+
+import copy
+import argparse
+import ipaddress
+from threading import Thread
+from time import sleep, time
+
+import requests
+import yaml
+
+from pkg.config.kafkaConfig import KafkaConfig
+from pkg.config.uriConfig import URIConfig
+from pkg.config.etcdConfig import EtcdConfig
+from pkg.config.serverlessConfig import ServerlessConfig
+from pkg.config.nodeConfig import NodeConfig
+from pkg.config.kubeletConfig import KubeletConfig
+from pkg.apiServer.apiServer import ApiServer
+from pkg.apiObject.node import Node
+from pkg.controller.scheduler import Scheduler, TopologySpreadSelect
+from pkg.controller.replicaSetController import ReplicaSetController
+from pkg.kubelet.runtime import FakeRuntime
+
+DEFAULT_NODE_CONFIG = "./testFile/node-1.yaml"
+
+
+def node_configs(path, count):
+    """以path中的Node为模板生成count个NodeConfig，只有一个时保持模板不变"""
+    with open(path, "r", encoding="utf-8") as file:
+        template = yaml.safe_load(file)
+    if count == 1:
+        return [NodeConfig(template)]
+    configs = []
+    network = ipaddress.ip_network(template["spec"]["podCIDR"])
+    for i in range(count):
+        data = copy.deepcopy(template)
+        name = f"{template['metadata']['name']}-{i + 1}"
+        data["metadata"]["name"] = name
+        data["metadata"].setdefault("labels", {})["kubernetes.io/hostname"] = name
+        data["spec"]["podCIDR"] = str(
+            ipaddress.ip_network(f"{network.network_address + i * network.num_addresses}/{network.prefixlen}")
+        )
+        status = data.setdefault("status", {})
+        status["daemonEndpoints"] = {"kubeletEndpoint": {"Port": KubeletConfig.STATS_PORT + i}}
+        configs.append(NodeConfig(data))
+    return configs
+
+
+class Cluster:
+    """单进程中运行的各个组件，由start创建"""
+
+    def __init__(self, api_server, scheduler, nodes, controllers):
+        self.api_server = api_server
+        self.scheduler = scheduler
+        self.nodes = nodes
+        self.controllers = controllers
+
+
+def _wait(ready, timeout, what):
+    deadline = time() + timeout
+    while not ready():
+        if time() > deadline:
+            raise TimeoutError(f"{what} is not ready after {timeout}s")
+        sleep(0.1)
+
+
+def _api_server_ready():
+    try:
+        return requests.get(URIConfig.PREFIX + "/", timeout=1).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def start(node_config=DEFAULT_NODE_CONFIG, nodes=1, fake_runtime=False, controllers=True, timeout=60):
+    """启动全部组件，所有Node的kubelet订阅了各自的主题后返回Cluster"""
+    # 进程内总线在第一次使用时创建，必须在任何组件创建之前切换
+    KafkaConfig.BUS_BACKEND = "inprocess"
+
+    api_server = ApiServer(URIConfig, EtcdConfig, KafkaConfig, ServerlessConfig)
+    Thread(target=api_server.run, daemon=True).start()
+    _wait(_api_server_ready, timeout, "ApiServer")
+
+    scheduler = Scheduler(URIConfig, TopologySpreadSelect())
+    Thread(target=scheduler.run, daemon=True).start()
+
+    node_list = []
+    for config in node_configs(node_config, nodes):
+        node = Node(config, URIConfig(), FakeRuntime() if fake_runtime else None)
+        Thread(target=node.run, daemon=True).start()
+        node_list.append(node)
+    _wait(
+        lambda: all(getattr(node, "kubelet", None) is not None and node.kubelet.consumer is not None for node in node_list),
+        timeout,
+        "Node",
+    )
+
+    controller_list = []
+    if controllers:
+        replica_set_controller = ReplicaSetController(URIConfig())
+        replica_set_controller.start()
+        controller_list.append(replica_set_controller)
+    print(f"[INFO]Standalone control plane started with {len(node_list)} nodes.")
+    return Cluster(api_server, scheduler, node_list, controller_list)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ApiServer, Scheduler, Nodes and controllers in one process.")
+    parser.add_argument("--node-config", type=str, default=DEFAULT_NODE_CONFIG, help="YAML config template of the nodes")
+    parser.add_argument("--nodes", type=int, default=1, help="Number of nodes")
+    parser.add_argument("--fake-runtime", action="store_true", help="Use the in-memory container runtime")
+    parser.add_argument("--no-controllers", action="store_true", help="Do not start the ReplicaSet controller")
+    args = parser.parse_args()
+
+    start(args.node_config, args.nodes, args.fake_runtime, not args.no_controllers)
+    while True:
+        sleep(3600)
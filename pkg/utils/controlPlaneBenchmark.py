@@ -0,0 +1,132 @@
+"""
+控制面端到端延迟基准测试：在pkg.standalone的单进程集群（进程内消息总线、FakeRuntime）中依次创建Pod，
+统计从POST到绑定Node（scheduled）、到kubelet上报RUNNING（running）的延迟分布和吞吐
+正式测量前先创建一个预热Pod并等待其RUNNING，排除scheduler订阅后的初始化等待和首次镜像拉取
+延迟包含HTTP、etcd、消息编码与投递、调度、kubelet分发和状态批量上报的全部开销；需要本地etcd
+"""
+
+import argparse
+from threading import Thread
+from time import perf_counter, sleep
+
+import requests
+
+from pkg import standalone
+from pkg.apiObject.pod import STATUS as POD_STATUS
+from pkg.config.uriConfig import URIConfig
+from pkg.controller.schedulerSimulator import percentile
+
+NAMESPACE = "default"
+
+
+def make_pod(name):
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": NAMESPACE, "labels": {"app": "cp-bench"}},
+        # FakeRuntime中容器名全局唯一
+        "spec": {"containers": [{"name": f"{name}-c", "image": "busybox:latest"}]},
+    }
+
+
+class Watcher:
+    """定期拉取全部Pod，记录每个Pod第一次被观察到绑定和RUNNING的时间"""
+
+    def __init__(self, names, interval):
+        self.names = set(names)
+        self.interval = interval
+        self.scheduled = {}
+        self.running = {}
+        self.done = False
+
+    def run(self):
+        url = URIConfig.PREFIX + URIConfig.GLOBAL_PODS_URL
+        while not self.done:
+            try:
+                entries = requests.get(url, timeout=5).json()
+            except (requests.RequestException, ValueError):
+                sleep(self.interval)
+                continue
+            now = perf_counter()
+            for entry in entries:
+                for name, pod in entry.items():
+                    if name not in self.names:
+                        continue
+                    if pod.get("node_name") not in (None, "None"):
+                        self.scheduled.setdefault(name, now)
+                    if pod.get("status") == POD_STATUS.RUNNING:
+                        self.running.setdefault(name, now)
+            self.done = len(self.running) == len(self.names)
+            sleep(self.interval)
+
+
+def _create(name):
+    url = URIConfig.PREFIX + URIConfig.POD_SPEC_URL.format(namespace=NAMESPACE, name=name)
+    response = requests.post(url, json=make_pod(name), timeout=5)
+    if response.status_code != 200:
+        print(f"[ERROR]Create pod {name} failed: {response.text}")
+
+
+def warm_up(interval, timeout):
+    watcher = Watcher(["cp-bench-warmup"], interval)
+    _create("cp-bench-warmup")
+    watcher_thread = Thread(target=watcher.run, daemon=True)
+    watcher_thread.start()
+    watcher_thread.join(timeout)
+    watcher.done = True
+    if not watcher.running:
+        raise TimeoutError(f"Warm-up pod is not running after {timeout}s")
+
+
+def run(pods, interval, timeout, rate):
+    warm_up(interval, timeout)
+    names = [f"cp-bench-{i}" for i in range(pods)]
+    watcher = Watcher(names, interval)
+    Thread(target=watcher.run, daemon=True).start()
+
+    submitted = {}
+    start = perf_counter()
+    for name in names:
+        submitted[name] = perf_counter()
+        _create(name)
+        if rate:
+            sleep(1 / rate)
+
+    deadline = perf_counter() + timeout
+    while not watcher.done and perf_counter() < deadline:
+        sleep(interval)
+    watcher.done = True
+    elapsed = perf_counter() - start
+
+    report = {"pods": pods, "elapsed": elapsed}
+    for phase, observed in (("scheduled", watcher.scheduled), ("running", watcher.running)):
+        latencies = sorted(observed[name] - submitted[name] for name in observed)
+        report[phase] = {
+            "count": len(latencies),
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+    report["throughput"] = len(watcher.running) / elapsed if elapsed else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure end-to-end control plane latency in a standalone cluster.")
+    parser.add_argument("--pods", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=0, help="Pods created per second, 0 for as fast as possible")
+    parser.add_argument("--interval", type=float, default=0.01, help="Pod status polling interval (seconds)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    standalone.start(nodes=args.nodes, fake_runtime=True, controllers=False)
+    report = run(args.pods, args.interval, args.timeout, args.rate)
+    for phase in ("scheduled", "running"):
+        stats = report[phase]
+        print(
+            f"[{phase}] {stats['count']}/{report['pods']} pods latency p50={stats['p50']:.1f}ms "
+            f"p90={stats['p90']:.1f}ms p99={stats['p99']:.1f}ms max={stats['max']:.1f}ms"
+        )
+    print(f"[total] elapsed={report['elapsed']:.2f}s throughput={report['throughput']:.1f} pods/s")
@@ -0,0 +1,17 @@
+import platform
+
+import docker
+
+
+def docker_client(timeout=5, max_pool_size=10):
+    """
+    根据操作系统（Windows 或类 Unix 系统）创建Docker客户端
+    客户端内部维护连接池，同一进程内应当共享一个客户端，max_pool_size决定可以并发的请求数
+    """
+    if platform.system() == "Windows":
+        return docker.DockerClient(
+            base_url="npipe:////./pipe/docker_engine", version="1.25", timeout=timeout, max_pool_size=max_pool_size
+        )
+    return docker.DockerClient(
+        base_url="unix://var/run/docker.sock", version="1.25", timeout=timeout, max_pool_size=max_pool_size
+    )
@@ -0,0 +1,556 @@
+import zlib
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from threading import Condition, Lock, Thread
+from time import time, perf_counter
+
+from pkg.config.kafkaConfig import KafkaConfig
+
+
+class MessageBus(ABC):
+    """
+    控制面组件之间的消息总线：ApiServer、ServiceController生产消息，Scheduler、Kubelet、KubeProxy消费
+    - KafkaBus：基于confluent_kafka，组件分布在多台机器上时使用
+    - InProcessBus：进程内实现，单机部署和基准测试不需要Kafka broker
+    消费到的消息与confluent_kafka.Message接口一致：topic()、partition()、offset()、key()、value()、error()
+    """
+
+    @abstractmethod
+    def produce(self, topic, value, key=None, confirm=False):
+        """
+        异步发送一条消息，有key时同一个key的消息总是进入同一个分区
+        confirm为True时返回一个Future，送达后结果为消息，失败时为异常；否则返回None
+        """
+
+    def produce_batch(self, topic, messages):
+        """发送[(key, value)]，默认逐条发送"""
+        for key, value in messages:
+            self.produce(topic, value, key=key)
+
+    def flush(self, timeout=None):
+        """等待已发送的消息送达，返回仍未送达的消息数"""
+        return 0
+
+    @abstractmethod
+    def metrics(self):
+        """生产者的投递统计，见DeliveryMetrics.snapshot"""
+
+    @abstractmethod
+    def consumer(self, topics, group, auto_offset_reset="latest", auto_commit=False, on_commit=None, config=None):
+        """
+        创建一个加入group的消费者，同一group中的消费者分摊topics的分区
+        config为后端相关的额外配置（如Kafka的client.id），其他后端忽略
+        """
+
+    @abstractmethod
+    def create_topics(self, topics):
+        """按{topic: 分区数}创建主题，已经存在的主题保持不变，返回新创建的主题列表"""
+
+    @abstractmethod
+    def create_partitions(self, topic, partitions):
+        """把主题的分区数扩大到partitions，已经不少于partitions时不变"""
+
+    @abstractmethod
+    def delete_topics(self, topics):
+        pass
+
+
+class BusConsumer(ABC):
+    @abstractmethod
+    def poll(self, timeout):
+        """返回一条消息，timeout秒内没有消息时返回None"""
+
+    @abstractmethod
+    def consume(self, num_messages, timeout):
+        """返回最多num_messages条消息的列表"""
+
+    @abstractmethod
+    def commit(self, offsets=None, asynchronous=True):
+        """提交{(topic, partition): 下一个offset}，offsets为None时提交当前消费位置"""
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class DeliveryMetrics:
+    """生产者的投递统计：发送、送达、失败的消息数，以及最近window条消息从produce到确认送达的延迟"""
+
+    def __init__(self, window):
+        self.lock = Lock()
+        self.produced = 0
+        self.delivered = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_produce(self, count=1):
+        with self.lock:
+            self.produced += count
+
+    def record_delivery(self, latency, failed=False):
+        with self.lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.delivered += 1
+                self.latencies.append(latency)
+
+    def snapshot(self, queue_depth):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            produced, delivered, failed = self.produced, self.delivered, self.failed
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else None
+
+        return {
+            "produced": produced,
+            "delivered": delivered,
+            "failed": failed,
+            # 已经produce但还没有确认送达的消息数
+            "queue_depth": queue_depth,
+            "latency_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "max": percentile(1.0)},
+        }
+
+
+class KafkaBus(MessageBus):
+    """
+    基于confluent_kafka的消息总线
+    - 生产者按linger.ms攒批发送，后台线程持续poll，及时触发投递回调并释放本地队列
+    - 每条消息都注册投递回调，失败时打印错误，并统计送达延迟
+    - 本地队列满时在produce中等待poll线程送出一部分，而不是直接抛出BufferError
+    - 生产者、poll线程和AdminClient在第一次使用时才创建，只消费消息的组件不会创建它们
+    """
+
+    # 主题已存在的错误码（TOPIC_ALREADY_EXISTS）
+    TOPIC_EXISTS = 36
+
+    def __init__(self, bootstrap_server):
+        self.bootstrap_server = bootstrap_server
+        self.lock = Lock()
+        self._producer = None
+        self._admin = None
+        self.delivery = DeliveryMetrics(KafkaConfig.DELIVERY_LATENCY_WINDOW)
+
+    @property
+    def producer(self):
+        if self._producer is not None:
+            return self._producer
+        with self.lock:
+            if self._producer is None:
+                # confluent_kafka只有Kafka后端需要
+                from confluent_kafka import Producer
+
+                self._producer = Producer(
+                    {
+                        "bootstrap.servers": self.bootstrap_server,
+                        "linger.ms": KafkaConfig.PRODUCER_LINGER_MS,
+                        "batch.num.messages": KafkaConfig.PRODUCER_BATCH_MESSAGES,
+                        "queue.buffering.max.messages": KafkaConfig.PRODUCER_QUEUE_MAX_MESSAGES,
+                    }
+                )
+                Thread(target=self._poll, daemon=True).start()
+            return self._producer
+
+    @property
+    def admin(self):
+        with self.lock:
+            if self._admin is None:
+                from confluent_kafka.admin import AdminClient
+
+                self._admin = AdminClient({"bootstrap.servers": self.bootstrap_server})
+            return self._admin
+
+    def _poll(self):
+        while True:
+            self._producer.poll(KafkaConfig.PRODUCER_POLL_INTERVAL)
+
+    def produce(self, topic, value, key=None, confirm=False):
+        future = Future() if confirm else None
+        start = perf_counter()
+
+        def on_delivery(err, msg):
+            self.delivery.record_delivery(perf_counter() - start, failed=err is not None)
+            if err is not None:
+                print(f"[ERROR]Deliver message to topic {topic} failed: {err}")
+            if future is not None:
+                if err is not None:
+                    from confluent_kafka import KafkaException
+
+                    future.set_exception(KafkaException(err))
+                else:
+                    future.set_result(msg)
+
+        while True:
+            try:
+                self.producer.produce(topic, key=key, value=value, on_delivery=on_delivery)
+                break
+            except BufferError:
+                # 本地队列已满，等待已发送的消息被确认
+                self.producer.poll(KafkaConfig.PRODUCER_POLL_INTERVAL)
+        self.delivery.record_produce()
+        return future
+
+    def flush(self, timeout=None):
+        if self._producer is None:
+            return 0
+        return self._producer.flush() if timeout is None else self._producer.flush(timeout)
+
+    def metrics(self):
+        return self.delivery.snapshot(len(self._producer) if self._producer is not None else 0)
+
+    def consumer(self, topics, group, auto_offset_reset="latest", auto_commit=False, on_commit=None, config=None):
+        return KafkaBusConsumer(
+            {
+                "bootstrap.servers": self.bootstrap_server,
+                "group.id": group,
+                "auto.offset.reset": auto_offset_reset,
+                "enable.auto.commit": auto_commit,
+                **({"on_commit": on_commit} if on_commit is not None else {}),
+                **(config or {}),
+            },
+            topics,
+        )
+
+    def create_topics(self, topics):
+        from confluent_kafka import KafkaException
+        from confluent_kafka.admin import NewTopic
+
+        created = []
+        fs = self.admin.create_topics(
+            [NewTopic(topic, num_partitions=partitions, replication_factor=1) for topic, partitions in topics.items()]
+        )
+        for topic, f in fs.items():
+            try:
+                f.result()
+                created.append(topic)
+                print(f"[INFO]Topic '{topic}' created successfully.")
+            except KafkaException as e:
+                if not e.args[0].code() == self.TOPIC_EXISTS:
+                    raise
+                print(f"[INFO]Topic '{topic}' already created.")
+        return created
+
+    def create_partitions(self, topic, partitions):
+        from confluent_kafka import KafkaException
+        from confluent_kafka.admin import NewPartitions
+
+        try:
+            fs = self.admin.create_partitions([NewPartitions(topic, partitions)])
+            for topic, f in fs.items():
+                f.result()
+                print(f"[INFO]Topic '{topic}' extended to {partitions} partitions.")
+        except KafkaException as e:
+            # 分区数已经不少于目标值
+            print(f"[INFO]Topic '{topic}' keeps its partitions: {e.args[0].str()}")
+
+    def delete_topics(self, topics):
+        self.admin.delete_topics(list(topics), operation_timeout=10)
+
+
+class KafkaBusConsumer(BusConsumer):
+    def __init__(self, config, topics):
+        from confluent_kafka import Consumer
+
+        self.consumer = Consumer(config)
+        self.consumer.subscribe(list(topics))
+
+    @staticmethod
+    def _partition_eof(msg):
+        # enable.partition.eof打开时读到分区末尾会收到一条错误消息，它不是真正的错误，调用方不需要处理
+        from confluent_kafka import KafkaError
+
+        return msg.error() is not None and msg.error().code() == KafkaError._PARTITION_EOF
+
+    def poll(self, timeout):
+        msg = self.consumer.poll(timeout=timeout)
+        if msg is not None and self._partition_eof(msg):
+            return None
+        return msg
+
+    def consume(self, num_messages, timeout):
+        return [msg for msg in self.consumer.consume(num_messages=num_messages, timeout=timeout)
+                if not self._partition_eof(msg)]
+
+    def commit(self, offsets=None, asynchronous=True):
+        from confluent_kafka import TopicPartition
+
+        if offsets is None:
+            self.consumer.commit(asynchronous=asynchronous)
+            return
+        self.consumer.commit(
+            offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()],
+            asynchronous=asynchronous,
+        )
+
+    def close(self):
+        self.consumer.close()
+
+
+class InProcessMessage:
+    """与confluent_kafka.Message接口一致的消息，key和value与Kafka一样以bytes返回"""
+
+    def __init__(self, topic, partition, offset, key, value):
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+        self.timestamp = time()
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return None
+
+
+class InProcessBus(MessageBus):
+    """
+    进程内的消息总线，语义与Kafka保持一致
+    - 每个(topic, partition)是一个只追加的日志，offset单调递增；每个分区只保留最近retention条消息
+    - 有key的消息按crc32取模分区（与librdkafka默认分区器一致），没有key的轮流写入各分区
+    - 同一group的消费者按加入顺序编号，第i个消费者分到partition % n == i的分区；提交的offset按group保存
+    - 向不存在的主题发送或订阅时自动创建单分区主题
+    """
+
+    def __init__(self, retention=None):
+        self.retention = retention or KafkaConfig.INPROCESS_RETENTION
+        self.cond = Condition()
+        # topic -> [(起始offset, deque(消息))]
+        self.topics = {}
+        # group -> [消费者]
+        self.members = defaultdict(list)
+        # group -> {(topic, partition): 下一个offset}
+        self.committed = defaultdict(dict)
+        self.next_partition = 0
+        self.delivery = DeliveryMetrics(KafkaConfig.DELIVERY_LATENCY_WINDOW)
+
+    def _partitions(self, topic, partitions=1):
+        log = self.topics.get(topic)
+        if log is None:
+            log = self.topics[topic] = [[0, deque()] for _ in range(partitions)]
+        return log
+
+    def _append(self, topic, key, value):
+        log = self._partitions(topic)
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if key:
+            partition = zlib.crc32(key) % len(log)
+        else:
+            partition = self.next_partition % len(log)
+            self.next_partition += 1
+        entry = log[partition]
+        messages = entry[1]
+        message = InProcessMessage(topic, partition, entry[0] + len(messages), key, value)
+        messages.append(message)
+        if len(messages) > self.retention:
+            messages.popleft()
+            entry[0] += 1
+        return message
+
+    def produce(self, topic, value, key=None, confirm=False):
+        start = perf_counter()
+        with self.cond:
+            message = self._append(topic, key, value)
+            self.cond.notify_all()
+        # 写入日志即送达
+        self.delivery.record_produce()
+        self.delivery.record_delivery(perf_counter() - start)
+        if not confirm:
+            return None
+        future = Future()
+        future.set_result(message)
+        return future
+
+    def produce_batch(self, topic, messages):
+        start = perf_counter()
+        with self.cond:
+            for key, value in messages:
+                self._append(topic, key, value)
+            self.cond.notify_all()
+        latency = perf_counter() - start
+        self.delivery.record_produce(len(messages))
+        for _ in messages:
+            self.delivery.record_delivery(latency)
+
+    def metrics(self):
+        return self.delivery.snapshot(0)
+
+    def consumer(self, topics, group, auto_offset_reset="latest", auto_commit=False, on_commit=None, config=None):
+        # 进程内的提交不会失败，不调用on_commit
+        consumer = InProcessConsumer(self, list(topics), group, auto_offset_reset, auto_commit)
+        with self.cond:
+            for topic in consumer.topics:
+                for partition, (base, messages) in enumerate(self._partitions(topic)):
+                    consumer.subscribed[(topic, partition)] = base + len(messages)
+            self.members[group].append(consumer)
+        return consumer
+
+    def create_topics(self, topics):
+        created = []
+        with self.cond:
+            for topic, partitions in topics.items():
+                if topic not in self.topics:
+                    self._partitions(topic, partitions)
+                    created.append(topic)
+        return created
+
+    def create_partitions(self, topic, partitions):
+        with self.cond:
+            log = self._partitions(topic)
+            log.extend([0, deque()] for _ in range(partitions - len(log)))
+
+    def delete_topics(self, topics):
+        with self.cond:
+            for topic in topics:
+                self.topics.pop(topic, None)
+                for committed in self.committed.values():
+                    for key in [key for key in committed if key[0] == topic]:
+                        del committed[key]
+
+    def _assignment(self, consumer):
+        """consumer当前分到的[(topic, partition)]，在持有cond时调用"""
+        members = self.members[consumer.group]
+        index, count = members.index(consumer), len(members)
+        return [
+            (topic, partition)
+            for topic in consumer.topics
+            for partition in range(len(self.topics.get(topic, ())))
+            if partition % count == index
+        ]
+
+    def _leave(self, consumer):
+        with self.cond:
+            members = self.members[consumer.group]
+            if consumer in members:
+                members.remove(consumer)
+
+
+class InProcessConsumer(BusConsumer):
+    def __init__(self, bus, topics, group, auto_offset_reset, auto_commit):
+        self.bus = bus
+        self.topics = topics
+        self.group = group
+        self.auto_offset_reset = auto_offset_reset
+        self.auto_commit = auto_commit
+        # (topic, partition) -> 下一个offset
+        self.positions = {}
+        # (topic, partition) -> 订阅时的日志末尾，latest从这里开始，不丢失订阅之后、第一次poll之前到达的消息
+        self.subscribed = {}
+        # 各分区轮流消费，避免一个分区的积压饿死其他分区
+        self.rotation = 0
+
+    def _position(self, topic, partition, entry):
+        key = (topic, partition)
+        position = self.positions.get(key)
+        if position is None:
+            # 新分到的分区从group提交的offset开始，没有提交过时按auto_offset_reset
+            position = self.bus.committed[self.group].get(key)
+            if position is None:
+                if self.auto_offset_reset == "earliest":
+                    position = entry[0]
+                else:
+                    position = self.subscribed.get(key, entry[0] + len(entry[1]))
+        # 超出保留范围的消息已被删除
+        return max(position, entry[0])
+
+    def _take(self, num_messages):
+        """在持有bus.cond时取出最多num_messages条已到达的消息"""
+        assignment = self.bus._assignment(self)
+        # 已经不属于本消费者的分区不再保留位置，重新分配后由新的消费者从提交的offset继续
+        for key in [key for key in self.positions if key not in assignment]:
+            del self.positions[key]
+        messages = []
+        if not assignment:
+            return messages
+        start = self.rotation
+        self.rotation += 1
+        for i in range(len(assignment)):
+            topic, partition = assignment[(start + i) % len(assignment)]
+            entry = self.bus.topics[topic][partition]
+            position = self._position(topic, partition, entry)
+            available = entry[0] + len(entry[1]) - position
+            count = min(available, num_messages - len(messages))
+            for offset in range(position, position + count):
+                messages.append(entry[1][offset - entry[0]])
+            self.positions[(topic, partition)] = position + count
+            if len(messages) >= num_messages:
+                break
+        if messages and self.auto_commit:
+            self.bus.committed[self.group].update(self.positions)
+        return messages
+
+    def consume(self, num_messages, timeout):
+        """返回已经到达的消息，没有消息时最多等待timeout秒，不等待凑满num_messages"""
+        deadline = time() + timeout
+        with self.bus.cond:
+            while True:
+                messages = self._take(num_messages)
+                remaining = deadline - time()
+                if messages or remaining <= 0:
+                    return messages
+                self.bus.cond.wait(remaining)
+
+    def poll(self, timeout):
+        messages = self.consume(1, timeout)
+        return messages[0] if messages else None
+
+    def commit(self, offsets=None, asynchronous=True):
+        with self.bus.cond:
+            self.bus.committed[self.group].update(self.positions if offsets is None else offsets)
+
+    def close(self):
+        self.bus._leave(self)
+
+
+def require_broker(component):
+    """
+    各组件单独成进程时的入口调用：进程内总线不能跨进程传递消息，配置为inprocess时直接退出，
+    避免scheduler、kubelet收不到任何消息却没有报错；单进程部署使用pkg.standalone
+    """
+    if KafkaConfig.BUS_BACKEND == "inprocess":
+        raise SystemExit(
+            f"[ERROR]{component} runs in its own process and cannot use MESSAGE_BUS=inprocess. "
+            f"Use 'python3 -m pkg.standalone' to run the control plane in one process."
+        )
+
+
+_shared_bus = None
+_kafka_buses = {}
+_shared_bus_lock = Lock()
+
+
+def message_bus(bootstrap_server=None):
+    """
+    按KafkaConfig.BUS_BACKEND返回消息总线，同一进程中共享
+    - 进程内总线只有一个实例，同一进程中的所有组件通过它通信
+    - Kafka总线每个bootstrap server一个实例，进程中的组件共用一个生产者和poll线程
+    """
+    global _shared_bus
+    with _shared_bus_lock:
+        if KafkaConfig.BUS_BACKEND == "inprocess":
+            if _shared_bus is None:
+                _shared_bus = InProcessBus()
+            return _shared_bus
+        bootstrap_server = bootstrap_server or KafkaConfig.BOOTSTRAP_SERVER
+        bus = _kafka_buses.get(bootstrap_server)
+        if bus is None:
+            bus = _kafka_buses[bootstrap_server] = KafkaBus(bootstrap_server)
+        return bus
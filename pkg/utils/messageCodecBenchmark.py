@@ -0,0 +1,79 @@
+"""
+消息编码基准测试：对比scheduler主题原来的pickle(PodConfig)、kubelet主题原来的json(to_dict())与messageCodec
+对testFile中的每个Pod yaml统计每条消息的字节数，以及编码、解码的平均耗时
+"""
+
+import os
+import glob
+import json
+import pickle
+import argparse
+from time import perf_counter
+
+import yaml
+
+from pkg.config.globalConfig import GlobalConfig
+from pkg.config.podConfig import PodConfig
+from pkg.utils import messageCodec
+
+
+def load_pods():
+    pods = []
+    for path in sorted(glob.glob(os.path.join(GlobalConfig.get_test_file_path(), "*.yaml"))):
+        with open(path, "r", encoding="utf-8") as file:
+            data = yaml.safe_load(file)
+        if isinstance(data, dict) and data.get("kind") == "Pod":
+            pods.append((os.path.basename(path), PodConfig(data)))
+    return pods
+
+
+def measure(encode, decode, iterations):
+    """返回(字节数, 编码微秒, 解码微秒)"""
+    data = encode()
+    start = perf_counter()
+    for _ in range(iterations):
+        encode()
+    encode_us = (perf_counter() - start) / iterations * 1e6
+    start = perf_counter()
+    for _ in range(iterations):
+        decode(data)
+    decode_us = (perf_counter() - start) / iterations * 1e6
+    return len(data), encode_us, decode_us
+
+
+def run(iterations):
+    rows = []
+    for name, pod in load_pods():
+        pod_json = pod.to_dict()
+        rows.append((name, "scheduler", "pickle", measure(lambda: pickle.dumps(pod), pickle.loads, iterations)))
+        rows.append((name, "scheduler", "codec", measure(
+            lambda: messageCodec.encode_schedule_request(pod), messageCodec.decode_schedule_request, iterations
+        )))
+        rows.append((name, "kubelet", "json", measure(
+            lambda: json.dumps(pod.to_dict()).encode("utf-8"), lambda data: PodConfig(json.loads(data)), iterations
+        )))
+        rows.append((name, "kubelet", "codec", measure(
+            lambda: messageCodec.encode_pod(pod.to_dict()), lambda data: PodConfig(messageCodec.decode(data)), iterations
+        )))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare message size and codec time of scheduler/kubelet messages.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = run(args.iterations)
+    totals = {}
+    for name, topic, codec, (size, encode_us, decode_us) in rows:
+        print(f"[{topic}/{codec}] {name}: bytes={size} encode={encode_us:.1f}us decode={decode_us:.1f}us")
+        total = totals.setdefault((topic, codec), [0, 0.0, 0.0, 0])
+        total[0] += size
+        total[1] += encode_us
+        total[2] += decode_us
+        total[3] += 1
+    for (topic, codec), (size, encode_us, decode_us, count) in totals.items():
+        print(
+            f"[{topic}/{codec}] average over {count} pods: bytes={size / count:.0f} "
+            f"encode={encode_us / count:.1f}us decode={decode_us / count:.1f}us"
+        )
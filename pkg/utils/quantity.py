@@ -0,0 +1,67 @@
+"""
+kubernetes资源数量的解析
+- CPU：核数，支持数字和"500m"这样的毫核写法
+- 内存：字节，支持数字、二进制后缀Ki/Mi/Gi/Ti、十进制后缀k/K/M/G/T，以及docker风格的小写b/m/g
+- 阈值：内存数量，或者"10%"这样相对于总量的百分比
+- Pod的资源请求：全部容器resources.requests之和
+"""
+
+BINARY_SUFFIXES = {"Ki": 1 << 10, "Mi": 1 << 20, "Gi": 1 << 30, "Ti": 1 << 40, "Pi": 1 << 50}
+DECIMAL_SUFFIXES = {"k": 10**3, "K": 10**3, "M": 10**6, "G": 10**9, "T": 10**12, "P": 10**15}
+# docker的mem_limit使用的小写单位，容器配置中的memory直接传给docker
+DOCKER_SUFFIXES = {"b": 1, "m": 1 << 20, "g": 1 << 30}
+
+
+def parse_cpu(value):
+    """返回CPU核数，None或空值返回0"""
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if value.endswith("m"):
+        return float(value[:-1]) / 1000
+    return float(value)
+
+
+def parse_memory(value):
+    """返回字节数，None或空值返回0"""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    for suffixes in (BINARY_SUFFIXES, DECIMAL_SUFFIXES, DOCKER_SUFFIXES):
+        for suffix, factor in suffixes.items():
+            if value.endswith(suffix):
+                return int(float(value[: -len(suffix)]) * factor)
+    return int(float(value))
+
+
+def parse_threshold(value, total):
+    """内存阈值：百分比相对于total计算，total未知时百分比阈值返回None"""
+    if isinstance(value, str) and value.strip().endswith("%"):
+        if not total:
+            return None
+        return int(total * float(value.strip()[:-1]) / 100)
+    return parse_memory(value)
+
+
+def pod_requests(containers):
+    """容器配置（dict）列表的资源请求之和：(CPU核数, 内存字节)"""
+    cpu, memory = 0.0, 0
+    for container in containers or []:
+        requests = (container.get("resources") or {}).get("requests") or {}
+        cpu += parse_cpu(requests.get("cpu"))
+        memory += parse_memory(requests.get("memory"))
+    return cpu, memory
+
+
+def format_memory(value):
+    """字节数转换为Ki/Mi/Gi表示，能整除时使用更大的单位"""
+    value = int(value)
+    for suffix in ("Gi", "Mi", "Ki"):
+        factor = BINARY_SUFFIXES[suffix]
+        if value and value % factor == 0:
+            return f"{value // factor}{suffix}"
+    return str(value)
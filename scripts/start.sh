@@ -51,6 +51,12 @@ if [ "$1" == "--stop" ]; then
     stop_all
 fi
 
+# 各组件分别运行在独立进程中，进程内消息总线无法跨进程传递消息
+if [ "${MESSAGE_BUS}" == "inprocess" ]; then
+    echo "${RED}MESSAGE_BUS=inprocess 只能用于单进程部署，请使用 python3 -m pkg.standalone${NC}"
+    exit 1
+fi
+
 echo "${BLUE}项目根目录: ${PROJECT_ROOT}${NC}"
 echo "${BLUE}PID 文件: ${PID_FILE}${NC}"
 
@@ -94,9 +100,12 @@ pids+=($api_server_pid)
 echo "${BLUE}等待 ApiServer 启动 (5秒)...${NC}"
 sleep 5
 
-# 2. 启动 Scheduler
-scheduler_pid=$(start_component "Scheduler" "python3 -m pkg.controller.scheduler" "${PROJECT_ROOT}/logs/scheduler.log")
-pids+=(scheduler_pid)
+# 2. 启动 Scheduler，SCHEDULER_REPLICAS 个实例共享同一消费组，分摊 scheduler 主题的分区
+SCHEDULER_REPLICAS=${SCHEDULER_REPLICAS:-1}
+for i in $(seq 1 $SCHEDULER_REPLICAS); do
+    scheduler_pid=$(start_component "Scheduler-$i" "python3 -m pkg.controller.scheduler --name scheduler-$i" "${PROJECT_ROOT}/logs/scheduler-$i.log")
+    pids+=($scheduler_pid)
+done
 
 # 等待 Scheduler 完全启动
 echo "${BLUE}等待 Sheduler 启动 (5秒)...${NC}"